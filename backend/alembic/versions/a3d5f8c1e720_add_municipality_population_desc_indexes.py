@@ -0,0 +1,35 @@
+"""Add descending NULLS LAST population indexes for municipality pagination
+
+Revision ID: a3d5f8c1e720
+Revises: f1c8e2a6d394
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a3d5f8c1e720'
+down_revision = 'f1c8e2a6d394'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Population pages sort NULLs last in both directions; descending order
+    # cannot reuse a backward scan of the ascending indexes (NULLs first)
+    op.create_index(
+        'ix_municipalities_population_desc_id',
+        'municipalities',
+        [sa.text('population DESC NULLS LAST'), sa.text('id DESC')],
+    )
+    op.create_index(
+        'ix_municipalities_province_population_desc',
+        'municipalities',
+        ['province_id', sa.text('population DESC NULLS LAST'), sa.text('id DESC')],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_municipalities_province_population_desc', table_name='municipalities')
+    op.drop_index('ix_municipalities_population_desc_id', table_name='municipalities')
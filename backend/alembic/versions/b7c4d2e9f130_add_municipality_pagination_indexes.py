@@ -0,0 +1,41 @@
+"""Add indexes for municipality keyset pagination and sorting
+
+Revision ID: b7c4d2e9f130
+Revises: 44048d776300
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b7c4d2e9f130'
+down_revision = '44048d776300'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (sort key, id) composites back the keyset predicate (key, id) > (:v, :id)
+    op.create_index('ix_municipalities_name_id', 'municipalities', ['name', 'id'])
+    op.create_index('ix_municipalities_population_id', 'municipalities', ['population', 'id'])
+    op.create_index('ix_municipalities_province_name', 'municipalities', ['province_id', 'name', 'id'])
+    op.create_index('ix_municipalities_province_population', 'municipalities', ['province_id', 'population', 'id'])
+    # Region filter goes through provinces
+    op.create_index(op.f('ix_provinces_region_id'), 'provinces', ['region_id'])
+    # Latest municipality-level score per municipality
+    op.create_index(
+        'ix_investment_scores_municipality_latest',
+        'investment_scores',
+        ['municipality_id', sa.text('calculation_date DESC')],
+        postgresql_where=sa.text('omi_zone_id IS NULL'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_investment_scores_municipality_latest', table_name='investment_scores')
+    op.drop_index(op.f('ix_provinces_region_id'), table_name='provinces')
+    op.drop_index('ix_municipalities_province_population', table_name='municipalities')
+    op.drop_index('ix_municipalities_province_name', table_name='municipalities')
+    op.drop_index('ix_municipalities_population_id', table_name='municipalities')
+    op.drop_index('ix_municipalities_name_id', table_name='municipalities')
@@ -0,0 +1,53 @@
+"""Add score_jobs table for queued score calculations
+
+Revision ID: c3e8a1f5d204
+Revises: b7c4d2e9f130
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8a1f5d204'
+down_revision = 'b7c4d2e9f130'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('score_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'SUCCEEDED', 'FAILED', name='jobstatus'), nullable=False),
+    sa.Column('municipality_id', sa.Integer(), nullable=True),
+    sa.Column('omi_zone_id', sa.Integer(), nullable=True),
+    sa.Column('custom_weights', sa.JSON(), nullable=True),
+    sa.Column('dedup_key', sa.String(length=64), nullable=False),
+    sa.Column('score_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['municipality_id'], ['municipalities.id'], ),
+    sa.ForeignKeyConstraint(['omi_zone_id'], ['omi_zones.id'], ),
+    sa.ForeignKeyConstraint(['score_id'], ['investment_scores.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # One active job per parameter set; completed jobs may repeat
+    op.create_index(
+        'ux_score_jobs_active_dedup_key',
+        'score_jobs',
+        ['dedup_key'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('PENDING', 'RUNNING')"),
+    )
+    op.create_index('ix_score_jobs_status_created', 'score_jobs', ['status', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_score_jobs_status_created', table_name='score_jobs')
+    op.drop_index('ux_score_jobs_active_dedup_key', table_name='score_jobs')
+    op.drop_table('score_jobs')
+    sa.Enum(name='jobstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,35 @@
+"""Add geocode_cache table for persisted Nominatim lookups
+
+Revision ID: d9f2b6a4e817
+Revises: c3e8a1f5d204
+Create Date: 2026-10-18 21:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd9f2b6a4e817'
+down_revision = 'c3e8a1f5d204'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('geocode_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('query_key', sa.String(length=500), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('kind', 'query_key', name='uq_geocode_cache_kind_query_key')
+    )
+    op.create_index('ix_geocode_cache_expires_at', 'geocode_cache', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_geocode_cache_expires_at', table_name='geocode_cache')
+    op.drop_table('geocode_cache')
@@ -0,0 +1,66 @@
+"""Add GiST indexes on boundaries/centroids and composite indexes for hot filters
+
+Revision ID: e4a7c1d3b582
+Revises: d9f2b6a4e817
+Create Date: 2026-10-18 22:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c1d3b582'
+down_revision = 'd9f2b6a4e817'
+branch_labels = None
+depends_on = None
+
+# Commented out in the initial migration: databases created through geoalchemy2's
+# create_table hook already have them, others don't, hence IF NOT EXISTS.
+SPATIAL_INDEXES = [
+    ('idx_municipalities_geometry', 'municipalities', 'geometry'),
+    ('idx_municipalities_centroid', 'municipalities', 'centroid'),
+    ('idx_omi_zones_geometry', 'omi_zones', 'geometry'),
+    ('idx_omi_zones_centroid', 'omi_zones', 'centroid'),
+]
+
+
+def upgrade():
+    for name, table, column in SPATIAL_INDEXES:
+        op.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gist ({column})')
+
+    # Score upsert: existing record for the same location and date
+    op.create_index(
+        'ix_investment_scores_location_date',
+        'investment_scores',
+        ['municipality_id', 'omi_zone_id', 'calculation_date'],
+    )
+    # Latest zone-level score per zone (the municipality-level one has its own partial index)
+    op.create_index(
+        'ix_investment_scores_zone_latest',
+        'investment_scores',
+        ['omi_zone_id', sa.text('calculation_date DESC')],
+        postgresql_where=sa.text('omi_zone_id IS NOT NULL'),
+    )
+    # Scoring engine: latest residential prices of a zone
+    op.create_index(
+        'ix_property_prices_zone_type_period',
+        'property_prices',
+        ['omi_zone_id', 'property_type', 'year', 'semester'],
+    )
+    # Latest demographics of a municipality
+    op.create_index('ix_demographics_municipality_year', 'demographics', ['municipality_id', 'year'])
+    # Market pulse: active (or delisted) listings of a municipality on one platform
+    op.create_index(
+        'ix_real_estate_listings_municipality_platform_active',
+        'real_estate_listings',
+        ['municipality_id', 'source_platform', 'is_active'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_real_estate_listings_municipality_platform_active', table_name='real_estate_listings')
+    op.drop_index('ix_demographics_municipality_year', table_name='demographics')
+    op.drop_index('ix_property_prices_zone_type_period', table_name='property_prices')
+    op.drop_index('ix_investment_scores_zone_latest', table_name='investment_scores')
+    op.drop_index('ix_investment_scores_location_date', table_name='investment_scores')
+    # The GiST indexes may predate this revision (see above) and are left in place
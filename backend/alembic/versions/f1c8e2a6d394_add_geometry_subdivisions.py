@@ -0,0 +1,79 @@
+"""Add ST_Subdivide lookup tables for municipality and OMI zone boundaries
+
+Revision ID: f1c8e2a6d394
+Revises: e4a7c1d3b582
+Create Date: 2026-10-18 23:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import geoalchemy2
+
+# revision identifiers, used by Alembic.
+revision = 'f1c8e2a6d394'
+down_revision = 'e4a7c1d3b582'
+branch_labels = None
+depends_on = None
+
+MAX_VERTICES = 256
+
+# (parent table, pieces table, FK column)
+LAYERS = [
+    ('municipalities', 'municipality_subdivisions', 'municipality_id'),
+    ('omi_zones', 'omi_zone_subdivisions', 'omi_zone_id'),
+]
+
+
+def upgrade():
+    for parent, pieces, key in LAYERS:
+        op.create_table(
+            pieces,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column(key, sa.Integer(), nullable=False),
+            sa.Column('parent_area', sa.Float(), nullable=False),
+            sa.Column(
+                'geometry',
+                geoalchemy2.types.Geometry(geometry_type='GEOMETRY', srid=4326, spatial_index=False),
+                nullable=False,
+            ),
+            sa.ForeignKeyConstraint([key], [f'{parent}.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(f'ix_{pieces}_{key}', pieces, [key])
+        op.create_index(f'ix_{pieces}_geometry', pieces, ['geometry'], postgresql_using='gist')
+
+        # Every insert or geometry update replaces the row's pieces; deletes cascade
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION sync_{pieces}() RETURNS trigger AS $$
+            BEGIN
+                DELETE FROM {pieces} WHERE {key} = NEW.id;
+                IF NEW.geometry IS NOT NULL THEN
+                    INSERT INTO {pieces} ({key}, parent_area, geometry)
+                    SELECT NEW.id, ST_Area(NEW.geometry), ST_Subdivide(NEW.geometry, {MAX_VERTICES});
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE TRIGGER sync_{pieces}
+            AFTER INSERT OR UPDATE OF geometry ON {parent}
+            FOR EACH ROW EXECUTE FUNCTION sync_{pieces}()
+        """)
+
+        # Backfill existing boundaries
+        op.execute(f"""
+            INSERT INTO {pieces} ({key}, parent_area, geometry)
+            SELECT id, ST_Area(geometry), ST_Subdivide(geometry, {MAX_VERTICES})
+            FROM {parent}
+            WHERE geometry IS NOT NULL
+        """)
+
+
+def downgrade():
+    for parent, pieces, key in reversed(LAYERS):
+        op.execute(f'DROP TRIGGER IF EXISTS sync_{pieces} ON {parent}')
+        op.execute(f'DROP FUNCTION IF EXISTS sync_{pieces}()')
+        op.drop_index(f'ix_{pieces}_geometry', table_name=pieces)
+        op.drop_index(f'ix_{pieces}_{key}', table_name=pieces)
+        op.drop_table(pieces)
@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, List, Any
+from app.api.schemas.location import MunicipalityResponse
+from app.api.schemas.score import InvestmentScoreResponse, OMIZoneScoreResponse
+from app.api.schemas.risk import RiskSummaryResponse
+from app.api.schemas.demographics import DemographicsResponse, CrimeStatisticsResponse
+
+# Section names accepted by the `sections` query parameter
+DASHBOARD_SECTIONS = ("score", "risks", "demographics", "crime", "prices", "statistics", "zones")
+
+
+class LocationDashboardResponse(BaseModel):
+    """Everything the location details page needs, in one response"""
+    municipality: MunicipalityResponse
+    sections: List[str] = Field(..., description="Sections included in this response")
+    score: Optional[InvestmentScoreResponse] = None
+    risks: Optional[RiskSummaryResponse] = None
+    demographics: Optional[DemographicsResponse] = None
+    crime: Optional[CrimeStatisticsResponse] = None
+    prices: Optional[List[Dict[str, Any]]] = Field(None, description="Price time series, oldest first")
+    statistics: Optional[Dict[str, Any]] = None
+    zones: Optional[List[OMIZoneScoreResponse]] = None
+    errors: Dict[str, str] = Field(default_factory=dict, description="Requested sections that could not be loaded")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "municipality": {"id": 15146, "name": "Milano", "code": "015146"},
+                "sections": ["score", "demographics"],
+                "score": {"overall_score": 7.8, "score_category": "Good"},
+                "demographics": {"municipality_id": 15146, "year": 2023, "population": 1352000},
+                "errors": {}
+            }
+        }
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
+from app.core.constants import MAX_BATCH_IDS, MAX_RESOLVE_POINTS
 
 class CoordinatesResponse(BaseModel):
     """Geographic coordinates"""
@@ -104,6 +105,36 @@ class LocationSearchRequest(BaseModel):
             }
         }
 
+class AutocompleteResult(BaseModel):
+    """Autocomplete suggestion (municipality, postal code or OMI zone)."""
+    type: Literal["municipality", "postal_code", "omi_zone"]
+    id: int = Field(..., description="Municipality id, or OMI zone id for zones")
+    label: str
+    municipality_id: int
+    municipality_name: str
+    code: Optional[str] = Field(None, description="ISTAT code, or zone code for OMI zones")
+    province_name: Optional[str] = None
+    postal_code: Optional[str] = None
+    coordinates: Optional[CoordinatesResponse] = None
+    score: float = Field(..., ge=0, le=1, description="Match quality (1 = exact)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "type": "municipality",
+                "id": 15146,
+                "label": "Milano",
+                "municipality_id": 15146,
+                "municipality_name": "Milano",
+                "code": "015146",
+                "province_name": "Milano",
+                "postal_code": None,
+                "coordinates": {"latitude": 45.4642, "longitude": 9.19},
+                "score": 0.9
+            }
+        }
+
+
 class LocationSearchResponse(BaseModel):
     """Response for location search"""
     query: str
@@ -151,6 +182,10 @@ class ParcelResponse(BaseModel):
     municipality_id: int
     municipality_name: Optional[str] = None
     linked_omi_zone: Optional[OMIZoneResponse] = None
+    match: Literal["contains", "nearest"] = Field(
+        "contains", description="'nearest' when the point is on no parcel (e.g. a road) and the closest one is returned"
+    )
+    distance_m: Optional[float] = Field(None, description="Distance to the parcel in metres (nearest match only)")
 
     class Config:
         from_attributes = True
@@ -167,7 +202,9 @@ class ParcelResponse(BaseModel):
                     "zone_type": "Centro",
                     "municipality_id": 58091,
                     "municipality_name": "Roma"
-                }
+                },
+                "match": "contains",
+                "distance_m": None
             }
         }
 
@@ -228,3 +265,67 @@ class DiscoveryResult(BaseModel):
                 "coordinates": {"latitude": 45.4642, "longitude": 9.1900}
             }
         }
+
+
+class MunicipalityBatchRequest(BaseModel):
+    """Request for several municipalities at once"""
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_IDS, description="Municipality IDs")
+
+    class Config:
+        json_schema_extra = {
+            "example": {"ids": [15146, 58091, 1272]}
+        }
+
+
+class MunicipalityBatchResponse(BaseModel):
+    """Batch municipality lookup; `results[i]` answers `ids[i]` (null when not found)"""
+    results: List[Optional[MunicipalityResponse]]
+    missing_ids: List[int] = Field(default_factory=list, description="Requested IDs that do not exist")
+
+
+class ResolvePoint(BaseModel):
+    """A coordinate to resolve; `id` is echoed back to match results to inputs"""
+    id: Optional[str] = Field(None, max_length=100, description="Caller's reference (e.g. asset id)")
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+
+class PointResolveRequest(BaseModel):
+    """Bulk point resolution (portfolio of coordinates)"""
+    points: List[ResolvePoint] = Field(..., min_length=1, max_length=MAX_RESOLVE_POINTS)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "points": [
+                    {"id": "asset-1", "latitude": 41.9028, "longitude": 12.4964},
+                    {"id": "asset-2", "latitude": 45.4642, "longitude": 9.19},
+                ]
+            }
+        }
+
+
+class ResolvedPoint(BaseModel):
+    """One line of the POST /locations/resolve NDJSON stream (null where nothing matches)"""
+    index: int = Field(..., description="Position of the point in the request")
+    id: Optional[str] = None
+    latitude: float
+    longitude: float
+    municipality: Optional[Dict[str, Any]] = None
+    omi_zone: Optional[Dict[str, Any]] = None
+    parcel: Optional[Dict[str, Any]] = None
+    score: Optional[Dict[str, Any]] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "index": 0,
+                "id": "asset-1",
+                "latitude": 41.9028,
+                "longitude": 12.4964,
+                "municipality": {"id": 58091, "name": "Roma", "code": "058091"},
+                "omi_zone": {"id": 4821, "zone_code": "B1", "zone_name": "Centro Storico"},
+                "parcel": {"id": 991, "foglio": "123", "particella": "456"},
+                "score": {"overall_score": 7.4, "level": "omi_zone", "calculation_date": "2026-05-01"},
+            }
+        }
@@ -1,7 +1,24 @@
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Dict, List, Any
-from datetime import date
+from datetime import date, datetime
 from app.api.schemas.location import CoordinatesResponse
+from app.core.constants import MAX_BATCH_IDS
+
+
+def score_category(score: Optional[float]) -> Optional[str]:
+    """Map an overall score (0-10) to its category label."""
+    if score is None:
+        return None
+    if score >= 8.5:
+        return "Excellent"
+    elif score >= 7.0:
+        return "Good"
+    elif score >= 5.5:
+        return "Fair"
+    elif score >= 4.0:
+        return "Below Average"
+    else:
+        return "Poor"
 
 class ScoreComponentsResponse(BaseModel):
     """Individual score components"""
@@ -49,6 +66,10 @@ class InvestmentScoreResponse(BaseModel):
     confidence: float = Field(default=0.75, ge=0, le=1, description="Calculation confidence score (0-1)")
     risk_factors: list[str] = Field(default_factory=list, description="Key risk factors to consider")
     strengths: list[str] = Field(default_factory=list, description="Key strengths")
+    calculated_at: Optional[datetime] = Field(None, description="When the score was last (re)calculated (UTC)")
+    score_age_seconds: Optional[int] = Field(None, description="Age of the score when served")
+    is_stale: bool = Field(default=False, description="Older than the freshness threshold")
+    revalidating: bool = Field(default=False, description="A background recalculation is queued")
     
     @field_validator('score_category', mode='before')
     @classmethod
@@ -58,17 +79,7 @@ class InvestmentScoreResponse(BaseModel):
             return v
         
         # Otherwise calculate from overall_score
-        score = info.data.get('overall_score', 5.0)
-        if score >= 8.5:
-            return "Excellent"
-        elif score >= 7.0:
-            return "Good"
-        elif score >= 5.5:
-            return "Fair"
-        elif score >= 4.0:
-            return "Below Average"
-        else:
-            return "Poor"
+        return score_category(info.data.get('overall_score', 5.0))
     
     class Config:
         from_attributes = True
@@ -110,7 +121,11 @@ class InvestmentScoreResponse(BaseModel):
                     "Strong demographic growth",
                     "Low seismic risk zone",
                     "Positive price trend"
-                ]
+                ],
+                "calculated_at": "2024-01-29T03:12:45",
+                "score_age_seconds": 86400,
+                "is_stale": False,
+                "revalidating": False
             }
         }
 
@@ -133,19 +148,7 @@ class OMIZoneScoreResponse(BaseModel):
         """Determine score category based on overall score"""
         if v:
             return v
-        score = info.data.get('overall_score')
-        if score is None:
-            return None
-        if score >= 8.5:
-            return "Excellent"
-        elif score >= 7.0:
-            return "Good"
-        elif score >= 5.5:
-            return "Fair"
-        elif score >= 4.0:
-            return "Below Average"
-        else:
-            return "Poor"
+        return score_category(info.data.get('overall_score'))
 
     class Config:
         from_attributes = True
@@ -198,3 +201,49 @@ class ScoreCalculationRequest(BaseModel):
                 }
             }
         }
+
+
+class ScoreBatchRequest(BaseModel):
+    """Request for the latest scores of several municipalities at once"""
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_IDS, description="Municipality IDs")
+
+    class Config:
+        json_schema_extra = {
+            "example": {"ids": [15146, 58091, 1272]}
+        }
+
+
+class ScoreBatchResponse(BaseModel):
+    """Batch score lookup; `results[i]` answers `ids[i]` (null when no score is stored)"""
+    results: List[Optional[InvestmentScoreResponse]]
+    missing_ids: List[int] = Field(default_factory=list, description="Requested IDs without a stored score")
+
+
+
+class ScoreJobResponse(BaseModel):
+    """Status of a queued score calculation"""
+    id: str
+    status: str = Field(..., description="pending, running, succeeded or failed")
+    municipality_id: Optional[int] = None
+    omi_zone_id: Optional[int] = None
+    deduplicated: bool = Field(False, description="True when an identical pending/running job was returned")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    score: Optional[InvestmentScoreResponse] = Field(None, description="Result, once the job has succeeded")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "5f0c6b1e9d6f4a7c8a1b2c3d4e5f6a7b",
+                "status": "succeeded",
+                "municipality_id": 15146,
+                "omi_zone_id": None,
+                "deduplicated": False,
+                "created_at": "2026-10-18T14:00:00",
+                "started_at": "2026-10-18T14:00:01",
+                "finished_at": "2026-10-18T14:00:03",
+                "score": {"overall_score": 8.2, "score_category": "Excellent"}
+            }
+        }
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import locations, properties, scores, risks, demographics
+from app.api.v1.endpoints import locations, properties, scores, risks, demographics, exports, admin
 from app.api.v1 import listings
 
 api_router = APIRouter()
@@ -8,4 +8,6 @@ api_router.include_router(properties.router, prefix="/properties", tags=["proper
 api_router.include_router(scores.router, prefix="/scores", tags=["scores"])
 api_router.include_router(risks.router, prefix="/risks", tags=["risks"])
 api_router.include_router(demographics.router, prefix="/demographics", tags=["demographics"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
 api_router.include_router(listings.router, tags=["listings"])  # No prefix needed - already in listings.py
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from typing import List, Dict, Any
+from app.core.security import require_admin
+from app.core.profiling import list_profiles, profile_path
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles", response_model=List[Dict[str, Any]])
+def get_profiles():
+    """
+    List stored request profiles, newest first.
+
+    Profiles are recorded for requests sent with the admin token in the
+    `X-Profile-Token` header; the response of such a request carries the
+    profile id in `X-Profile-Id`.
+
+    **Returns:**
+    - id, size_bytes and created_at of each stored profile
+
+    **Error Responses:**
+    - **403**: Missing or invalid `X-Admin-Token`
+    - **404**: Admin endpoints disabled (no ADMIN_TOKEN configured)
+    """
+    return list_profiles()
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    """
+    Download a stored profile in speedscope format.
+
+    Open the file at https://www.speedscope.app to explore it as a flamegraph.
+
+    **Error Responses:**
+    - **404**: Unknown profile id
+    """
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=f"{profile_id}.speedscope.json")
@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Literal, Optional
+from datetime import date
+from app.core.database import get_db
+from app.api.schemas.property import PropertyTypeEnum, TransactionTypeEnum
+from app.models.property import PropertyType, TransactionType
+from app.services.export_service import (
+    EXPORT_FORMATS,
+    PYARROW_AVAILABLE,
+    score_export,
+    price_export,
+    risk_export,
+    stream_export,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+ExportFormat = Literal["ndjson", "csv", "parquet"]
+
+
+def _streaming_export(db: Session, name: str, columns, stmt, fmt: str) -> StreamingResponse:
+    """Wrap an export query in a chunked StreamingResponse."""
+    if fmt == "parquet" and not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="Parquet export requires the pyarrow package")
+
+    media_type, extension = EXPORT_FORMATS[fmt]
+    bind = db.get_bind()
+    logger.info(f"Starting {fmt} export: {name}")
+    return StreamingResponse(
+        stream_export(lambda: Session(bind=bind), columns, stmt, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}-{date.today():%Y%m%d}.{extension}"'},
+    )
+
+
+@router.get("/scores")
+def export_scores(
+    fmt: ExportFormat = Query("ndjson", alias="format", description="ndjson, csv or parquet"),
+    level: Literal["all", "municipality", "zone"] = Query("all"),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream the latest investment score of every municipality and OMI zone.
+
+    One record per location with the overall score, confidence and all 13
+    component scores. Rows are read through a server-side cursor and sent with
+    chunked transfer encoding, so memory use is flat regardless of size.
+
+    **Parameters:**
+    - **format**: `ndjson` (default), `csv` or `parquet`
+    - **level**: `all` (default), `municipality` or `zone`
+
+    **Example Request:**
+    ```
+    GET /exports/scores?format=csv&level=municipality
+    ```
+
+    **Columns:**
+    level, municipality_id, municipality_code, municipality_name, omi_zone_id,
+    omi_zone_code, calculation_date, overall_score, confidence, and one
+    `<pillar>_score` column per component.
+
+    **Error Responses:**
+    - **501**: Parquet requested but pyarrow is not installed
+    """
+    columns, stmt = score_export(level)
+    return _streaming_export(db, "scores", columns, stmt, fmt)
+
+
+@router.get("/prices")
+def export_prices(
+    fmt: ExportFormat = Query("ndjson", alias="format", description="ndjson, csv or parquet"),
+    year_from: Optional[int] = Query(None, ge=2000, description="Only include records from this year on"),
+    property_type: Optional[PropertyTypeEnum] = Query(None),
+    transaction_type: Optional[TransactionTypeEnum] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream OMI price records (per zone and semester) for the whole country.
+
+    **Parameters:**
+    - **format**: `ndjson` (default), `csv` or `parquet`
+    - **year_from** (optional): Earliest year to include
+    - **property_type** (optional): residential, commercial, ...
+    - **transaction_type** (optional): sale or rent
+
+    **Error Responses:**
+    - **501**: Parquet requested but pyarrow is not installed
+    """
+    columns, stmt = price_export(
+        year_from=year_from,
+        property_type=PropertyType(property_type.value) if property_type else None,
+        transaction_type=TransactionType(transaction_type.value) if transaction_type else None,
+    )
+    return _streaming_export(db, "prices", columns, stmt, fmt)
+
+
+@router.get("/risks")
+def export_risks(
+    fmt: ExportFormat = Query("ndjson", alias="format", description="ndjson, csv or parquet"),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream seismic, flood and landslide indicators for every municipality.
+
+    **Parameters:**
+    - **format**: `ndjson` (default), `csv` or `parquet`
+
+    **Error Responses:**
+    - **501**: Parquet requested but pyarrow is not installed
+    """
+    columns, stmt = risk_export()
+    return _streaming_export(db, "risks", columns, stmt, fmt)
@@ -1,4 +1,8 @@
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
 from app.api.schemas.location import (
     LocationSearchRequest,
     LocationSearchResponse,
@@ -6,28 +10,98 @@ from app.api.schemas.location import (
     OMIZoneResponse,
     CoordinatesResponse,
     ParcelResponse,
+    AutocompleteResult,
     SearchResult,
-    DiscoveryResult
+    DiscoveryResult,
+    MunicipalityBatchRequest,
+    MunicipalityBatchResponse,
+    PointResolveRequest,
+    ResolvedPoint,
 )
-from app.core.database import get_db
-from app.services.geocoding import GeocodingService
-from app.models.geography import Municipality, OMIZone, Province, Region, CadastralParcel
+from app.api.schemas.dashboard import DASHBOARD_SECTIONS, LocationDashboardResponse
+from app.api.schemas.property import PropertyTypeEnum, TransactionTypeEnum
+from app.api.v1.endpoints.demographics import get_municipality_demographics, get_municipality_crime
+from app.api.v1.endpoints.properties import get_municipality_prices, get_municipality_statistics
+from app.api.v1.endpoints.risks import build_risk_summary
+from app.api.v1.endpoints.scores import get_municipality_score, build_zone_layer
+from app.core.database import get_db, get_heavy_db
+from app.core.admission import geocoding_limiter
+from app.core.config import settings
+from app.core.compression import response_cache, serialize_entry
+from app.services.geocoding import get_geocoding_service
+from app.services.parcel_lookup import find_parcel
+from app.services.point_resolution import stream_resolution
+from app.services.score_jobs import dashboard_cache_prefix
+from app.services.search_index import KINDS as AUTOCOMPLETE_KINDS, get_search_index
+from app.models.geography import Municipality, OMIZone, Province, Region
 from app.models.score import InvestmentScore
 from app.models.demographics import Demographics
 from geoalchemy2.shape import to_shape
 from geoalchemy2.functions import ST_MakeEnvelope, ST_Intersects
 from app.core.cache import global_cache
-from app.core.constants import CACHE_TTL_FEATURED_LOCATIONS
+from app.core.constants import CACHE_TTL_FEATURED_LOCATIONS, CACHE_TTL_DASHBOARD
+from app.core.serialization import fast_response, schema_defaults
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter, keyset_order
+from sqlalchemy import func
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-geocoder = GeocodingService()
+
+
+def _municipality_columns():
+    """
+    Columns needed to build a MunicipalityResponse straight from a query row.
+    Province/region names and centroid coordinates are resolved in SQL, so no
+    ORM objects, lazy loads or WKB decoding are needed per row.
+    """
+    return (
+        Municipality.id,
+        Municipality.name,
+        Municipality.code,
+        Province.name.label("province_name"),
+        Region.name.label("region_name"),
+        Municipality.population,
+        Municipality.area_sqkm,
+        Municipality.postal_codes,
+        func.ST_Y(Municipality.centroid).label("latitude"),
+        func.ST_X(Municipality.centroid).label("longitude"),
+    )
+
+
+def _municipality_query(db: Session, *extra_columns):
+    """Base query over _municipality_columns() with province/region joined."""
+    return (
+        db.query(*_municipality_columns(), *extra_columns)
+        .outerjoin(Province, Municipality.province_id == Province.id)
+        .outerjoin(Region, Province.region_id == Region.id)
+    )
+
+
+def _municipality_row_to_dict(row, investment_score: Optional[float] = None) -> dict:
+    """Shape a _municipality_columns() row like a serialized MunicipalityResponse."""
+    data = schema_defaults(MunicipalityResponse)
+    data.update(
+        id=row.id,
+        name=row.name,
+        code=row.code,
+        province_name=row.province_name,
+        region_name=row.region_name,
+        population=row.population,
+        area_sqkm=row.area_sqkm,
+        postal_codes=row.postal_codes,
+        investment_score=investment_score,
+        coordinates={"latitude": row.latitude, "longitude": row.longitude}
+        if row.latitude is not None else None,
+    )
+    return data
 
 @router.post("/search", response_model=LocationSearchResponse)
 async def search_location(
     request: LocationSearchRequest,
-    db: Session = Depends(get_db)
+    _: None = Depends(geocoding_limiter.admit),
+    db: Session = Depends(get_heavy_db)
 ):
     """
     Search for a location by address, postal code, or municipality name.
@@ -55,6 +129,11 @@ async def search_location(
     3. Spatial lookup to find matching OMI zone
     4. Return both entities with full metadata
     
+    Municipality names and postal codes skip geocoding. Nominatim is called at
+    most once per second across all workers; a request that would wait longer
+    than its budget (GEOCODE_REQUEST_BUDGET_SECONDS) falls back to the local
+    gazetteer and is answered with `geocoded: null`.
+    
     **Example Response:**
     ```json
     {
@@ -86,74 +165,133 @@ async def search_location(
     **Error Responses:**
     - **404**: Location not found or ambiguous query
     - **500**: Geocoding service error
+    - **503**: Geocoding capacity exhausted, retry after `Retry-After` seconds
     """
     try:
-        result = geocoder.resolve_search_query(db, request.query)
-        
-        # Convert to response model
-        response = LocationSearchResponse(
-            query=result['query'],
-            found=result['municipality'] is not None,
-            geocoded=result.get('geocoded'),
-            coordinates=result.get('coordinates'),
-        )
-        
-        # Add municipality if found
-        if result['municipality']:
-            muni_data = result['municipality']
-            muni = db.query(Municipality).filter(Municipality.id == muni_data['id']).first()
-            if muni:
-                # Fetch the latest municipality-level investment score so the
-                # search result map marker shows the real score (not hardcoded 5.0)
-                latest_score_row = (
-                    db.query(InvestmentScore.overall_score)
-                    .filter(
-                        InvestmentScore.municipality_id == muni.id,
-                        InvestmentScore.omi_zone_id == None,
-                    )
-                    .order_by(InvestmentScore.calculation_date.desc())
-                    .first()
-                )
-                investment_score = latest_score_row[0] if latest_score_row else None
-
-                response.municipality = MunicipalityResponse(
-                    id=muni.id,
-                    name=muni.name,
-                    code=muni.code,
-                    province_name=muni.province.name if muni.province else None,
-                    region_name=muni.province.region.name if muni.province and muni.province.region else None,
-                    population=muni.population,
-                    area_sqkm=muni.area_sqkm,
-                    postal_codes=muni.postal_codes,
-                    investment_score=investment_score,
-                    coordinates=CoordinatesResponse(
-                        latitude=to_shape(muni.centroid).y,
-                        longitude=to_shape(muni.centroid).x
-                    ) if muni.centroid else None
-                )
-        
-        # Add OMI zone if found
-        if result['omi_zone']:
-            zone_data = result['omi_zone']
-            zone = db.query(OMIZone).filter(OMIZone.id == zone_data['id']).first()
-            if zone:
-                response.omi_zone = OMIZoneResponse(
-                    id=zone.id,
-                    zone_code=zone.zone_code,
-                    zone_name=zone.zone_name,
-                    zone_type=zone.zone_type,
-                    municipality_id=zone.municipality_id,
-                    municipality_name=zone.municipality.name if zone.municipality else None,
-                )
-        
-        response.message = "Location found successfully" if response.found else "Location not found"
-        return response
-        
+        # Waiting for Nominatim happens on the event loop, not in a worker thread
+        result = await get_geocoding_service().resolve_search_query_async(db, request.query)
+        return await run_in_threadpool(_build_search_response, db, result)
     except Exception as e:
         logger.error(f"Location search failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _build_search_response(db: Session, result: dict) -> LocationSearchResponse:
+    # Convert to response model
+    response = LocationSearchResponse(
+        query=result['query'],
+        found=result['municipality'] is not None,
+        geocoded=result.get('geocoded'),
+        coordinates=result.get('coordinates'),
+    )
+    
+    # Add municipality if found
+    if result['municipality']:
+        muni_data = result['municipality']
+        muni = db.query(Municipality).filter(Municipality.id == muni_data['id']).first()
+        if muni:
+            # Fetch the latest municipality-level investment score so the
+            # search result map marker shows the real score (not hardcoded 5.0)
+            latest_score_row = (
+                db.query(InvestmentScore.overall_score)
+                .filter(
+                    InvestmentScore.municipality_id == muni.id,
+                    InvestmentScore.omi_zone_id == None,
+                )
+                .order_by(InvestmentScore.calculation_date.desc())
+                .first()
+            )
+            investment_score = latest_score_row[0] if latest_score_row else None
+
+            response.municipality = MunicipalityResponse(
+                id=muni.id,
+                name=muni.name,
+                code=muni.code,
+                province_name=muni.province.name if muni.province else None,
+                region_name=muni.province.region.name if muni.province and muni.province.region else None,
+                population=muni.population,
+                area_sqkm=muni.area_sqkm,
+                postal_codes=muni.postal_codes,
+                investment_score=investment_score,
+                coordinates=CoordinatesResponse(
+                    latitude=to_shape(muni.centroid).y,
+                    longitude=to_shape(muni.centroid).x
+                ) if muni.centroid else None
+            )
+    
+    # Add OMI zone if found
+    if result['omi_zone']:
+        zone_data = result['omi_zone']
+        zone = db.query(OMIZone).filter(OMIZone.id == zone_data['id']).first()
+        if zone:
+            response.omi_zone = OMIZoneResponse(
+                id=zone.id,
+                zone_code=zone.zone_code,
+                zone_name=zone.zone_name,
+                zone_type=zone.zone_type,
+                municipality_id=zone.municipality_id,
+                municipality_name=zone.municipality.name if zone.municipality else None,
+            )
+    
+    response.message = "Location found successfully" if response.found else "Location not found"
+    return response
+
+
+@router.get("/autocomplete", response_model=List[AutocompleteResult])
+def autocomplete_locations(
+    q: str = Query(..., min_length=1, max_length=100, description="Partial name or postal code"),
+    limit: int = Query(10, ge=1, le=50),
+    types: Optional[str] = Query(
+        None, description="Comma-separated subset of: municipality, postal_code, omi_zone"
+    ),
+    db: Session = Depends(get_db)
+):
+    """
+    Type-ahead suggestions for municipalities, postal codes and OMI zones.
+
+    Served from an in-process index (see app.services.search_index): no
+    Nominatim call and, once the index is loaded, no database query. Matching
+    ignores accents, case and a "Comune di" prefix, ranks exact > prefix >
+    word prefix > fuzzy (trigram) matches, and prefers larger municipalities
+    on ties.
+
+    **Examples:**
+    - `?q=mil` -> Milano, Milazzo, ...
+    - `?q=201` -> postal codes 20121, 20122, ... (Milano)
+    - `?q=forli` -> Forlì
+    - `?q=navigli&types=omi_zone` -> OMI zones named Navigli
+
+    **Error Responses:**
+    - **400**: Unknown value in `types`
+    """
+    kinds = None
+    if types:
+        kinds = [t.strip() for t in types.split(",") if t.strip()]
+        unknown = sorted(set(kinds) - set(AUTOCOMPLETE_KINDS))
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown types: {', '.join(unknown)} (allowed: {', '.join(AUTOCOMPLETE_KINDS)})"
+            )
+
+    return [
+        {
+            "type": entry.kind,
+            "id": entry.id,
+            "label": entry.label,
+            "municipality_id": entry.municipality_id,
+            "municipality_name": entry.municipality_name,
+            "code": entry.code,
+            "province_name": entry.province_name,
+            "postal_code": entry.postal_code,
+            "coordinates": {"latitude": entry.latitude, "longitude": entry.longitude}
+            if entry.latitude is not None else None,
+            "score": score,
+        }
+        for entry, score in get_search_index(db).search(q, limit=limit, kinds=kinds)
+    ]
+
+
 @router.get("/municipalities/{id}", response_model=MunicipalityResponse)
 def get_municipality(id: int, db: Session = Depends(get_db)):
     """
@@ -215,37 +353,114 @@ def get_municipality(id: int, db: Session = Depends(get_db)):
         coordinates=coords
     )
 
+@router.post("/municipalities/batch", response_model=MunicipalityBatchResponse)
+def get_municipalities_batch(request: MunicipalityBatchRequest, db: Session = Depends(get_db)):
+    """
+    Get several municipalities by ID in one call.
+
+    Returns the same profile as `/locations/municipalities/{id}` for every
+    requested id, resolved with a single set-based query (province/region
+    names and centroid coordinates computed in SQL).
+
+    **Request Body:**
+    ```json
+    {"ids": [15146, 58091, 1272]}
+    ```
+
+    **Returns:**
+    - **results**: One entry per requested id, in request order (null if not found)
+    - **missing_ids**: Requested ids that do not exist
+
+    **Error Responses:**
+    - **422**: Empty id list or more than MAX_BATCH_IDS ids
+    """
+    rows = (
+        _municipality_query(db, Province.code.label("province_code"))
+        .filter(Municipality.id.in_(set(request.ids)))
+        .all()
+    )
+    found = {}
+    for row in rows:
+        data = _municipality_row_to_dict(row)
+        data["province_code"] = row.province_code
+        found[row.id] = data
+
+    return fast_response({
+        "results": [found.get(mun_id) for mun_id in request.ids],
+        "missing_ids": [mun_id for mun_id in dict.fromkeys(request.ids) if mun_id not in found],
+    })
+
+def _latest_municipality_scores(db: Session):
+    """Subquery with the latest municipality-level score per municipality."""
+    return (
+        db.query(InvestmentScore.municipality_id, InvestmentScore.overall_score)
+        .filter(InvestmentScore.omi_zone_id == None)
+        .distinct(InvestmentScore.municipality_id)
+        .order_by(InvestmentScore.municipality_id, InvestmentScore.calculation_date.desc())
+        .subquery()
+    )
+
+
 @router.get("/municipalities", response_model=List[MunicipalityResponse])
 async def list_municipalities(
+    request: Request,
+    response: Response,
     region_id: Optional[int] = Query(None),
     province_id: Optional[int] = Query(None),
+    min_population: Optional[int] = Query(None, ge=0),
+    max_population: Optional[int] = Query(None, ge=0),
+    min_score: Optional[float] = Query(None, ge=0, le=10),
+    max_score: Optional[float] = Query(None, ge=0, le=10),
+    sort_by: Literal["id", "name", "population", "score"] = Query("id"),
+    order: Literal["asc", "desc"] = Query("asc"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
     limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, deprecated=True, description="Deprecated: use cursor"),
     db: Session = Depends(get_db)
 ):
     """
-    List municipalities with optional regional or provincial filtering.
-    
+    List municipalities with filtering, server-side sorting and cursor pagination.
+
     Paginated endpoint for browsing municipalities. Supports hierarchical filtering
-    by region or province. Useful for building navigation menus, dropdowns,
-    and directory listings.
-    
+    by region or province, range filters on population and investment score,
+    and sorting by id, name, population or score. Useful for building
+    navigation menus, dropdowns, directory listings and ranking tables.
+
     **Parameters:**
     - **region_id** (optional): Filter by region (e.g., Lombardia)
     - **province_id** (optional): Filter by province (e.g., Milano)
+    - **min_population / max_population** (optional): Population range
+    - **min_score / max_score** (optional): Latest investment score range
+    - **sort_by**: id (default), name, population or score
+    - **order**: asc (default) or desc
+    - **cursor**: Value of `X-Next-Cursor` from the previous page
     - **limit**: Max results per page (default: 100, max: 1000)
-    - **offset**: Pagination offset (default: 0)
-    
+    - **offset**: Deprecated offset pagination (ignored when a cursor is given)
+
     **Filtering Logic:**
     - If province_id provided: Returns only municipalities in that province
     - If region_id provided: Returns ALL municipalities in ALL provinces of that region
     - If neither provided: Returns all municipalities (use pagination!)
-    
+    - Sorting by population lists municipalities without one last;
+      population range filters skip them
+    - Sorting or filtering by score skips municipalities without a score;
+      score results include `investment_score`
+
+    **Pagination:**
+    Keyset pagination on `(sort key, id)`: for id, name and population every
+    page is a single index seek, so page 80 costs the same as page 1. Score
+    sorting ranks the latest score of every matching municipality on each
+    page (read through the partial latest-score index, one row per
+    municipality). Pages stay stable while data changes. When more results
+    exist, the response carries an `X-Next-Cursor` header (and a
+    `Link: rel="next"` header) to pass back as `cursor`.
+
     **Example Request:**
     ```
-    GET /municipalities?region_id=3&limit=50&offset=0
+    GET /municipalities?region_id=3&sort_by=population&order=desc&limit=50
+    GET /municipalities?region_id=3&sort_by=population&order=desc&limit=50&cursor=eyJzIjoi...
     ```
-    
+
     **Example Response:**
     ```json
     [
@@ -259,41 +474,78 @@ async def list_municipalities(
       {...}
     ]
     ```
-    
+
     **Use Cases:**
     - Populate region/province selection dropdowns
     - Build browsable municipal directory
-    - Implement autocomplete typeahead
+    - Rank municipalities by score or population
+
+    **Error Responses:**
+    - **400**: Invalid cursor, or cursor issued for a different sort order
     """
-    query = db.query(Municipality)
+    query = _municipality_query(db)
     if province_id:
         query = query.filter(Municipality.province_id == province_id)
     elif region_id:
-        from app.models.geography import Province
-        query = query.join(Province).filter(Province.region_id == region_id)
-        
-    municipalities = query.offset(offset).limit(limit).all()
-    
-    results = []
-    for m in municipalities:
-        coords = None
-        if m.centroid:
-            point = to_shape(m.centroid)
-            coords = CoordinatesResponse(latitude=point.y, longitude=point.x)
-        
-        results.append(MunicipalityResponse(
-            id=m.id,
-            name=m.name,
-            code=m.code,
-            province_name=m.province.name if m.province else None,
-            region_name=m.province.region.name if m.province and m.province.region else None,
-            population=m.population,
-            area_sqkm=m.area_sqkm,
-            postal_codes=m.postal_codes,
-            coordinates=coords
-        ))
-    
-    return results
+        query = query.filter(Province.region_id == region_id)
+
+    if min_population is not None:
+        query = query.filter(Municipality.population >= min_population)
+    if max_population is not None:
+        query = query.filter(Municipality.population <= max_population)
+
+    with_score = sort_by == "score" or min_score is not None or max_score is not None
+    if with_score:
+        latest = _latest_municipality_scores(db)
+        query = (
+            query.add_columns(latest.c.overall_score.label("investment_score"))
+            .join(latest, latest.c.municipality_id == Municipality.id)
+        )
+        if min_score is not None:
+            query = query.filter(latest.c.overall_score >= min_score)
+        if max_score is not None:
+            query = query.filter(latest.c.overall_score <= max_score)
+
+    sort_col = latest.c.overall_score if sort_by == "score" else getattr(Municipality, sort_by)
+    # Municipalities without a population sort last (and stay in the results)
+    nulls_last = sort_by == "population"
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort_by, order)
+        if sort_by == "id":
+            query = query.filter(Municipality.id > last_id if order == "asc" else Municipality.id < last_id)
+        else:
+            query = query.filter(keyset_filter(sort_col, Municipality.id, order, last_value, last_id, nulls_last))
+    elif offset:
+        query = query.offset(offset)
+
+    if sort_by == "id":
+        ordering = [Municipality.id.asc() if order == "asc" else Municipality.id.desc()]
+    else:
+        ordering = keyset_order(sort_col, Municipality.id, order, nulls_last)
+
+    # One extra row tells us whether there is a next page
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    headers = {}
+    if has_more:
+        last = rows[-1]
+        last_value = last.investment_score if sort_by == "score" else getattr(last, sort_by)
+        next_cursor = encode_cursor(sort_by, order, last_value, last.id)
+        next_url = request.url.remove_query_params("offset").include_query_params(cursor=next_cursor)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{next_url}>; rel="next"'
+
+    return fast_response(
+        [
+            _municipality_row_to_dict(row, row.investment_score if with_score else None)
+            for row in rows
+        ],
+        headers=headers,
+        response=response,
+    )
 
 @router.get("/discover", response_model=List[MunicipalityResponse])
 async def discover_locations(
@@ -351,10 +603,8 @@ async def discover_locations(
     - Max 150 results per request (prevents UI lag)
     - Spatial index enabled (fast bounding box queries)
     - Debounce recommended on frontend (800ms)
+    - Rows are built directly from the query (no per-row ORM loads)
     """
-    from sqlalchemy import func
-    from geoalchemy2.functions import ST_MakeEnvelope
-
     # Create bounding box envelope
     # ST_MakeEnvelope(xmin, ymin, xmax, ymax, srid)
     bbox = ST_MakeEnvelope(min_lon, min_lat, max_lon, max_lat, 4326)
@@ -372,7 +622,7 @@ async def discover_locations(
     
     # Base query for municipalities with a centroid in the bbox
     # Join with the subquery and then with InvestmentScore to get the actual score data
-    query = db.query(Municipality, InvestmentScore.overall_score).outerjoin(
+    query = _municipality_query(db, InvestmentScore.overall_score).outerjoin(
         latest_dates_subquery,
         Municipality.id == latest_dates_subquery.c.municipality_id
     ).outerjoin(
@@ -402,29 +652,12 @@ async def discover_locations(
     query = query.order_by(InvestmentScore.overall_score.desc().nulls_last())
     
     # Limit results to prevent UI lag
-    municipalities_data = query.limit(150).all()
+    rows = query.limit(150).all()
 
-    results = []
-    for m, score in municipalities_data:
-        coords = None
-        if m.centroid:
-            point = to_shape(m.centroid)
-            coords = CoordinatesResponse(latitude=point.y, longitude=point.x)
-        
-        results.append(MunicipalityResponse(
-            id=m.id,
-            name=m.name,
-            code=m.code,
-            province_name=m.province.name if m.province else None,
-            region_name=m.province.region.name if m.province and m.province.region else None,
-            population=m.population,
-            area_sqkm=m.area_sqkm,
-            postal_codes=m.postal_codes,
-            investment_score=score,
-            coordinates=coords
-        ))
-    
-    return results
+    return fast_response([
+        _municipality_row_to_dict(row, investment_score=row.overall_score)
+        for row in rows
+    ])
 
 @router.get("/featured", response_model=List[MunicipalityResponse])
 def get_featured_locations(db: Session = Depends(get_db)):
@@ -597,6 +830,10 @@ def get_parcel_at(
     particella identifiers and, when available, the pre-calculated linked OMI zone
     for instant price-range lookup.
 
+    A point on no parcel (a road, a gap in the map) returns the nearest parcel
+    within 25 m with `match: "nearest"` and its `distance_m`. Lookups are
+    cached per ~1 m grid cell (see app.services.parcel_lookup).
+
     **Parameters:**
     - **lat**: Latitude in WGS84
     - **lon**: Longitude in WGS84
@@ -607,36 +844,179 @@ def get_parcel_at(
     ```
 
     **Error Responses:**
-    - **404**: No cadastral parcel found at the given coordinates (data may not
-      be ingested for that municipality yet).
+    - **404**: No cadastral parcel found at or near the given coordinates (data
+      may not be ingested for that municipality yet).
     """
-    from sqlalchemy import func
+    parcel = find_parcel(db, lat, lon)
+    if parcel is None:
+        raise HTTPException(status_code=404, detail="No cadastral parcel found at the given coordinates")
+    return ParcelResponse(**parcel)
 
-    point = func.ST_MakePoint(lon, lat)
-    parcel = (
-        db.query(CadastralParcel)
-        .filter(func.ST_Intersects(CadastralParcel.geometry, func.ST_SetSRID(point, 4326)))
-        .first()
+
+@router.post(
+    "/resolve",
+    response_class=StreamingResponse,
+    responses={200: {
+        "content": {"application/x-ndjson": {"schema": ResolvedPoint.model_json_schema()}},
+        "description": "One ResolvedPoint JSON object per line, in request order",
+    }},
+)
+def resolve_points(
+    request: PointResolveRequest,
+    db: Session = Depends(get_heavy_db)
+):
+    """
+    Resolve a portfolio of coordinates in bulk.
+    
+    For each point: the municipality and OMI zone containing it, the cadastral
+    parcel at it, and the latest investment score (zone score, else municipality
+    score). Accepts up to 10,000 points per request.
+    
+    Points are resolved in chunks with a fixed number of set-based queries per
+    chunk (no per-point round-trips) and streamed back as NDJSON as each chunk
+    completes.
+    
+    **Request Body:**
+    ```json
+    {"points": [{"id": "asset-1", "latitude": 41.9028, "longitude": 12.4964}]}
+    ```
+    
+    **Response (one line per point, in request order):**
+    ```
+    {"index":0,"id":"asset-1","latitude":41.9028,"longitude":12.4964,"municipality":{...},"omi_zone":{...},"parcel":null,"score":{...}}
+    ```
+    Fields are `null` where nothing matches (e.g. no parcel data ingested).
+    
+    **Error Responses:**
+    - **422**: Empty request, more than 10,000 points, or coordinates out of range
+    """
+    bind = db.get_bind()
+    logger.info(f"Resolving {len(request.points)} points")
+    return StreamingResponse(
+        stream_resolution(lambda: Session(bind=bind), request.points),
+        media_type="application/x-ndjson",
     )
 
-    if not parcel:
-        raise HTTPException(status_code=404, detail="No cadastral parcel found at the given coordinates")
 
-    linked_omi: OMIZoneResponse | None = None
-    if parcel.omi_zone:
-        linked_omi = OMIZoneResponse(
-            id=parcel.omi_zone.id,
-            zone_code=parcel.omi_zone.zone_code,
-            zone_name=parcel.omi_zone.zone_name,
-            zone_type=parcel.omi_zone.zone_type,
-            municipality_id=parcel.omi_zone.municipality_id,
-            municipality_name=parcel.municipality.name if parcel.municipality else None,
-        )
+# Loaders take (db, heavy_db, id). Only the score section uses heavy_db: a
+# municipality that was never scored is calculated there, on the heavy pool
+# and under scoring admission control, as /scores/municipality/{id} does
+_DASHBOARD_SECTION_LOADERS = {
+    "score": lambda db, heavy_db, id: get_municipality_score(id, db, heavy_db),
+    "risks": lambda db, heavy_db, id: build_risk_summary(db, id),
+    "demographics": lambda db, heavy_db, id: get_municipality_demographics(id, db),
+    "crime": lambda db, heavy_db, id: get_municipality_crime(id, db),
+    "prices": lambda db, heavy_db, id: get_municipality_prices(
+        id, PropertyTypeEnum.RESIDENTIAL, TransactionTypeEnum.SALE, 20, db
+    ),
+    "statistics": lambda db, heavy_db, id: get_municipality_statistics(id, db),
+    "zones": lambda db, heavy_db, id: build_zone_layer(db, id),
+}
+
 
-    return ParcelResponse(
-        foglio=parcel.foglio,
-        particella=parcel.particella,
-        municipality_id=parcel.municipality_id,
-        municipality_name=parcel.municipality.name if parcel.municipality else None,
-        linked_omi_zone=linked_omi,
+def _load_dashboard_section(name: str, id: int, bind, heavy_bind):
+    """
+    Run one dashboard section on its own sessions (called from a worker thread).
+    Sessions are not thread-safe, so each section opens its own on the request's
+    engines; a session takes a connection only when first used, so sections
+    that never touch the heavy pool do not check one out.
+    """
+    db = Session(bind=bind, autoflush=False)
+    heavy_db = Session(bind=heavy_bind, autoflush=False)
+    try:
+        return _DASHBOARD_SECTION_LOADERS[name](db, heavy_db, id)
+    finally:
+        heavy_db.close()
+        db.close()
+
+
+@router.get("/{id}/dashboard", response_model=LocationDashboardResponse)
+async def get_location_dashboard(
+    id: int,
+    request: Request,
+    sections: Optional[str] = Query(
+        None,
+        description="Comma-separated sections to include "
+                    "(score, risks, demographics, crime, prices, statistics, zones). Default: all",
+    ),
+    db: Session = Depends(get_db),
+    heavy_db: Session = Depends(get_heavy_db),
+):
+    """
+    Get everything the location details page needs in a single call.
+
+    Replaces the separate score, risk, demographics, crime, price history,
+    statistics and zone-score requests. Independent sections are loaded
+    concurrently, each on its own database session, and the assembled
+    response is cached precompressed for CACHE_TTL_DASHBOARD.
+
+    **Parameters:**
+    - **id**: Municipality unique identifier
+    - **sections**: Optional comma-separated subset of sections
+
+    **Returns:**
+    - **municipality**: Municipality profile (always included)
+    - One key per requested section, with the same payload as the
+      corresponding standalone endpoint
+    - **errors**: Sections that could not be loaded (e.g. no crime data),
+      keyed by section name
+
+    **Example Request:**
+    `GET /api/v1/locations/15146/dashboard?sections=score,risks,zones`
+
+    **Error Responses:**
+    - **400**: Unknown section name
+    - **404**: Municipality not found
+    """
+    if sections:
+        requested = {s.strip() for s in sections.split(",") if s.strip()}
+        unknown = requested - set(DASHBOARD_SECTIONS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown dashboard sections: {', '.join(sorted(unknown))}")
+        selected = [s for s in DASHBOARD_SECTIONS if s in requested]
+    else:
+        selected = list(DASHBOARD_SECTIONS)
+
+    cache_key = dashboard_cache_prefix(id) + ",".join(selected)
+    if settings.RESPONSE_CACHE_ENABLED:
+        entry = response_cache.get(cache_key)
+        if entry is not None:
+            return entry.to_response(request)
+
+    row = await run_in_threadpool(
+        lambda: _municipality_query(db, Province.code.label("province_code"))
+        .filter(Municipality.id == id)
+        .first()
     )
+    if not row:
+        raise HTTPException(status_code=404, detail="Municipality not found")
+    municipality = _municipality_row_to_dict(row)
+    municipality["province_code"] = row.province_code
+
+    results = await asyncio.gather(
+        *(
+            run_in_threadpool(_load_dashboard_section, name, id, db.get_bind(), heavy_db.get_bind())
+            for name in selected
+        ),
+        return_exceptions=True,
+    )
+
+    payload = {"municipality": municipality, "sections": selected, "errors": {}}
+    transient_failure = False
+    for name, result in zip(selected, results):
+        if isinstance(result, HTTPException) and result.status_code < 500:
+            # Missing data for this municipality: stable, safe to cache
+            payload[name] = None
+            payload["errors"][name] = result.detail
+        elif isinstance(result, Exception):
+            logger.error(f"Dashboard section '{name}' failed for municipality {id}: {result}")
+            payload[name] = None
+            payload["errors"][name] = "Section temporarily unavailable"
+            transient_failure = True
+        else:
+            payload[name] = result
+
+    entry = serialize_entry(payload, LocationDashboardResponse)
+    if settings.RESPONSE_CACHE_ENABLED and not transient_failure:
+        response_cache.set(cache_key, entry, CACHE_TTL_DASHBOARD)
+    return entry.to_response(request)
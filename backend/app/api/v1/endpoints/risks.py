@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
@@ -12,14 +12,15 @@ from app.api.schemas.risk import (
     AirQualityResponse
 )
 from app.models.geography import Municipality
-from geoalchemy2.shape import to_shape
-from shapely.geometry import mapping
-import json
+from app.core.serialization import orm_to_dict, schema_defaults, loads as json_loads
+from app.core.compression import cached_json_response
+from app.core.constants import CACHE_TTL_RISK_SUMMARY
+from sqlalchemy import func
 
 router = APIRouter()
 
 @router.get("/municipality/{id}", response_model=RiskSummaryResponse)
-def get_municipality_risks(id: int, db: Session = Depends(get_db)):
+def get_municipality_risks(id: int, request: Request, db: Session = Depends(get_db)):
     """
     Get comprehensive multi-hazard environmental risk assessment for a municipality.
     
@@ -43,6 +44,7 @@ def get_municipality_risks(id: int, db: Session = Depends(get_db)):
     Each risk type includes `*_map_data` field with GeoJSON FeatureCollection
     for rendering on interactive maps. Geometry includes municipality boundaries
     or centroids with risk scores as properties.
+    The serialized summary is cached precompressed (gzip/brotli) for 24 hours.
     
     **Example Response:**
     ```json
@@ -92,7 +94,24 @@ def get_municipality_risks(id: int, db: Session = Depends(get_db)):
     **Error Responses:**
     - **404**: Municipality not found
     """
-    muni = db.query(Municipality).filter(Municipality.id == id).first()
+    return cached_json_response(
+        request,
+        f"risk_summary:{id}",
+        CACHE_TTL_RISK_SUMMARY,
+        lambda: build_risk_summary(db, id),
+        response_model=RiskSummaryResponse,
+    )
+
+
+def build_risk_summary(db: Session, id: int) -> dict:
+    """Risk summary payload, including per-layer GeoJSON map data."""
+    # Boundary (or centroid) is encoded once by PostGIS and shared by every map layer
+    muni = db.query(
+        Municipality.id,
+        Municipality.name,
+        Municipality.area_sqkm,
+        func.ST_AsGeoJSON(func.coalesce(Municipality.geometry, Municipality.centroid)).label("geojson"),
+    ).filter(Municipality.id == id).first()
     if not muni:
         raise HTTPException(status_code=404, detail="Municipality not found")
 
@@ -141,9 +160,10 @@ def get_municipality_risks(id: int, db: Session = Depends(get_db)):
         level = "Very High"
 
     # Generate map data for spatial visualization
-    def _create_geojson(muni, score, risk_type):
-        geom = muni.geometry or muni.centroid
-        if not geom:
+    geometry = json_loads(muni.geojson)
+
+    def _create_geojson(score, risk_type):
+        if not geometry:
             return None
         return {
             "type": "FeatureCollection",
@@ -155,34 +175,44 @@ def get_municipality_risks(id: int, db: Session = Depends(get_db)):
                     "risk_type": risk_type,
                     "hazard_level": "High" if score > 70 else "Moderate" if score > 40 else "Low"
                 },
-                "geometry": mapping(to_shape(geom))
+                "geometry": geometry
             }]
         }
 
-    return {
-        "municipality_id": id,
-        "municipality_name": muni.name,
-        "seismic_risk": SeismicRiskResponse.from_orm(seismic) if seismic else None,
-        "flood_risk": FloodRiskResponse(
+    flood_response = None
+    if flood:
+        flood_response = schema_defaults(FloodRiskResponse)
+        flood_response.update(
             municipality_id=id,
             hazard_level=flood.risk_level,
             risk_score=flood.risk_score,
             area_at_risk_sqkm=flood.high_hazard_area_pct * muni.area_sqkm / 100 if flood.high_hazard_area_pct and muni.area_sqkm else None,
             population_exposed=flood.population_exposed
-        ) if flood else None,
-        "landslide_risk": LandslideRiskResponse(
+        )
+
+    landslide_response = None
+    if landslide:
+        landslide_response = schema_defaults(LandslideRiskResponse)
+        landslide_response.update(
             municipality_id=id,
             hazard_level=landslide.risk_level,
             risk_score=landslide.risk_score,
             area_at_risk_sqkm=landslide.high_hazard_area_pct * muni.area_sqkm / 100 if landslide.high_hazard_area_pct and muni.area_sqkm else None
-        ) if landslide else None,
-        "climate_projection": ClimateProjectionResponse.from_orm(climate) if climate else None,
-        "air_quality": AirQualityResponse.from_orm(aq) if aq else None,
+        )
+
+    return {
+        "municipality_id": id,
+        "municipality_name": muni.name,
+        "seismic_risk": orm_to_dict(seismic, SeismicRiskResponse) if seismic else None,
+        "flood_risk": flood_response,
+        "landslide_risk": landslide_response,
+        "climate_projection": orm_to_dict(climate, ClimateProjectionResponse) if climate else None,
+        "air_quality": orm_to_dict(aq, AirQualityResponse) if aq else None,
         "overall_risk_level": level,
         "total_risk_score": avg_score,
-        "seismic_map_data": _create_geojson(muni, seismic.risk_score, "seismic") if seismic else None,
-        "flood_map_data": _create_geojson(muni, flood.risk_score, "flood") if flood else None,
-        "landslide_map_data": _create_geojson(muni, landslide.risk_score, "landslide") if landslide else None,
-        "climate_map_data": _create_geojson(muni, climate_risk_score, "climate") if climate else None,
-        "air_quality_map_data": _create_geojson(muni, aq_risk_score, "air_quality") if aq else None
+        "seismic_map_data": _create_geojson(seismic.risk_score, "seismic") if seismic else None,
+        "flood_map_data": _create_geojson(flood.risk_score, "flood") if flood else None,
+        "landslide_map_data": _create_geojson(landslide.risk_score, "landslide") if landslide else None,
+        "climate_map_data": _create_geojson(climate_risk_score, "climate") if climate else None,
+        "air_quality_map_data": _create_geojson(aq_risk_score, "air_quality") if aq else None
     }
@@ -1,24 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session, joinedload
 from typing import List
-from app.core.database import get_db
-from app.services.scoring_engine import ScoringEngine
-from app.api.schemas.score import InvestmentScoreResponse, ScoreComponentsResponse, ScoreCalculationRequest, OMIZoneScoreResponse
-from app.models.score import InvestmentScore
+from app.core.database import get_db, get_heavy_db
+from app.core.admission import scoring_limiter
+from app.services.scoring_engine import get_scoring_engine
+from app.api.schemas.score import (
+    InvestmentScoreResponse, ScoreComponentsResponse, ScoreCalculationRequest, OMIZoneScoreResponse,
+    ScoreBatchRequest, ScoreBatchResponse, ScoreJobResponse, score_category
+)
+from app.models.score import InvestmentScore, ScoreJob
 from app.models.geography import Municipality, OMIZone
 import logging
 from datetime import date
+from app.core.config import settings
 from app.core.constants import CACHE_TTL_SCORES
+from app.core.serialization import loads as json_loads
+from app.core.compression import cached_json_response
+from app.services.score_jobs import (
+    invalidate_score_caches, job_runner, schedule_refresh, score_age_seconds, submit_job, zone_layer_cache_key
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-engine = ScoringEngine()
 
 @router.post("/calculate", response_model=InvestmentScoreResponse)
-async def calculate_investment_score(
+def calculate_investment_score(
     request: ScoreCalculationRequest, 
-    db: Session = Depends(get_db)
+    _: None = Depends(scoring_limiter.admit),
+    db: Session = Depends(get_heavy_db)
 ):
     """
     Calculate and save investment score for a municipality or OMI zone.
@@ -82,11 +92,18 @@ async def calculate_investment_score(
     }
     ```
     
+    **Admission Control:**
+    Runs on the dedicated heavy-work connection pool, at most
+    SCORING_MAX_CONCURRENT at a time; excess requests queue briefly, then
+    receive 503 with a `Retry-After` header.
+
     **Error Responses:**
     - **404**: Municipality or OMI zone not found
     - **500**: Calculation error (insufficient data)
+    - **503**: Scoring capacity exhausted, retry after `Retry-After` seconds
     """
     try:
+        engine = get_scoring_engine()
         result = engine.calculate_score(
             db, 
             municipality_id=request.municipality_id,
@@ -95,25 +112,98 @@ async def calculate_investment_score(
         )
         # Save to DB
         saved_score = engine.save_score(db, result)
+        invalidate_score_caches(db, request.municipality_id, request.omi_zone_id)
         return _format_score_response(saved_score)
     except Exception as e:
         logger.error(f"Score calculation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/jobs", response_model=ScoreJobResponse, status_code=202)
+def submit_score_job(request: ScoreCalculationRequest, response: Response, db: Session = Depends(get_db)):
+    """
+    Queue a score calculation and return immediately.
+
+    Same body as `POST /scores/calculate`, but the work runs on a background
+    worker pool. Poll `GET /scores/jobs/{id}` (also given in the `Location`
+    header) until `status` is `succeeded` or `failed`.
+
+    **Deduplication:**
+    Submitting the same location and weights while an identical job is still
+    pending or running returns that job (`deduplicated: true`) instead of
+    queueing another.
+
+    **Error Responses:**
+    - **400**: Neither municipality_id nor omi_zone_id given
+    - **404**: Municipality or OMI zone not found
+    """
+    if request.omi_zone_id:
+        if not db.query(OMIZone.id).filter(OMIZone.id == request.omi_zone_id).first():
+            raise HTTPException(status_code=404, detail="OMI zone not found")
+    elif request.municipality_id:
+        if not db.query(Municipality.id).filter(Municipality.id == request.municipality_id).first():
+            raise HTTPException(status_code=404, detail="Municipality not found")
+    else:
+        raise HTTPException(status_code=400, detail="Either municipality_id or omi_zone_id must be provided")
+
+    job, created = submit_job(db, request.municipality_id, request.omi_zone_id, request.custom_weights)
+    if created:
+        job_runner.dispatch(job.id)
+    response.headers["Location"] = f"{settings.API_V1_PREFIX}/scores/jobs/{job.id}"
+    return _format_job_response(job, deduplicated=not created)
+
+
+@router.get("/jobs/{job_id}", response_model=ScoreJobResponse)
+def get_score_job(job_id: str, db: Session = Depends(get_db)):
+    """
+    Status of a queued score calculation; includes the score once it has succeeded.
+
+    **Error Responses:**
+    - **404**: Unknown job id
+    """
+    job = db.query(ScoreJob).options(joinedload(ScoreJob.score)).filter(ScoreJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Score job not found")
+    return _format_job_response(job)
+
+
+def _format_job_response(job: ScoreJob, deduplicated: bool = False) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status.value,
+        "municipality_id": job.municipality_id,
+        "omi_zone_id": job.omi_zone_id,
+        "deduplicated": deduplicated,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "error": job.error,
+        "score": _format_score_response(job.score) if job.score is not None else None,
+    }
+
+
 @router.get("/municipality/{id}", response_model=InvestmentScoreResponse)
-def get_municipality_score(id: int, db: Session = Depends(get_db)):
+def get_municipality_score(
+    id: int,
+    db: Session = Depends(get_db),
+    heavy_db: Session = Depends(get_heavy_db)
+):
     """
-    Retrieve or calculate investment score for a municipality (with caching).
+    Retrieve investment score for a municipality (stale-while-revalidate).
     
-    Attempts to return cached score from memory (6 hours TTL) or database.
-    If no cached score exists, calculates a new score using the scoring engine.
+    Returns the most recent stored score immediately, from memory (6 hours TTL)
+    or the database. A score older than SCORE_FRESHNESS_SECONDS is still
+    returned, flagged `is_stale`, and a background recalculation is queued
+    (one job per municipality, however many readers hit it).
     Optimized for repeated API calls from frontend dashboards.
     
     **Caching Strategy:**
     1. Check in-memory cache (fast, 6-hour TTL)
     2. Check database for persisted scores (slower)
-    3. Calculate new score if none exists (slowest)
+    3. Calculate and store a score only if none was ever stored (slowest)
+    
+    `calculated_at` and `score_age_seconds` state how old the served score is;
+    `revalidating` is true while a refresh is queued.
     
     **Parameters:**
     - **id**: Municipality unique identifier
@@ -167,7 +257,7 @@ def get_municipality_score(id: int, db: Session = Depends(get_db)):
     # Try memory cache first
     cached_response = global_cache.get(CACHE_KEY)
     if cached_response:
-        return cached_response
+        return _with_freshness(db, cached_response, municipality_id=id)
 
     # Try DB cache (InvestmentScore table)
     cached = db.query(InvestmentScore).filter(
@@ -178,46 +268,100 @@ def get_municipality_score(id: int, db: Session = Depends(get_db)):
     if cached:
         response = _format_score_response(cached)
         global_cache.set(CACHE_KEY, response, TTL_SECONDS)
-        return response
+        return _with_freshness(db, response, municipality_id=id)
         
     try:
-        result = engine.calculate_score(db, municipality_id=id)
-        # Create a temporary InvestmentScore object for formatting
-        temp_score = InvestmentScore(
-            municipality_id=id,
-            overall_score=result['overall_score'],
-            calculation_date=result['calculation_date'],
-            price_trend_score=result['component_scores']['price_trend'],
-            affordability_score=result['component_scores']['affordability'],
-            rental_yield_score=result['component_scores']['rental_yield'],
-            demographics_score=result['component_scores']['demographics'],
-            crime_score=result['component_scores']['crime'],
-            connectivity_score=result['component_scores']['connectivity'],
-            digital_connectivity_score=result['component_scores']['digital_connectivity'],
-            services_score=result['component_scores']['services'],
-            air_quality_score=result['component_scores']['air_quality'],
-            seismic_risk_score=result['component_scores']['seismic'],
-            flood_risk_score=result['component_scores']['flood'],
-            landslide_risk_score=result['component_scores']['landslide'],
-            climate_risk_score=result['component_scores']['climate'],
-            weights=result['weights']
-        )
-        response = _format_score_response(temp_score)
+        # Never scored: compute once on the heavy pool (subject to scoring
+        # admission control) and store it, so later reads are served from the table
+        with scoring_limiter.slot():
+            engine = get_scoring_engine()
+            saved = engine.save_score(heavy_db, engine.calculate_score(heavy_db, municipality_id=id))
+            response = _format_score_response(saved)
         global_cache.set(CACHE_KEY, response, TTL_SECONDS)
-        return response
+        return _with_freshness(db, response, municipality_id=id)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Scoring error for municipality {id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/batch", response_model=ScoreBatchResponse)
+def get_municipality_scores_batch(request: ScoreBatchRequest, db: Session = Depends(get_db)):
+    """
+    Retrieve the latest stored scores for many municipalities in one call.
+
+    Designed for comparison views: 200 candidates take one round-trip and one
+    query instead of 200 calls to `/scores/municipality/{id}`. Scores already
+    in the in-memory cache are served from it; the rest are resolved with a
+    single DISTINCT ON query (latest municipality-level score per id).
+
+    Unlike the single-item endpoint, missing scores are not calculated on the
+    fly; their ids are listed in `missing_ids` and can be scored via
+    `/scores/calculate`.
+
+    **Request Body:**
+    ```json
+    {"ids": [15146, 58091, 1272]}
+    ```
+
+    **Returns:**
+    - **results**: One entry per requested id, in request order (null if no score)
+    - **missing_ids**: Requested ids without a stored score
+
+    **Error Responses:**
+    - **422**: Empty id list or more than MAX_BATCH_IDS ids
+    """
+    from app.core.cache import global_cache
+
+    found = {}
+    pending = []
+    for mun_id in dict.fromkeys(request.ids):
+        cached_response = global_cache.get(f"score_municipality_{mun_id}")
+        if cached_response:
+            found[mun_id] = cached_response
+        else:
+            pending.append(mun_id)
+
+    if pending:
+        latest = (
+            db.query(InvestmentScore)
+            .options(joinedload(InvestmentScore.municipality))
+            .filter(
+                InvestmentScore.municipality_id.in_(pending),
+                InvestmentScore.omi_zone_id == None
+            )
+            .distinct(InvestmentScore.municipality_id)
+            .order_by(InvestmentScore.municipality_id, InvestmentScore.calculation_date.desc())
+            .all()
+        )
+        for score in latest:
+            response = _format_score_response(score)
+            global_cache.set(f"score_municipality_{score.municipality_id}", response, CACHE_TTL_SCORES)
+            found[score.municipality_id] = response
+
+    return {
+        "results": [found.get(mun_id) for mun_id in request.ids],
+        "missing_ids": [mun_id for mun_id in dict.fromkeys(request.ids) if mun_id not in found],
+    }
+
+
 @router.get("/omi-zone/{id}", response_model=InvestmentScoreResponse)
-def get_omi_zone_score(id: int, db: Session = Depends(get_db)):
+def get_omi_zone_score(
+    id: int,
+    db: Session = Depends(get_db),
+    heavy_db: Session = Depends(get_heavy_db)
+):
     """
-    Retrieve or calculate investment score for an OMI zone.
+    Retrieve investment score for an OMI zone (stale-while-revalidate).
     
     Similar to municipality scoring but provides granular, neighborhood-level
     investment analysis. OMI zones represent distinct urban areas with unique
     market dynamics (e.g., "Centro Storico" vs "Periferia" in Rome).
     
+    The latest stored score is returned immediately; a stale one is refreshed
+    by a background job. Only a zone that was never scored is calculated
+    inline (and stored).
+    
     **Parameters:**
     - **id**: OMI zone unique identifier
     
@@ -253,42 +397,33 @@ def get_omi_zone_score(id: int, db: Session = Depends(get_db)):
     ).order_by(InvestmentScore.calculation_date.desc()).first()
     
     if cached:
-        return _format_score_response(cached)
+        return _with_freshness(db, _format_score_response(cached), omi_zone_id=id)
         
     try:
-        result = engine.calculate_score(db, omi_zone_id=id)
-        temp_score = InvestmentScore(
-            omi_zone_id=id,
-            overall_score=result['overall_score'],
-            calculation_date=result['calculation_date'],
-            price_trend_score=result['component_scores']['price_trend'],
-            affordability_score=result['component_scores']['affordability'],
-            rental_yield_score=result['component_scores']['rental_yield'],
-            demographics_score=result['component_scores']['demographics'],
-            crime_score=result['component_scores']['crime'],
-            connectivity_score=result['component_scores']['connectivity'],
-            digital_connectivity_score=result['component_scores']['digital_connectivity'],
-            services_score=result['component_scores']['services'],
-            air_quality_score=result['component_scores']['air_quality'],
-            seismic_risk_score=result['component_scores']['seismic'],
-            flood_risk_score=result['component_scores']['flood'],
-            landslide_risk_score=result['component_scores']['landslide'],
-            climate_risk_score=result['component_scores']['climate'],
-            weights=result['weights']
-        )
-        return _format_score_response(temp_score)
+        with scoring_limiter.slot():
+            engine = get_scoring_engine()
+            saved = engine.save_score(heavy_db, engine.calculate_score(heavy_db, omi_zone_id=id))
+            response = _format_score_response(saved)
+        invalidate_score_caches(heavy_db, saved.municipality_id, id)
+        return _with_freshness(db, response, omi_zone_id=id)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Scoring error for OMI zone {id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/municipality/{id}/omi-zones", response_model=List[OMIZoneScoreResponse])
-def get_municipality_omi_zone_scores(id: int, db: Session = Depends(get_db)):
+def get_municipality_omi_zone_scores(id: int, request: Request, db: Session = Depends(get_db)):
     """
     Batch retrieve investment scores for all OMI zones in a municipality.
 
     Returns zone details, scores, and GeoJSON geometry for map rendering.
-    Optimized endpoint for large municipalities with multiple micro-zones.
+    Optimized endpoint for large municipalities with multiple micro-zones:
+    latest scores are resolved with a single DISTINCT ON query and GeoJSON is
+    produced by PostGIS (ST_AsGeoJSON). The serialized layer is cached
+    precompressed (gzip/brotli) for CACHE_TTL_SCORES and supports ETag
+    revalidation.
 
     **Use Cases:**
     - Display neighborhood score cards on municipality detail page
@@ -326,59 +461,93 @@ def get_municipality_omi_zone_scores(id: int, db: Session = Depends(get_db)):
     **Error Responses:**
     - **404**: Municipality not found
     """
-    from geoalchemy2.shape import to_shape
-    from shapely.geometry import mapping
+    return cached_json_response(
+        request,
+        zone_layer_cache_key(id),
+        CACHE_TTL_SCORES,
+        lambda: build_zone_layer(db, id),
+        response_model=List[OMIZoneScoreResponse],
+    )
+
+
+def build_zone_layer(db: Session, id: int) -> list:
+    """Zone rows (latest score + GeoJSON) for one municipality."""
+    from sqlalchemy import func
 
     # Verify municipality exists
-    mun = db.query(Municipality).filter(Municipality.id == id).first()
+    mun = db.query(Municipality.id).filter(Municipality.id == id).first()
     if not mun:
         raise HTTPException(status_code=404, detail="Municipality not found")
 
-    # Get all OMI zones for this municipality
-    zones = db.query(OMIZone).filter(OMIZone.municipality_id == id).all()
+    # Latest score per zone, resolved in one pass instead of one query per zone
+    latest_scores = (
+        db.query(
+            InvestmentScore.omi_zone_id,
+            InvestmentScore.overall_score,
+            InvestmentScore.confidence_score,
+        )
+        .join(OMIZone, OMIZone.id == InvestmentScore.omi_zone_id)
+        .filter(OMIZone.municipality_id == id)
+        .distinct(InvestmentScore.omi_zone_id)
+        .order_by(InvestmentScore.omi_zone_id, InvestmentScore.calculation_date.desc())
+        .subquery()
+    )
 
-    results = []
-    for zone in zones:
-        # Get cached score (most recent)
-        cached = db.query(InvestmentScore).filter(
-            InvestmentScore.omi_zone_id == zone.id
-        ).order_by(InvestmentScore.calculation_date.desc()).first()
+    # Geometry is encoded by PostGIS so no WKB decoding happens in Python
+    rows = (
+        db.query(
+            OMIZone.id,
+            OMIZone.zone_code,
+            OMIZone.zone_name,
+            OMIZone.zone_type,
+            func.ST_AsGeoJSON(OMIZone.geometry).label("geojson"),
+            func.ST_Y(OMIZone.centroid).label("latitude"),
+            func.ST_X(OMIZone.centroid).label("longitude"),
+            latest_scores.c.overall_score,
+            latest_scores.c.confidence_score,
+        )
+        .outerjoin(latest_scores, latest_scores.c.omi_zone_id == OMIZone.id)
+        .filter(OMIZone.municipality_id == id)
+        .all()
+    )
 
-        # Convert geometry to GeoJSON
+    results = []
+    for row in rows:
         geojson = None
-        if zone.geometry:
-            try:
-                geojson = mapping(to_shape(zone.geometry))
-            except Exception as e:
-                logger.warning(f"Failed to convert geometry for zone {zone.id}: {e}")
-
-        # Extract centroid coordinates
-        centroid_coords = None
-        if zone.centroid:
+        if row.geojson:
             try:
-                centroid_shape = to_shape(zone.centroid)
-                centroid_coords = {
-                    "latitude": centroid_shape.y,
-                    "longitude": centroid_shape.x
-                }
-            except Exception as e:
-                logger.warning(f"Failed to extract centroid for zone {zone.id}: {e}")
+                geojson = json_loads(row.geojson)
+            except ValueError as e:
+                logger.warning(f"Failed to decode geometry for zone {row.id}: {e}")
 
         results.append({
-            "zone_id": zone.id,
-            "zone_code": zone.zone_code,
-            "zone_name": zone.zone_name,
-            "zone_type": zone.zone_type,
+            "zone_id": row.id,
+            "zone_code": row.zone_code,
+            "zone_name": row.zone_name,
+            "zone_type": row.zone_type,
             "municipality_id": id,
-            "overall_score": cached.overall_score if cached else None,
-            "confidence": cached.confidence_score if cached else None,
-            "centroid": centroid_coords,
+            "overall_score": row.overall_score,
+            "score_category": score_category(row.overall_score),
+            "confidence": row.confidence_score,
+            "centroid": {"latitude": row.latitude, "longitude": row.longitude}
+            if row.latitude is not None else None,
             "geometry": geojson
         })
 
     return results
 
 
+def _with_freshness(db: Session, response: dict, municipality_id: int = None, omi_zone_id: int = None) -> dict:
+    """
+    Copy of a stored score annotated with its age. A score older than
+    SCORE_FRESHNESS_SECONDS is served as-is and refreshed in the background.
+    """
+    age = score_age_seconds(response.get("calculated_at"))
+    is_stale = age is not None and age > settings.SCORE_FRESHNESS_SECONDS
+    revalidating = is_stale and schedule_refresh(municipality_id, omi_zone_id)
+    return {**response, "score_age_seconds": age, "is_stale": is_stale, "revalidating": revalidating}
+
+
 def _format_score_response(model: InvestmentScore):
     """Maps DB model fields to the enhanced InvestmentScoreResponse schema."""
     overall = model.overall_score
@@ -424,6 +593,7 @@ def _format_score_response(model: InvestmentScore):
         "omi_zone_id": model.omi_zone_id,
         "omi_zone_code": model.omi_zone.zone_code if model.omi_zone else None,
         "calculation_date": model.calculation_date,
+        "calculated_at": model.updated_at or model.created_at,
         "weights": model.weights,
         "recommendation": recommend,
         "confidence": confidence,
@@ -0,0 +1,110 @@
+"""
+Admission control for expensive endpoints.
+
+Each endpoint class (scoring, geocoding) gets an `AdmissionLimiter`: at most
+`max_concurrent` requests run at once, up to `max_queue` more wait for a slot
+for at most `queue_timeout` seconds, and anything beyond that is shed
+immediately with `503 Service Unavailable` and a `Retry-After` header.
+Cheap endpoints are never queued behind a burst of scoring or Nominatim
+calls.
+
+Heavy work also runs on its own connection pool (`HeavySessionLocal` in
+app.core.database, sized to the limiters), so a burst cannot exhaust the
+connections that light endpoints depend on.
+
+Limiters are thread-based because the protected work runs in Starlette's
+threadpool; they can be used as a FastAPI dependency
+(`Depends(scoring_limiter.admit)`) or around a code path
+(`with scoring_limiter.slot(): ...`).
+"""
+
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Generator
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionLimiter:
+    """Concurrency limit with a bounded, time-limited wait queue."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.shed = 0
+        self._condition = threading.Condition()
+
+    def _reject(self, reason: str) -> HTTPException:
+        self.shed += 1
+        logger.warning(f"Admission [{self.name}] shed request: {reason} (active={self.active}, waiting={self.waiting})")
+        return HTTPException(
+            status_code=503,
+            detail=f"Server busy ({self.name}), please retry shortly",
+            headers={"Retry-After": str(max(1, math.ceil(self.queue_timeout)))},
+        )
+
+    def acquire(self) -> None:
+        """Take a slot, waiting in the queue if needed; raises HTTPException(503) when shed."""
+        with self._condition:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                return
+            if self.waiting >= self.max_queue:
+                raise self._reject("queue full")
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject("queue timeout")
+                    self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+
+    def release(self) -> None:
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def admit(self) -> Generator[None, None, None]:
+        """FastAPI dependency holding a slot for the duration of the request."""
+        with self.slot():
+            yield
+
+    def stats(self) -> Dict[str, int]:
+        return {"active": self.active, "waiting": self.waiting, "shed": self.shed, "limit": self.max_concurrent}
+
+
+# Score calculation (POST /scores/calculate and cache-miss score reads)
+scoring_limiter = AdmissionLimiter(
+    "scoring", settings.SCORING_MAX_CONCURRENT, settings.SCORING_MAX_QUEUE, settings.ADMISSION_QUEUE_TIMEOUT
+)
+
+# Location search backed by Nominatim
+geocoding_limiter = AdmissionLimiter(
+    "geocoding", settings.GEOCODING_MAX_CONCURRENT, settings.GEOCODING_MAX_QUEUE, settings.ADMISSION_QUEUE_TIMEOUT
+)
+
+LIMITERS = (scoring_limiter, geocoding_limiter)
@@ -1,18 +1,25 @@
 import time
 import threading
+from collections import OrderedDict
 from typing import Any, Optional, Dict
 import logging
 
+from app.core.metrics import record_cache_lookup
+
 logger = logging.getLogger(__name__)
 
 class SimpleTTLCache:
     """
     A simple in-memory cache with Time-To-Live (TTL) support.
     Thread-safe implementation using Lock for concurrent access protection.
+    With `max_entries`, the least recently used key is evicted once full.
     """
-    def __init__(self):
-        # Dictionary to hold the data: key -> value
-        self.cache: Dict[str, Any] = {}
+    def __init__(self, name: str = "default", max_entries: Optional[int] = None):
+        # Cache name, used as a metrics label
+        self.name = name
+        self.max_entries = max_entries
+        # Dictionary to hold the data: key -> value, least recently used first
+        self.cache: "OrderedDict[str, Any]" = OrderedDict()
         # Dictionary to hold expiration times: key -> expiration_timestamp
         self.expirations: Dict[str, float] = {}
         # Thread lock for safe concurrent access
@@ -28,6 +35,8 @@ class SimpleTTLCache:
                 if time.time() < self.expirations[key]:
                     # Cache hit
                     logger.debug(f"Cache HIT for key: {key}")
+                    record_cache_lookup(self.name, key, hit=True)
+                    self.cache.move_to_end(key)
                     return self.cache[key]
                 else:
                     # Cache expired
@@ -36,6 +45,7 @@ class SimpleTTLCache:
             else:
                 logger.debug(f"Cache MISS for key: {key}")
                 
+        record_cache_lookup(self.name, key, hit=False)
         return None
 
     def set(self, key: str, value: Any, ttl_seconds: int):
@@ -44,8 +54,27 @@ class SimpleTTLCache:
         """
         with self._lock:
             self.cache[key] = value
+            self.cache.move_to_end(key)
             self.expirations[key] = time.time() + ttl_seconds
             logger.debug(f"Cache SET for key: {key} with TTL: {ttl_seconds}s")
+            if self.max_entries is not None:
+                while len(self.cache) > self.max_entries:
+                    self._delete_unsafe(next(iter(self.cache)))
+
+    def delete(self, key: str):
+        """Remove a single key (no-op if missing)."""
+        with self._lock:
+            self._delete_unsafe(key)
+            logger.debug(f"Cache DELETE for key: {key}")
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Remove every key starting with `prefix`; returns how many were removed."""
+        with self._lock:
+            keys = [key for key in self.cache if key.startswith(prefix)]
+            for key in keys:
+                self._delete_unsafe(key)
+        logger.debug(f"Cache DELETE {len(keys)} keys with prefix: {prefix}")
+        return len(keys)
 
     def _delete_unsafe(self, key: str):
         """Internal helper to remove item (must be called with lock held)."""
@@ -63,5 +92,5 @@ class SimpleTTLCache:
 
 # Global cache instance
 # We can create specific instances if needed, but a global one is often useful for app-level caching.
-global_cache = SimpleTTLCache()
+global_cache = SimpleTTLCache("global")
 
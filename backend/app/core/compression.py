@@ -0,0 +1,301 @@
+"""
+HTTP response compression and a cache of precompressed responses.
+
+GeoJSON zone layers and risk maps compress 5-10x, so two pieces work together:
+
+- `CompressionMiddleware` negotiates `Accept-Encoding` (brotli when the
+  `brotli` package is installed, otherwise gzip) and compresses any JSON/text
+  response above `settings.COMPRESSION_MINIMUM_SIZE` on the fly.
+- `cached_json_response()` serializes a cacheable payload once, compresses it
+  once per encoding and keeps the bytes in `response_cache`. A cache hit sends
+  the stored bytes directly: no JSON encoding and no compression work. The
+  middleware leaves these responses alone because they already carry a
+  `Content-Encoding`.
+"""
+
+import gzip
+import hashlib
+import logging
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+from app.core.cache import SimpleTTLCache
+from app.core.config import settings
+from app.core.constants import RESPONSE_CACHE_MAX_ENTRIES
+from app.core.serialization import dumps
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/geo+json",
+    "application/x-ndjson",
+    "text/",
+)
+
+# Stored entries are compressed once, so they can afford a higher level than
+# the per-request middleware.
+STORED_GZIP_LEVEL = 9
+STORED_BROTLI_QUALITY = 9
+STREAM_GZIP_LEVEL = 6
+STREAM_BROTLI_QUALITY = 4
+
+
+def supported_encodings() -> tuple:
+    """Encodings this server can produce, in order of preference."""
+    return ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """
+    Pick the best content coding from an Accept-Encoding header.
+
+    Honours q-values (`gzip;q=0`, `*;q=0.5`) and prefers brotli over gzip on
+    ties. Returns "identity" when nothing acceptable is supported.
+    """
+    if not accept_encoding:
+        return "identity"
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = "identity", 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress a complete body with the given content coding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=STORED_BROTLI_QUALITY if level is None else level)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=STORED_GZIP_LEVEL if level is None else level, mtime=0)
+    return body
+
+
+def _is_compressible(content_type: str) -> bool:
+    return any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+
+
+class _StreamCompressor:
+    """Incremental compressor for streamed (multi-chunk) responses."""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=STREAM_BROTLI_QUALITY)
+            self._compress = self._compressor.process
+            self._flush = self._compressor.finish
+        else:
+            # wbits=31 selects the gzip container
+            self._compressor = zlib.compressobj(STREAM_GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._compress = self._compressor.compress
+            self._flush = self._compressor.flush
+
+    def process(self, chunk: bytes, final: bool) -> bytes:
+        data = self._compress(chunk) if chunk else b""
+        if final:
+            data += self._flush()
+        return data
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses JSON/text responses per Accept-Encoding.
+
+    Single-message responses are compressed in one go when they reach
+    `minimum_size`; streamed responses are compressed chunk by chunk. Responses
+    that already declare a Content-Encoding (e.g. from the precompressed
+    cache) pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding == "identity":
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                response_headers = {k.lower(): v for k, v in message.get("headers", [])}
+                content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                if b"content-encoding" in response_headers or not _is_compressible(content_type):
+                    passthrough = True
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _StreamCompressor(encoding) if more_body else None
+                out_headers = [
+                    (k, v) for k, v in start_message.get("headers", [])
+                    if k.lower() not in (b"content-length", b"content-encoding")
+                ]
+                out_headers.append((b"content-encoding", encoding.encode("latin-1")))
+                out_headers = _with_vary_accept_encoding(out_headers)
+
+                if not more_body:
+                    compressed = compress(body, encoding, STREAM_BROTLI_QUALITY if encoding == "br" else STREAM_GZIP_LEVEL)
+                    out_headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                    await send({**start_message, "headers": out_headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    passthrough = True
+                    return
+
+                await send({**start_message, "headers": out_headers})
+
+            await send({
+                "type": "http.response.body",
+                "body": compressor.process(body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _with_vary_accept_encoding(headers: list) -> list:
+    """Raw ASGI headers with `Accept-Encoding` merged into a single Vary header."""
+    values = []
+    others = []
+    for key, value in headers:
+        if key.lower() == b"vary":
+            values.extend(v.strip() for v in value.decode("latin-1").split(",") if v.strip())
+        else:
+            others.append((key, value))
+    if "accept-encoding" not in (v.lower() for v in values):
+        values.append("Accept-Encoding")
+    return others + [(b"vary", ", ".join(values).encode("latin-1"))]
+
+
+@dataclass
+class CompressedEntry:
+    """A serialized response body stored in every supported encoding."""
+    bodies: Dict[str, bytes]
+    digest: str
+    media_type: str = "application/json"
+
+    def etag(self, encoding: str) -> str:
+        """Strong validator of one representation: each encoding gets its own."""
+        return f'"{self.digest}"' if encoding == "identity" else f'"{self.digest}-{encoding}"'
+
+    def to_response(self, request: Request) -> Response:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding not in self.bodies:
+            encoding = "identity"
+        etag = self.etag(encoding)
+        headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        # If-None-Match uses the weak comparison: a W/ prefix still matches
+        if if_none_match and etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.bodies[encoding], media_type=self.media_type, headers=headers)
+
+
+def build_entry(body: bytes, media_type: str = "application/json") -> CompressedEntry:
+    """Compress an identity body once per supported encoding."""
+    bodies = {"identity": body}
+    for encoding in supported_encodings():
+        bodies[encoding] = compress(body, encoding)
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return CompressedEntry(bodies=bodies, digest=digest, media_type=media_type)
+
+
+def serialize_entry(content: Any, response_model: Any = None) -> CompressedEntry:
+    """
+    Serialize and compress a payload shaped like `response_model`.
+
+    Unless FAST_JSON_RESPONSES is enabled, the content is validated against
+    `response_model` first, exactly as FastAPI would have done.
+    """
+    if response_model is not None and not settings.FAST_JSON_RESPONSES:
+        adapter = TypeAdapter(response_model)
+        content = adapter.dump_python(adapter.validate_python(content), mode="json")
+    return build_entry(dumps(content))
+
+
+# Separate from global_cache: entries are large byte blobs, not Python objects.
+# Keys span every zone layer, risk summary and dashboard section set, so the
+# cache is an LRU rather than growing until TTLs expire
+response_cache = SimpleTTLCache("response", max_entries=RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def cached_json_response(
+    request: Request,
+    key: str,
+    ttl_seconds: int,
+    build: Callable[[], Any],
+    response_model: Any = None,
+) -> Response:
+    """
+    Serve a JSON payload from the precompressed cache, building it on a miss.
+
+    `build` returns the response content (already shaped like the route's
+    response model); it is validated, serialized and compressed once, before
+    it is stored.
+    """
+    if settings.RESPONSE_CACHE_ENABLED:
+        entry = response_cache.get(key)
+        if entry is not None:
+            return entry.to_response(request)
+
+    entry = serialize_entry(build(), response_model)
+    if settings.RESPONSE_CACHE_ENABLED:
+        response_cache.set(key, entry, ttl_seconds)
+    return entry.to_response(request)
@@ -22,10 +22,23 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    ADMIN_TOKEN: Optional[str] = None  # Enables /admin endpoints and on-demand profiling when set
     
     # External APIs
     NOMINATIM_USER_AGENT: str = "italian-property-platform"
     NOMINATIM_BASE_URL: str = "https://nominatim.openstreetmap.org"
+    GEOCODER_PROVIDER: str = "nominatim"  # "nominatim" or "photon"
+    GEOCODER_BASE_URL: Optional[str] = None  # Self-hosted instance; defaults to NOMINATIM_BASE_URL / localhost Photon
+    GEOCODER_RATE_PER_SECOND: float = 1.0  # Public Nominatim policy: 1 request/second; 0 = unlimited (self-hosted)
+    GEOCODER_BURST: int = 1
+    GEOCODER_RATE_LIMIT_FILE: Optional[str] = None  # Shares the rate limit across processes on a host (POSIX)
+    GEOCODER_TIMEOUT_SECONDS: float = 10.0
+    GEOCODER_MAX_CONCURRENCY: int = 1  # Parallel requests in batch mode (raise for self-hosted providers)
+    GEOCODE_REQUEST_BUDGET_SECONDS: float = 3.0  # Max time an API request waits for + spends on the geocoder
+    GEOCODE_CACHE_ENABLED: bool = True  # Persist geocoder results in the geocode_cache table
+    GEOCODE_CACHE_TTL_SECONDS: int = 180 * 86400  # Expiry of found results
+    GEOCODE_NEGATIVE_TTL_SECONDS: int = 7 * 86400  # Expiry of "no result" entries
+    GEOCODE_MEMORY_TTL_SECONDS: int = 3600  # In-process copy in front of the table
     
     # Data paths
     OMI_DATA_PATH: str = "./data/raw/omi"
@@ -36,6 +49,42 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = "INFO"
     
+    # Performance
+    FAST_JSON_RESPONSES: bool = False  # Skip Pydantic validation on large list/GeoJSON endpoints
+    RESPONSE_CACHE_ENABLED: bool = True  # Keep GeoJSON layers in memory, precompressed
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Bytes; smaller responses are sent uncompressed
+    METRICS_ENABLED: bool = True  # Prometheus /metrics endpoint and request instrumentation
+    QUERY_TRACKING_ENABLED: bool = True  # Count SQL statements per request (headers in DEBUG, slow-request log)
+    QUERY_COUNT_WARN_THRESHOLD: int = 25  # Log requests running more statements than this
+    SLOW_REQUEST_DB_MS: float = 500.0  # Log requests spending longer than this in the database
+    N_PLUS_ONE_THRESHOLD: int = 10  # Same statement fingerprint repeated this often in one request
+    PROFILE_DIR: str = "./profiles"  # Speedscope profiles of admin-requested runs
+    PROFILE_MAX_FILES: int = 50  # Oldest profiles are deleted beyond this
+    SEARCH_INDEX_TTL_SECONDS: int = 3600  # In-memory autocomplete index is rebuilt after this
+    SPATIAL_INDEX_ENABLED: bool = True  # In-memory point-in-polygon index (PostGIS on subdivided boundaries when off)
+    SPATIAL_INDEX_CHECK_SECONDS: int = 300  # How often the index checks the tables for geometry changes
+
+    # Admission control (expensive endpoints beyond the limit + queue get 503)
+    SCORING_MAX_CONCURRENT: int = 4
+    SCORING_MAX_QUEUE: int = 16
+    GEOCODING_MAX_CONCURRENT: int = 2
+    GEOCODING_MAX_QUEUE: int = 20
+    ADMISSION_QUEUE_TIMEOUT: float = 5.0  # Seconds a queued request waits for a slot
+    HEAVY_POOL_SIZE: int = 6  # Connections reserved for scoring/geocoding work
+    HEAVY_POOL_MAX_OVERFLOW: int = 2
+
+    # Background score jobs
+    SCORE_JOB_WORKERS: int = 2
+    SCORE_JOB_STALE_SECONDS: int = 900  # Active jobs untouched this long are abandoned: requeued on startup, superseded on submit
+    SCORE_FRESHNESS_SECONDS: int = 7 * 86400  # Older stored scores are served, then recalculated in the background
+    SCORE_REFRESH_MEMO_SECONDS: int = 300  # Skip re-submitting a refresh for the same entity within this window
+
+    # Tracing (OpenTelemetry)
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "otlp"  # "otlp", "file" or "console"
+    OTLP_ENDPOINT: Optional[str] = None  # e.g. http://collector:4318/v1/traces; defaults to OTEL_EXPORTER_OTLP_* env
+    TRACE_FILE: str = "./logs/traces.jsonl"  # Used by the "file" exporter
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
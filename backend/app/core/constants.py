@@ -68,6 +68,10 @@ SUPERMARKET_WEIGHT = 0.3   # Retail importance
 
 CACHE_TTL_SCORES = 21600  # 6 hours - Investment score caching duration (seconds)
 CACHE_TTL_FEATURED_LOCATIONS = 21600  # 6 hours - Featured cities caching duration (seconds)
+CACHE_TTL_RISK_SUMMARY = 86400  # 24 hours - Risk data only changes on ingestion (seconds)
+CACHE_TTL_DASHBOARD = 3600  # 1 hour - Assembled location dashboard caching duration (seconds)
+CACHE_TTL_PARCELS = 3600  # 1 hour - Parcel lookups per coordinate cell; cleared by cadastral ingestion (seconds)
+RESPONSE_CACHE_MAX_ENTRIES = 5000  # Precompressed responses (identity + gzip + brotli bytes each) kept in the response LRU
 
 # =============================================================================
 # RENTAL YIELD CONSTANTS
@@ -90,3 +94,29 @@ FALLBACK_YIELD_RESIDENTIAL = 4.5  # Base yield for residential properties
 # =============================================================================
 
 DEFAULT_POPULATION = 1000  # Fallback population for density calculations
+
+# =============================================================================
+# SPATIAL QUERIES
+# =============================================================================
+
+SUBDIVIDE_MAX_VERTICES = 256  # ST_Subdivide piece size for the municipality/OMI zone lookup tables
+PARCEL_CELL_DEGREES = 0.00001  # Coordinate grid (~1 m) on which parcel lookups are snapped and cached
+PARCEL_CACHE_MAX_ENTRIES = 50000  # Cells kept in the parcel lookup LRU
+GEOCODE_CACHE_MAX_ENTRIES = 20000  # Forward/reverse answers kept in the in-process geocode LRU
+PARCEL_NEAREST_MAX_METRES = 25.0  # Nearest-parcel fallback radius for clicks on roads or gaps
+
+# =============================================================================
+# DATA INGESTION
+# =============================================================================
+
+INGEST_CHUNK_ROWS = 20000  # Source rows read, transformed and loaded per ingestion chunk
+INGEST_COMMIT_SIZE = 500  # Records added per commit within a chunk
+
+# =============================================================================
+# API LIMITS
+# =============================================================================
+
+MAX_BATCH_IDS = 500  # Maximum ids accepted by the bulk lookup endpoints
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched per server-side cursor round-trip in streaming exports
+MAX_RESOLVE_POINTS = 10000  # Maximum coordinates accepted by POST /locations/resolve
+RESOLVE_CHUNK_SIZE = 1000  # Points resolved per set-based query (and streamed per write)
@@ -15,8 +15,21 @@ engine = create_engine(
     echo=settings.DEBUG,  # Log SQL queries in debug mode
 )
 
-# Create session factory
+# Separate, smaller pool for expensive work (score calculation, geocoding) so a
+# burst there cannot starve light endpoints of connections
+heavy_engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=QueuePool,
+    pool_size=settings.HEAVY_POOL_SIZE,
+    max_overflow=settings.HEAVY_POOL_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    echo=settings.DEBUG,
+)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+HeavySessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=heavy_engine)
 
 def get_db() -> Generator[Session, None, None]:
     """
@@ -29,3 +42,14 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+def get_heavy_db() -> Generator[Session, None, None]:
+    """
+    Dependency for expensive endpoints: a session on the heavy-work pool.
+    Usage: db: Session = Depends(get_heavy_db)
+    """
+    db = HeavySessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
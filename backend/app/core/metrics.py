@@ -0,0 +1,196 @@
+"""
+Prometheus metrics.
+
+Exposes, via `GET /metrics`:
+- http_request_duration_seconds{method, route, status}: latency histogram per
+  route template (not raw path, so cardinality stays bounded)
+- http_requests_in_flight: requests currently being served
+- db_pool_*{pool}: SQLAlchemy QueuePool size / checked-out / overflow for the
+  default and heavy-work pools, read at scrape time
+- admission_active / admission_waiting / admission_shed_total{limiter}
+- cache_requests_total{cache, namespace, result} and
+  cache_hit_ratio{cache, namespace}: per-namespace cache effectiveness
+- nominatim_requests_total{operation, outcome} and
+  nominatim_request_duration_seconds{operation}: external geocoder calls
+
+Everything is either a counter update on the hot path or computed lazily at
+scrape time, so a 15-second scrape interval is cheap. Requires the optional
+`prometheus_client` package; without it the helpers are no-ops and /metrics
+returns 501.
+"""
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from app.core.tracing import add_event, start_span
+
+try:
+    from prometheus_client import Gauge, Histogram, Counter, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+if PROMETHEUS_AVAILABLE:
+    REQUEST_LATENCY = Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template",
+        ["method", "route", "status"],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    )
+    REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+    NOMINATIM_REQUESTS = Counter(
+        "nominatim_requests_total", "Calls to the Nominatim geocoding API", ["operation", "outcome"]
+    )
+    NOMINATIM_LATENCY = Histogram(
+        "nominatim_request_duration_seconds",
+        "Nominatim call latency (excluding client-side rate-limit sleeps)",
+        ["operation"],
+        buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0),
+    )
+
+
+# =============================================================================
+# CACHE STATISTICS
+# =============================================================================
+
+_cache_lock = threading.Lock()
+_cache_counts: Dict[tuple, List[int]] = {}  # (cache, namespace) -> [hits, misses]
+
+
+def cache_namespace(key: str) -> str:
+    """
+    Collapse a cache key to its namespace: "zone_layer:42" -> "zone_layer",
+    "score_municipality_15146" -> "score_municipality".
+    """
+    head = key.split(":", 1)[0]
+    return re.sub(r"_\d+$", "", head) or "default"
+
+
+def record_cache_lookup(cache: str, key: str, hit: bool) -> None:
+    """Count a cache lookup and note it on the current trace span."""
+    bucket = (cache, cache_namespace(key))
+    add_event("cache.lookup", cache=cache, namespace=bucket[1], hit=hit)
+    with _cache_lock:
+        counts = _cache_counts.setdefault(bucket, [0, 0])
+        counts[0 if hit else 1] += 1
+
+
+def cache_stats() -> Dict[tuple, List[int]]:
+    """Snapshot of hit/miss counts per (cache, namespace)."""
+    with _cache_lock:
+        return {k: list(v) for k, v in _cache_counts.items()}
+
+
+# =============================================================================
+# NOMINATIM
+# =============================================================================
+
+@contextmanager
+def track_nominatim(operation: str):
+    """Time, trace and count a Nominatim HTTP call."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with start_span(f"nominatim.{operation}", kind="client", **{"peer.service": "nominatim"}):
+            yield
+        outcome = "success"
+    finally:
+        if PROMETHEUS_AVAILABLE:
+            NOMINATIM_LATENCY.labels(operation).observe(time.perf_counter() - start)
+            NOMINATIM_REQUESTS.labels(operation, outcome).inc()
+
+
+# =============================================================================
+# SCRAPE-TIME COLLECTOR
+# =============================================================================
+
+class _RuntimeCollector:
+    """Reads pool and cache state only when Prometheus scrapes."""
+
+    def collect(self):
+        from app.core.admission import LIMITERS
+        from app.core.database import engine, heavy_engine
+
+        size = GaugeMetricFamily("db_pool_size", "Configured QueuePool size", labels=["pool"])
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Connections currently checked out", labels=["pool"])
+        overflow = GaugeMetricFamily(
+            "db_pool_overflow", "Connections open beyond pool_size (negative while below)", labels=["pool"]
+        )
+        checked_in = GaugeMetricFamily("db_pool_checked_in", "Idle connections in the pool", labels=["pool"])
+        for name, pool in (("default", engine.pool), ("heavy", heavy_engine.pool)):
+            if hasattr(pool, "checkedout"):
+                size.add_metric([name], pool.size())
+                checked_out.add_metric([name], pool.checkedout())
+                overflow.add_metric([name], pool.overflow())
+                checked_in.add_metric([name], pool.checkedin())
+        yield from (size, checked_out, overflow, checked_in)
+
+        active = GaugeMetricFamily("admission_active", "Requests holding an admission slot", labels=["limiter"])
+        waiting = GaugeMetricFamily("admission_waiting", "Requests queued for an admission slot", labels=["limiter"])
+        shed = CounterMetricFamily("admission_shed", "Requests rejected with 503", labels=["limiter"])
+        for limiter in LIMITERS:
+            stats = limiter.stats()
+            active.add_metric([limiter.name], stats["active"])
+            waiting.add_metric([limiter.name], stats["waiting"])
+            shed.add_metric([limiter.name], stats["shed"])
+        yield from (active, waiting, shed)
+
+        lookups = CounterMetricFamily(
+            "cache_requests", "In-memory cache lookups", labels=["cache", "namespace", "result"]
+        )
+        ratio = GaugeMetricFamily(
+            "cache_hit_ratio", "Cache hit ratio since process start", labels=["cache", "namespace"]
+        )
+        for (cache, namespace), (hits, misses) in sorted(cache_stats().items()):
+            lookups.add_metric([cache, namespace, "hit"], hits)
+            lookups.add_metric([cache, namespace, "miss"], misses)
+            total = hits + misses
+            ratio.add_metric([cache, namespace], hits / total if total else 0.0)
+        yield lookups
+        yield ratio
+
+
+if PROMETHEUS_AVAILABLE:
+    REGISTRY.register(_RuntimeCollector())
+
+
+def render_metrics() -> bytes:
+    """Prometheus text exposition of the default registry."""
+    return generate_latest(REGISTRY)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROMETHEUS_AVAILABLE:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], template, str(status)).observe(time.perf_counter() - start)
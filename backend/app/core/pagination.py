@@ -0,0 +1,69 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor encodes the ordering key of the last row on a page plus its id as a
+tiebreaker. The next page is fetched with a row-value comparison
+(`(sort_col, id) > (last_value, last_id)`), which an index on
+`(sort_col, id)` answers with a single seek, so deep pages cost the same as
+the first one and stay stable while rows are inserted or deleted.
+
+Cursors are opaque to clients (URL-safe base64 JSON) and are bound to the
+sort field and direction they were issued for.
+
+Nullable sort keys are ordered NULLS LAST in both directions; a cursor taken
+in that tail carries a null value and pages through it by id.
+"""
+
+import base64
+import json
+from typing import Any, List, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, tuple_
+
+
+def encode_cursor(sort_by: str, order: str, last_value: Any, last_id: int) -> str:
+    """Build an opaque cursor pointing just after (last_value, last_id)."""
+    payload = json.dumps({"s": sort_by, "o": order, "v": last_value, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> Tuple[Any, int]:
+    """
+    Decode a cursor issued by encode_cursor().
+
+    Raises HTTPException(400) if the cursor is malformed or was issued for a
+    different sort field/direction.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_value, last_id = payload["v"], int(payload["id"])
+        issued_for = (payload["s"], payload["o"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+    if issued_for != (sort_by, order):
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+    return last_value, last_id
+
+
+def keyset_filter(sort_col, id_col, order: str, last_value: Any, last_id: int, nulls_last: bool = False):
+    """Rows after (last_value, last_id) in the keyset_order() ordering."""
+    after_id = id_col > last_id if order == "asc" else id_col < last_id
+    if nulls_last and last_value is None:
+        return and_(sort_col.is_(None), after_id)
+    key, last_key = tuple_(sort_col, id_col), tuple_(last_value, last_id)
+    after = key > last_key if order == "asc" else key < last_key
+    return or_(after, sort_col.is_(None)) if nulls_last else after
+
+
+def keyset_order(sort_col, id_col, order: str, nulls_last: bool = False) -> List[Any]:
+    """ORDER BY clauses for (sort_col, id_col); rows without a sort key last when nulls_last."""
+    if order == "asc":
+        ordering = [sort_col.asc(), id_col.asc()]
+    else:
+        ordering = [sort_col.desc(), id_col.desc()]
+    if nulls_last:
+        ordering[0] = ordering[0].nullslast()
+    return ordering
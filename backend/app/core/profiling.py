@@ -0,0 +1,220 @@
+"""
+On-demand request profiling.
+
+A request carrying the admin token in the `X-Profile-Token` header runs under
+a sampling profiler (never via the query string, where the token would end up
+in access logs and browser history). A background thread snapshots the
+stacks of every thread (`sys._current_frames()`) once per millisecond and
+keeps those that pass through application code. The event loop and the threadpool running
+sync endpoints are both covered. Idle workers and other libraries' background
+threads are filtered out. On a busy instance, concurrent requests can show
+up in the same profile.
+
+The result is written as a speedscope file (https://www.speedscope.app) under
+settings.PROFILE_DIR, rotated to PROFILE_MAX_FILES, and its name is returned
+in the `X-Profile-Id` response header. Requests without the token go straight
+through: the middleware does one header scan and nothing else.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import is_admin_token
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_SUFFIX = ".speedscope.json"
+SAMPLE_INTERVAL_SECONDS = 0.001
+
+# Frames are kept only for stacks that pass through the application package
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler aggregating into speedscope's sampled format."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.frames: List[dict] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self.started_at = 0.0
+        self.duration_ms = 0.0
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration_ms = (time.perf_counter() - self.started_at) * 1000
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed_ms = (now - last) * 1000
+            last = now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._sample(frame, elapsed_ms)
+
+    def _sample(self, frame, elapsed_ms: float) -> None:
+        stack = []
+        in_app = False
+        while frame is not None:
+            code = frame.f_code
+            in_app = in_app or code.co_filename.startswith(_APP_ROOT)
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        if not in_app:
+            return
+        self.samples.append([self._index(key) for key in reversed(stack)])
+        self.weights.append(elapsed_ms)
+
+    def _index(self, key: Tuple[str, str, int]) -> int:
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            name, file, line = key
+            self.frames.append({"name": name, "file": file, "line": line})
+        return index
+
+    def to_speedscope(self, name: str) -> dict:
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": settings.PROJECT_NAME,
+            "activeProfileIndex": 0,
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(self.duration_ms, 3),
+                "samples": self.samples,
+                "weights": [round(w, 3) for w in self.weights],
+            }],
+        }
+
+
+# =============================================================================
+# STORAGE
+# =============================================================================
+
+def _slug(path: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-")[:80] or "root"
+
+
+def new_profile_id(method: str, path: str) -> str:
+    """Sortable, filesystem-safe id: timestamp, method and path."""
+    return f"{datetime.now():%Y%m%dT%H%M%S%f}_{method}_{_slug(path)}"
+
+
+def save_profile(profiler: SamplingProfiler, profile_id: str, method: str, path: str) -> None:
+    """Write a profile to PROFILE_DIR and rotate old ones."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    target = os.path.join(settings.PROFILE_DIR, profile_id + PROFILE_SUFFIX)
+    with open(target, "w", encoding="utf-8") as f:
+        json.dump(profiler.to_speedscope(f"{method} {path}"), f)
+
+    stored = sorted(p for p in os.listdir(settings.PROFILE_DIR) if p.endswith(PROFILE_SUFFIX))
+    for old in stored[:-settings.PROFILE_MAX_FILES]:
+        try:
+            os.remove(os.path.join(settings.PROFILE_DIR, old))
+        except OSError as e:
+            logger.warning(f"Could not remove old profile {old}: {e}")
+
+
+def list_profiles() -> List[dict]:
+    """Stored profiles, newest first."""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for filename in sorted(os.listdir(settings.PROFILE_DIR), reverse=True):
+        if not filename.endswith(PROFILE_SUFFIX):
+            continue
+        full_path = os.path.join(settings.PROFILE_DIR, filename)
+        stat = os.stat(full_path)
+        profiles.append({
+            "id": filename[:-len(PROFILE_SUFFIX)],
+            "size_bytes": stat.st_size,
+            "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        })
+    return profiles
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """Path of a stored profile, or None (ids are validated against traversal)."""
+    if not re.fullmatch(r"[A-Za-z0-9_.\-]+", profile_id):
+        return None
+    full_path = os.path.join(settings.PROFILE_DIR, profile_id + PROFILE_SUFFIX)
+    return full_path if os.path.isfile(full_path) else None
+
+
+# =============================================================================
+# MIDDLEWARE
+# =============================================================================
+
+def _requested_token(scope) -> Optional[str]:
+    for key, value in scope.get("headers") or []:
+        if key == b"x-profile-token":
+            return value.decode("latin-1")
+    return None
+
+
+class ProfilingMiddleware:
+    """Profile requests that present the admin token; pass everything else through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMIN_TOKEN:
+            await self.app(scope, receive, send)
+            return
+
+        token = _requested_token(scope)
+        if token is None or not is_admin_token(token):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler()
+        method, path = scope["method"], scope["path"]
+        profile_id = new_profile_id(method, path)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER.lower().encode("latin-1"), profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            try:
+                await run_in_threadpool(save_profile, profiler, profile_id, method, path)
+                logger.info(f"Profiled {method} {path} in {profiler.duration_ms:.1f} ms: {profile_id}")
+            except OSError as e:
+                logger.error(f"Failed to store profile for {method} {path}: {e}")
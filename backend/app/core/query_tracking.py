@@ -0,0 +1,226 @@
+"""
+Per-request SQL query tracking and N+1 detection.
+
+SQLAlchemy cursor events (registered on the Engine class, so every engine is
+covered, including the one the test suite creates) count statements and DB
+time into a `QueryStats` object bound to the current request through a
+ContextVar. Starlette copies the context into its threadpool, so sync
+endpoints, streamed bodies and `run_in_threadpool` fan-out all report into
+the request that started them.
+
+`QueryTrackingMiddleware`:
+- adds `X-DB-Query-Count` / `X-DB-Query-Time-Ms` response headers when
+  settings.DEBUG is on
+- logs requests over QUERY_COUNT_WARN_THRESHOLD statements or
+  SLOW_REQUEST_DB_MS of DB time, with the most repeated statement
+  fingerprints (the same fingerprint executed many times is the N+1
+  signature)
+
+`query_budget(n)` is the test-side counterpart: it fails when the wrapped
+block runs more than `n` statements.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time-Ms"
+
+
+@dataclass
+class QueryStats:
+    """
+    Statements executed within one request (or one tracked block).
+
+    A request's threadpool fan-out and capture_queries() record into the same
+    object from several threads, so updates go through a lock.
+    """
+    count: int = 0
+    total_ms: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        key = fingerprint(statement)
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.fingerprints[key] += 1
+
+    def most_common(self, limit: Optional[int] = None) -> List[tuple]:
+        with self._lock:
+            return self.fingerprints.most_common(limit)
+
+    def repeated(self, threshold: int) -> List[tuple]:
+        """(fingerprint, count) pairs executed at least `threshold` times."""
+        return [(fp, n) for fp, n in self.most_common() if n >= threshold]
+
+    def summary(self, limit: int = 5) -> str:
+        lines = [f"{n}x {fp}" for fp, n in self.most_common(limit)]
+        return "; ".join(lines)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Blocks tracked across threads (tests drive the app through TestClient, whose
+# event loop runs in another thread and does not see the caller's context)
+_captures: List[QueryStats] = []
+_captures_lock = threading.Lock()
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\([^)]*\)s|:\w+)\s*,?)+\)", re.IGNORECASE)
+_BIND_PARAM = re.compile(r"%\([^)]*\)s|:\w+|\$\d+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str, max_length: int = 200) -> str:
+    """
+    Normalize a SQL statement so executions that differ only in parameters
+    collapse together: literals and bind parameters become `?`, IN lists
+    become `IN (...)` and whitespace is squeezed.
+    """
+    text = _STRING_LITERAL.sub("?", statement)
+    text = _BIND_PARAM.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _IN_LIST.sub("IN (...)", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text[:max_length]
+
+
+# =============================================================================
+# SQLALCHEMY EVENTS
+# =============================================================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    if _captures:
+        with _captures_lock:
+            for capture in _captures:
+                if capture is not stats:
+                    capture.record(statement, elapsed_ms)
+
+
+def install_query_tracking() -> None:
+    """Register the cursor listeners on every Engine (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def track_queries():
+    """Collect statements executed in the current context into a QueryStats."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def capture_queries():
+    """Collect every statement executed by any thread while the block runs."""
+    install_query_tracking()
+    stats = QueryStats()
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Fail if the block executes more than `max_queries` statements.
+
+    Usage in tests:
+        with query_budget(3):
+            client.get(f"/api/v1/locations/{id}/dashboard")
+    """
+    with capture_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        raise AssertionError(
+            f"Query budget exceeded: {stats.count} statements (budget {max_queries}). "
+            f"Most frequent: {stats.summary()}"
+        )
+
+
+# =============================================================================
+# MIDDLEWARE
+# =============================================================================
+
+class QueryTrackingMiddleware:
+    """ASGI middleware that counts SQL statements and DB time per request."""
+
+    def __init__(self, app):
+        self.app = app
+        install_query_tracking()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start" and settings.DEBUG:
+                    headers = list(message.get("headers", []))
+                    headers.append((QUERY_COUNT_HEADER.lower().encode("latin-1"), str(stats.count).encode("latin-1")))
+                    headers.append((QUERY_TIME_HEADER.lower().encode("latin-1"), f"{stats.total_ms:.1f}".encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                self._report(scope, stats)
+
+    @staticmethod
+    def _report(scope, stats: QueryStats) -> None:
+        too_many = stats.count > settings.QUERY_COUNT_WARN_THRESHOLD
+        too_slow = stats.total_ms > settings.SLOW_REQUEST_DB_MS
+        repeated = stats.repeated(settings.N_PLUS_ONE_THRESHOLD)
+        if not (too_many or too_slow or repeated):
+            return
+
+        route = getattr(scope.get("route"), "path", None) or scope.get("path")
+        message = f"{scope.get('method')} {route}: {stats.count} queries, {stats.total_ms:.1f} ms DB time"
+        if repeated:
+            fp, n = repeated[0]
+            message += f"; possible N+1 ({n}x): {fp}"
+        else:
+            message += f"; top statements: {stats.summary(3)}"
+        logger.warning(message)
@@ -0,0 +1,131 @@
+"""
+Fast JSON serialization for large list and GeoJSON responses.
+
+Endpoints that return hundreds of rows (or full zone polygons) spend most of
+their CPU time validating Pydantic models and running the stdlib JSON encoder.
+This module provides an opt-in fast path: handlers build plain dicts directly
+from query rows and hand them to `fast_response()`, which serializes them with
+orjson when it is installed. The route keeps its `response_model`, so the
+OpenAPI schema is unchanged.
+
+The fast path is controlled by `settings.FAST_JSON_RESPONSES`. When disabled,
+`fast_response()` returns the content untouched and FastAPI validates it
+against the response model as usual.
+"""
+
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional, Type
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def _default(obj: Any) -> Any:
+    """Fallback encoder for types neither orjson nor json handle natively."""
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if hasattr(obj, "value"):  # Enum members
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to compact UTF-8 JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def loads(data: Optional[str]) -> Any:
+    """Parse JSON text (e.g. ST_AsGeoJSON output); returns None for empty input."""
+    if not data:
+        return None
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that renders with orjson (or compact stdlib json as fallback)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+    response: Optional[Response] = None,
+) -> Any:
+    """
+    Wrap trusted, already-shaped content in a FastJSONResponse.
+
+    Returning a Response from a handler makes FastAPI skip response_model
+    validation and serialization. When the fast path is disabled the content
+    is returned as-is so it goes through the regular Pydantic pipeline; pass
+    the handler's injected `response` so `headers` are still applied.
+    """
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(content, status_code=status_code, headers=headers)
+    if headers and response is not None:
+        response.headers.update(headers)
+    return content
+
+
+_defaults_cache: Dict[Type[BaseModel], Dict[str, Any]] = {}
+
+
+def schema_defaults(schema: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Default values of every optional field in a response schema.
+
+    Used to pad row dicts so the fast path emits the same keys the Pydantic
+    path would have produced.
+    """
+    defaults = _defaults_cache.get(schema)
+    if defaults is None:
+        defaults = {}
+        for name, field in schema.model_fields.items():
+            if field.is_required():
+                continue
+            defaults[name] = field.get_default(call_default_factory=True)
+        _defaults_cache[schema] = defaults
+    # Shallow copy so callers can mutate freely; mutable defaults get fresh copies
+    return {k: (v.copy() if isinstance(v, (list, dict)) else v) for k, v in defaults.items()}
+
+
+def orm_to_dict(obj: Any, schema: Type[BaseModel], **overrides: Any) -> Dict[str, Any]:
+    """
+    Build a response dict for `schema` straight from ORM attributes, without
+    validation. Missing attributes fall back to the schema defaults.
+    """
+    data = schema_defaults(schema)
+    for name in schema.model_fields:
+        if name in overrides:
+            continue
+        if hasattr(obj, name):
+            data[name] = getattr(obj, name)
+        else:
+            data.setdefault(name, None)
+    data.update(overrides)
+    return data
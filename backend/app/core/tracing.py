@@ -0,0 +1,319 @@
+"""
+OpenTelemetry tracing.
+
+When settings.TRACING_ENABLED is on (and the optional `opentelemetry-sdk`
+package is installed) the API produces one trace per request:
+
+- a SERVER span per request, named after the route template, continuing any
+  incoming W3C `traceparent`
+- CLIENT spans for every SQL statement (SQLAlchemy cursor events) and every
+  Nominatim call
+- INTERNAL spans for each ScoringEngine pillar and each ETL stage
+- `cache.lookup` events (not spans: an in-memory lookup takes microseconds)
+  on whatever span is current
+
+Spans are exported over OTLP/HTTP (`opentelemetry-exporter-otlp-proto-http`,
+endpoint from OTLP_ENDPOINT or the standard OTEL_EXPORTER_OTLP_* variables),
+to a JSON-lines file (TRACE_FILE) for offline analysis, or to the console.
+
+Batch jobs (scraper, ingestion scripts) open a root span with `script_span()`.
+It continues the trace from a `TRACEPARENT` environment variable when one is
+set, so an orchestrator can stitch several runs together.
+
+Without tracing enabled every helper here is a cheap no-op.
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SimpleSpanProcessor,
+        SpanExporter,
+        SpanExportResult,
+    )
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_provider = None
+_tracer = None
+
+MAX_STATEMENT_LENGTH = 2000
+
+
+# =============================================================================
+# SETUP
+# =============================================================================
+
+if OTEL_AVAILABLE:
+    class FileSpanExporter(SpanExporter):
+        """Append finished spans to a JSON-lines file (one span per line)."""
+
+        def __init__(self, path: str):
+            self.path = path
+            self._lock = threading.Lock()
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        def export(self, spans) -> "SpanExportResult":
+            lines = [json.dumps(json.loads(span.to_json()), separators=(",", ":")) for span in spans]
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            pass
+
+
+def _build_exporter():
+    kind = settings.TRACING_EXPORTER
+    if kind == "file":
+        return FileSpanExporter(settings.TRACE_FILE)
+    if kind == "console":
+        return ConsoleSpanExporter()
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        logger.error("TRACING_EXPORTER=otlp requires opentelemetry-exporter-otlp-proto-http; tracing disabled")
+        return None
+    return OTLPSpanExporter(endpoint=settings.OTLP_ENDPOINT) if settings.OTLP_ENDPOINT else OTLPSpanExporter()
+
+
+def setup_tracing(service_name: str, exporter: Any = None) -> bool:
+    """
+    Configure the tracer provider and SQL instrumentation.
+
+    `exporter` overrides the configured one and is flushed synchronously
+    (used by tests). Returns True when tracing is active.
+    """
+    global _provider, _tracer
+    if not OTEL_AVAILABLE:
+        if settings.TRACING_ENABLED:
+            logger.warning("TRACING_ENABLED is set but opentelemetry-sdk is not installed")
+        return False
+    if exporter is None and (not settings.TRACING_ENABLED or _provider is not None):
+        return _provider is not None
+
+    processor_cls = SimpleSpanProcessor if exporter is not None else BatchSpanProcessor
+    exporter = exporter or _build_exporter()
+    if exporter is None:
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(processor_cls(exporter))
+    if _provider is None:
+        trace.set_tracer_provider(provider)
+    _provider = provider
+    _tracer = provider.get_tracer("app")
+    install_sql_tracing()
+    logger.info(f"Tracing enabled for {service_name} ({type(exporter).__name__})")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans (call before a batch process exits)."""
+    global _provider, _tracer
+    if _provider is not None:
+        _provider.force_flush()
+        _provider.shutdown()
+    _provider = None
+    _tracer = None
+
+
+def tracing_active() -> bool:
+    return _tracer is not None
+
+
+# =============================================================================
+# SPANS
+# =============================================================================
+
+@contextmanager
+def start_span(name: str, kind: Optional[str] = None, **attributes):
+    """
+    Open a span as the current one; yields None when tracing is off.
+
+    `kind` is "server", "client" or None (internal).
+    """
+    if _tracer is None:
+        yield None
+        return
+    span_kind = {"server": SpanKind.SERVER, "client": SpanKind.CLIENT}.get(kind, SpanKind.INTERNAL)
+    with _tracer.start_as_current_span(name, kind=span_kind, attributes=_clean(attributes)) as span:
+        yield span
+
+
+def traced(name: Optional[str] = None):
+    """Decorator running the function inside a span."""
+    def decorator(func: Callable):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_event(name: str, **attributes) -> None:
+    """Attach an event to the current span (no-op without tracing)."""
+    if _tracer is not None:
+        trace.get_current_span().add_event(name, _clean(attributes))
+
+
+def run_in_context(func: Callable) -> Callable:
+    """
+    Bind `func` to the current context so spans it opens in a worker thread
+    (e.g. ThreadPoolExecutor) stay children of the submitting span.
+    """
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return ctx.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+def _clean(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in attributes.items() if v is not None}
+
+
+# =============================================================================
+# BATCH JOBS
+# =============================================================================
+
+@contextmanager
+def script_span(name: str, **attributes):
+    """
+    Root span for a script run: configures tracing for the process,
+    continues the trace from $TRACEPARENT if present, and flushes on exit.
+    """
+    setup_tracing(name)
+    if _tracer is None:
+        yield None
+        return
+
+    carrier = {"traceparent": os.environ["TRACEPARENT"]} if os.environ.get("TRACEPARENT") else {}
+    token = otel_context.attach(propagate.extract(carrier))
+    try:
+        with start_span(name, **attributes) as span:
+            yield span
+    finally:
+        otel_context.detach(token)
+        shutdown_tracing()
+
+
+def current_traceparent() -> Optional[str]:
+    """W3C traceparent of the current span, to hand to a child process."""
+    if _tracer is None:
+        return None
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier.get("traceparent")
+
+
+# =============================================================================
+# SQL
+# =============================================================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _tracer is None or context is None:
+        return
+    context._otel_span = _tracer.start_span(
+        "db.query",
+        kind=SpanKind.CLIENT,
+        attributes={
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            "db.executemany": bool(executemany),
+        },
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_otel_span", None)
+    if span is not None:
+        span.end()
+        context._otel_span = None
+
+
+def _handle_error(exception_context):
+    span = getattr(exception_context.execution_context, "_otel_span", None)
+    if span is not None:
+        span.record_exception(exception_context.original_exception)
+        span.set_status(Status(StatusCode.ERROR))
+        span.end()
+        exception_context.execution_context._otel_span = None
+
+
+def install_sql_tracing() -> None:
+    """Register span-per-statement listeners on every Engine (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+# =============================================================================
+# MIDDLEWARE
+# =============================================================================
+
+class TracingMiddleware:
+    """ASGI middleware opening a SERVER span per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers") or []}
+        token = otel_context.attach(propagate.extract(carrier))
+        try:
+            with start_span(
+                f"{scope['method']} {scope['path']}",
+                kind="server",
+                **{"http.method": scope["method"], "http.target": scope["path"]},
+            ) as span:
+
+                async def send_wrapper(message):
+                    if message["type"] == "http.response.start":
+                        status = message["status"]
+                        span.set_attribute("http.status_code", status)
+                        if status >= 500:
+                            span.set_status(Status(StatusCode.ERROR))
+                    await send(message)
+
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    route = getattr(scope.get("route"), "path", None)
+                    if route:
+                        span.update_name(f"{scope['method']} {route}")
+                        span.set_attribute("http.route", route)
+        finally:
+            otel_context.detach(token)
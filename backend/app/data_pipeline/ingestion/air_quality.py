@@ -39,6 +39,8 @@ class AirQualityIngestor(BaseIngestor):
         """
         Expects a file containing STATION-LEVEL data, not municipality level.
         Columns: station_id, PM2.5, PM10, NO2, Year
+        Read whole (one chunk): every municipality average needs all of its
+        stations, and the file has one row per station.
         """
         if source.endswith('.csv'):
             return pd.read_csv(source)
@@ -56,17 +58,20 @@ class AirQualityIngestor(BaseIngestor):
             return []
             
         # Convert station data to dict for fast lookup: {station_id: {measures}}
-        stations_dict = {}
-        for _, row in station_data.iterrows():
-            s_id = str(row.get('Station_ID', '')).strip()
-            if not s_id: continue
-            
-            stations_dict[s_id] = {
-                'pm25': float(row.get('PM2.5', 0)),
-                'pm10': float(row.get('PM10', 0)),
-                'no2':  float(row.get('NO2', 0)),
-                'year': int(row.get('Year', 2023))
-            }
+        # (a station listed twice keeps its last row)
+        def _number(col: str, default: float) -> pd.Series:
+            return pd.to_numeric(self.get_column(station_data, col, default), errors="coerce").astype(float)
+
+        station_ids = self.get_column(station_data, 'Station_ID', '').fillna('').astype(str).str.strip()
+        stations = pd.DataFrame({
+            'pm25': _number('PM2.5', 0).to_numpy(dtype=float),
+            'pm10': _number('PM10', 0).to_numpy(dtype=float),
+            'no2':  _number('NO2', 0).to_numpy(dtype=float),
+            'year': _number('Year', 2023).fillna(2023).to_numpy(dtype=int),
+        }, index=station_ids.to_numpy(dtype=object))
+        stations = stations[stations.index != '']
+        stations = stations[~stations.index.duplicated(keep='last')]
+        stations_dict = stations.to_dict('index')
             
         transformed_records = []
         
@@ -126,10 +131,13 @@ class AirQualityIngestor(BaseIngestor):
                 
         return transformed_records
 
+    def prepare_load(self) -> Dict[str, Any]:
+        # Pre-fetch municipalities for ID lookup
+        return {"municipalities": {m.code: m.id for m in self.db.query(Municipality.code, Municipality.id).all()}}
+
     def load(self, transformed_data: List[Dict[str, Any]]) -> int:
         count = 0
-        # Pre-fetch municipalities for ID lookup
-        mun_map = {m.code: m.id for m in self.db.query(Municipality.code, Municipality.id).all()}
+        mun_map = self.load_state()["municipalities"]
         
         for data in transformed_data:
             mun_code = data["municipality_code"]
@@ -1,32 +1,54 @@
 import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Generator
+from collections.abc import Iterator
+from typing import Any, Dict, List, Optional, Generator, Tuple
+import numpy as np
 import pandas as pd
 from sqlalchemy.orm import Session
 import logging
+from app.core.constants import INGEST_CHUNK_ROWS, INGEST_COMMIT_SIZE
+from app.core.tracing import start_span
+from app.services.spatial_index import invalidate_spatial_index
 
 logger = logging.getLogger(__name__)
 
+_END = object()
+
+
 class BaseIngestor(ABC):
     """
     Abstract base class for all data ingestors.
-    Following the ETL (Extract, Transform, Load) pattern.
+    Following the ETL (Extract, Transform, Load) pattern, one chunk at a time:
+    fetch() yields chunks of the source, transform() maps a chunk to records
+    and load() writes them, so memory is bounded by the chunk size rather
+    than by the size of the source.
     """
-    
+
+    # Set by ingestors that create municipalities or OMI zones: the in-memory
+    # spatial index is dropped after a run so lookups see the new rows
+    refreshes_spatial_index = False
+
+    # Source rows per chunk and records per commit
+    chunk_rows = INGEST_CHUNK_ROWS
+    commit_size = INGEST_COMMIT_SIZE
+
     def __init__(self, db: Session):
         self.db = db
+        self._load_state: Optional[Dict[str, Any]] = None
 
     @abstractmethod
     def fetch(self, source: Any) -> Any:
         """
         Extract data from the source (e.g., file path, URL, API).
+        Either an iterator of chunks or, for sources that cannot be read
+        incrementally, the whole dataset as a single chunk.
         """
         pass
 
     @abstractmethod
     def transform(self, data: Any) -> List[Dict[str, Any]]:
         """
-        Clean and transform the raw data into a list of dictionaries 
+        Clean and transform one chunk of raw data into a list of dictionaries
         compatible with SQLAlchemy models.
         """
         pass
@@ -34,11 +56,74 @@ class BaseIngestor(ABC):
     @abstractmethod
     def load(self, transformed_data: List[Dict[str, Any]]) -> int:
         """
-        Load the transformed data into the database.
+        Load one chunk of transformed data into the database.
         Returns the number of records inserted/updated.
         """
         pass
 
+    def prepare_load(self) -> Dict[str, Any]:
+        """
+        Lookups shared by every load() call of a run (existing keys,
+        code -> id maps), built once instead of once per chunk.
+        """
+        return {}
+
+    def load_state(self) -> Dict[str, Any]:
+        """
+        Lookups from prepare_load(), built on first use; load() adds the
+        rows it creates so later chunks see them.
+        """
+        if self._load_state is None:
+            self._load_state = self.prepare_load()
+        return self._load_state
+
+    def read_table(self, source: str) -> Any:
+        """
+        CSV files are read lazily in chunks of `chunk_rows`; Excel files
+        cannot be read incrementally and are returned whole.
+        """
+        if source.endswith('.csv'):
+            return pd.read_csv(source, chunksize=self.chunk_rows)
+        elif source.endswith(('.xls', '.xlsx')):
+            return pd.read_excel(source)
+        else:
+            raise ValueError(f"Unsupported file format: {source}")
+
+    def get_column(self, data: pd.DataFrame, name: Optional[str], default: Any = None) -> pd.Series:
+        """
+        Column `name` of a chunk, or `default` on every row when there is no
+        such column: the column-wide form of `row.get(name, default)`.
+        """
+        if name is not None and name in data.columns:
+            return data[name]
+        return pd.Series(default, index=data.index, dtype=object)
+
+    def parse_numbers(self, data: pd.DataFrame, columns: Dict[str, Tuple[Optional[str], Any]]) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Parse numeric columns of a chunk, given as {field: (column, default
+        when the column is absent)}. Returns the parsed values (missing cells
+        are NaN) and a mask of the rows holding a value that is present but
+        not a number ("n/d", junk), which callers skip as the row-by-row
+        float() loops did.
+        """
+        parsed = {}
+        unparseable = np.zeros(len(data), dtype=bool)
+        for field, (name, default) in columns.items():
+            raw = self.get_column(data, name, default)
+            numbers = pd.to_numeric(raw, errors="coerce").astype(float)
+            unparseable |= (raw.notna() & numbers.isna()).to_numpy()
+            parsed[field] = numbers
+        return pd.DataFrame(parsed, index=data.index), unparseable
+
+    def to_records(self, columns: Dict[str, pd.Series]) -> List[Dict[str, Any]]:
+        """
+        Zip aligned columns into record dicts of native Python values
+        (several times faster than DataFrame.to_dict("records")).
+        """
+        names = list(columns)
+        values = [column.tolist() for column in columns.values()]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
     def chunk_list(self, data: List[Any], chunk_size: int) -> Generator[List[Any], None, None]:
         """
         Yield successive n-sized chunks from data.
@@ -51,12 +136,35 @@ class BaseIngestor(ABC):
         Execute the full ETL pipeline with timing.
         """
         start_time = time.time()
-        logger.info(f"Starting ingestion process for {self.__class__.__name__}")
-        
-        raw_data = self.fetch(source)
-        transformed_data = self.transform(raw_data)
-        count = self.load(transformed_data)
-        
+        name = self.__class__.__name__
+        logger.info(f"Starting ingestion process for {name}")
+
+        # Existing keys may have changed since the previous run
+        self._load_state = None
+        count = 0
+        chunks = 0
+        with start_span(f"ingest.{name}", source=str(source)) as span:
+            raw_data = self.fetch(source)
+            stream = raw_data if isinstance(raw_data, Iterator) else iter([raw_data])
+            while True:
+                with start_span(f"ingest.{name}.fetch"):
+                    chunk = next(stream, _END)
+                if chunk is _END:
+                    break
+                with start_span(f"ingest.{name}.transform"):
+                    transformed_data = self.transform(chunk)
+                # Only the current chunk is held: drop it before loading
+                del chunk
+                with start_span(f"ingest.{name}.load"):
+                    count += self.load(transformed_data)
+                chunks += 1
+            if span is not None:
+                span.set_attribute("ingest.records", count)
+                span.set_attribute("ingest.chunks", chunks)
+
+        if self.refreshes_spatial_index:
+            invalidate_spatial_index()
+
         duration = time.time() - start_time
-        logger.info(f"Ingestion complete. Processed {count} records in {duration:.2f} seconds.")
+        logger.info(f"Ingestion complete. Processed {count} records in {chunks} chunks in {duration:.2f} seconds.")
         return count
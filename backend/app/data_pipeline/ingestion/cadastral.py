@@ -16,14 +16,19 @@ the unique constraint.
 
 import geopandas as gpd
 import logging
-from typing import Any, Dict, List
+import numpy as np
+import pandas as pd
+import shapely
+from typing import Any, Dict, Iterator, List
 
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from shapely.geometry import mapping
 
 from .base import BaseIngestor
+from app.data_pipeline.processing.normalizer import DataNormalizer
 from app.models.geography import CadastralParcel, Municipality, OMIZone
+from app.services.parcel_lookup import parcel_cache
 
 logger = logging.getLogger(__name__)
 
@@ -46,19 +51,29 @@ def _find_column(gdf: gpd.GeoDataFrame, candidates: List[str]) -> str | None:
 class CadastralIngestor(BaseIngestor):
     """ETL ingestor for cadastral parcel shapefiles / GeoJSON."""
 
-    def fetch(self, source: str) -> gpd.GeoDataFrame:
-        """Read the spatial file and reproject to EPSG:4326 (WGS84)."""
-        logger.info(f"Reading cadastral source: {source}")
-        gdf = gpd.read_file(source)
+    def fetch(self, source: str) -> Iterator[gpd.GeoDataFrame]:
+        """Read the spatial file `chunk_rows` features at a time, reprojected to EPSG:4326 (WGS84).
 
+        A regional export holds millions of parcels: only one chunk of
+        features is held in memory at a time.
+        """
+        logger.info(f"Reading cadastral source: {source}")
+        start = 0
+        while True:
+            gdf = gpd.read_file(source, rows=slice(start, start + self.chunk_rows))
+            if gdf.empty:
+                break
+            start += len(gdf)
+            yield self._to_wgs84(gdf)
+        logger.info(f"Read {start} features")
+
+    def _to_wgs84(self, gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
         if gdf.crs is None:
             logger.warning("Source CRS is undefined — assuming EPSG:4326")
             gdf.set_crs(epsg=4326, inplace=True)
         elif gdf.crs.to_epsg() != 4326:
             logger.info(f"Reprojecting from {gdf.crs} to EPSG:4326")
             gdf.to_crs(epsg=4326, inplace=True)
-
-        logger.info(f"Loaded {len(gdf)} features. Columns: {gdf.columns.tolist()}")
         return gdf
 
     def transform(self, data: gpd.GeoDataFrame) -> List[Dict[str, Any]]:
@@ -79,37 +94,31 @@ class CadastralIngestor(BaseIngestor):
                 f"Available: {data.columns.tolist()}"
             )
 
-        records = []
-        for _, row in data.iterrows():
-            foglio = str(row[col_foglio]).strip()
-            particella = str(row[col_particella]).strip()
-
-            if not foglio or not particella or row.geometry is None or row.geometry.is_empty:
-                continue
+        foglio = data[col_foglio].fillna("").astype(str).str.strip()
+        particella = data[col_particella].fillna("").astype(str).str.strip()
+        geometries = np.asarray(data.geometry, dtype=object)
+        keep = (
+            (foglio != "").to_numpy() & (particella != "").to_numpy()
+            & ~shapely.is_missing(geometries) & ~shapely.is_empty(geometries)
+        )
 
-            record: Dict[str, Any] = {
-                "foglio": foglio,
-                "particella": particella,
-                "geometry_wkt": row.geometry.wkt,
-            }
-            if col_comune:
-                raw = row[col_comune]
-                record["comune_code"] = str(int(raw)).zfill(6) if str(raw).replace('.', '').isdigit() else str(raw).strip()
+        columns: Dict[str, Any] = {
+            "foglio": foglio[keep],
+            "particella": particella[keep],
+            # Same full-precision WKT as geometry.wkt, for the whole chunk at once
+            "geometry_wkt": pd.Series(shapely.to_wkt(geometries[keep], rounding_precision=-1)),
+        }
+        if col_comune:
+            raw = data.loc[keep, col_comune].fillna("").astype(str).str.strip()
+            numbers = pd.to_numeric(raw.where(raw.str.replace('.', '', regex=False).str.isdigit()), errors="coerce")
+            columns["comune_code"] = raw.mask(numbers.notna(), DataNormalizer.normalize_municipality_codes(numbers))
 
-            records.append(record)
+        records = self.to_records(columns)
 
         logger.info(f"Transformed {len(records)} valid parcel records")
         return records
 
-    def load(self, transformed_data: List[Dict[str, Any]]) -> int:
-        """Insert parcels with PostGIS-based municipality + OMI zone resolution.
-
-        Resolution strategy:
-          1. Municipality: if comune_code is present, direct FK lookup (fast).
-             Fallback: ST_Intersects against municipality geometries.
-          2. OMI Zone: ST_Intersects against omi_zones.geometry (nullable —
-             not every parcel falls inside a defined OMI zone).
-        """
+    def prepare_load(self) -> Dict[str, Any]:
         # Pre-fetch municipality lookup by ISTAT code
         municipalities_by_code: Dict[str, int] = {
             m.code: m.id for m in self.db.query(Municipality.code, Municipality.id).all()
@@ -121,11 +130,24 @@ class CadastralIngestor(BaseIngestor):
                 text("SELECT municipality_id, foglio, particella FROM cadastral_parcels")
             ).fetchall()
         )
+        return {"municipalities_by_code": municipalities_by_code, "existing_keys": existing_keys}
+
+    def load(self, transformed_data: List[Dict[str, Any]]) -> int:
+        """Insert parcels with PostGIS-based municipality + OMI zone resolution.
+
+        Resolution strategy:
+          1. Municipality: if comune_code is present, direct FK lookup (fast).
+             Fallback: ST_Intersects against the subdivided municipality boundaries.
+          2. OMI Zone: ST_Intersects against the subdivided OMI zone boundaries
+             (nullable — not every parcel falls inside a defined OMI zone).
+        """
+        state = self.load_state()
+        municipalities_by_code: Dict[str, int] = state["municipalities_by_code"]
+        existing_keys = state["existing_keys"]
 
         count = 0
-        chunk_size = 500
 
-        for chunk in self.chunk_list(transformed_data, chunk_size):
+        for chunk in self.chunk_list(transformed_data, self.commit_size):
             for record in chunk:
                 # --- Resolve municipality_id ---
                 municipality_id: int | None = None
@@ -137,9 +159,8 @@ class CadastralIngestor(BaseIngestor):
                     # Fallback: spatial lookup via centroid of the parcel geometry
                     row = self.db.execute(
                         text("""
-                            SELECT id FROM municipalities
-                            WHERE geometry IS NOT NULL
-                              AND ST_Intersects(geometry, ST_GeomFromText(:wkt, 4326))
+                            SELECT municipality_id FROM municipality_subdivisions
+                            WHERE ST_Intersects(geometry, ST_GeomFromText(:wkt, 4326))
                             LIMIT 1
                         """),
                         {"wkt": record["geometry_wkt"]}
@@ -159,9 +180,8 @@ class CadastralIngestor(BaseIngestor):
                 # --- Resolve omi_zone_id (best-effort) ---
                 omi_row = self.db.execute(
                     text("""
-                        SELECT id FROM omi_zones
-                        WHERE geometry IS NOT NULL
-                          AND ST_Intersects(geometry, ST_GeomFromText(:wkt, 4326))
+                        SELECT omi_zone_id FROM omi_zone_subdivisions
+                        WHERE ST_Intersects(geometry, ST_GeomFromText(:wkt, 4326))
                         LIMIT 1
                     """),
                     {"wkt": record["geometry_wkt"]}
@@ -183,5 +203,7 @@ class CadastralIngestor(BaseIngestor):
             self.db.commit()
             logger.info(f"Committed chunk — {count} parcels inserted so far")
 
-        logger.info(f"Cadastral ingestion complete. Total new parcels: {count}")
+        # Cached "no parcel here" answers may now be wrong
+        parcel_cache.clear()
+        logger.info(f"Cadastral chunk loaded. New parcels: {count}")
         return count
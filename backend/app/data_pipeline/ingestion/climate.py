@@ -3,6 +3,7 @@ import logging
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from .base import BaseIngestor
+from app.data_pipeline.processing.normalizer import DataNormalizer
 from app.models.geography import Municipality
 from app.models.risk import ClimateProjection
 
@@ -14,13 +15,8 @@ class ClimateIngestor(BaseIngestor):
     Expected source: Copernicus-derived CSV/Excel.
     """
     
-    def fetch(self, source: str) -> pd.DataFrame:
-        if source.endswith('.csv'):
-            return pd.read_csv(source)
-        elif source.endswith(('.xls', '.xlsx')):
-            return pd.read_excel(source)
-        else:
-            raise ValueError(f"Unsupported file format: {source}")
+    def fetch(self, source: str) -> Any:
+        return self.read_table(source)
 
     def transform(self, data: pd.DataFrame) -> List[Dict[str, Any]]:
         """
@@ -36,32 +32,41 @@ class ClimateIngestor(BaseIngestor):
         col_scenario = _get_col(["Scenario"]) or "Scenario"
         col_year = _get_col(["Anno", "Target"]) or "Target_Year"
         
-        transformed = []
-        for _, row in data.iterrows():
-            try:
-                mun_code_raw = row.get(col_mun_code)
-                if pd.isna(mun_code_raw): continue
-                
-                mun_code = str(int(float(mun_code_raw))).zfill(6)
-                
-                record = {
-                    "municipality_code": mun_code,
-                    "scenario": str(row.get(col_scenario, "RCP8.5")),
-                    "target_year": int(row.get(col_year, 2050)),
-                    "avg_temp_change": float(row.get("Avg_Temp_Change", 0)),
-                    "max_temp_change": float(row.get("Max_Temp_Change", 0)),
-                    "heatwave_days_increase": int(row.get("Heatwave_Days_Increase", 0)),
-                    "avg_precipitation_change": float(row.get("Avg_Precipitation_Change", 0)),
-                    "extreme_rainfall_increase": float(row.get("Extreme_Rainfall_Increase", 0)),
-                    "drought_risk_increase": float(row.get("Drought_Risk_Increase", 0)),
-                    "sea_level_rise_cm": float(row.get("Sea_Level_Rise_Cm", 0)),
-                    "flood_risk_multiplier": float(row.get("Flood_Risk_Multiplier", 1.0)),
-                }
-                transformed.append(record)
-            except Exception as e:
-                logger.warning(f"Skipping climate row due to error: {e}")
-            
-        return transformed
+        def _number(col: str, default: float) -> pd.Series:
+            return pd.to_numeric(self.get_column(data, col, default), errors="coerce").astype(float)
+
+        # Rows without a numeric municipality code or target year, or with a
+        # projection that is present but not a number, are skipped
+        mun_codes = _number(col_mun_code, None)
+        target_years = _number(col_year, 2050)
+        heatwave_days = _number("Heatwave_Days_Increase", 0)
+        changes, unparseable = self.parse_numbers(data, {
+            "avg_temp_change": ("Avg_Temp_Change", 0),
+            "max_temp_change": ("Max_Temp_Change", 0),
+            "avg_precipitation_change": ("Avg_Precipitation_Change", 0),
+            "extreme_rainfall_increase": ("Extreme_Rainfall_Increase", 0),
+            "drought_risk_increase": ("Drought_Risk_Increase", 0),
+            "sea_level_rise_cm": ("Sea_Level_Rise_Cm", 0),
+            "flood_risk_multiplier": ("Flood_Risk_Multiplier", 1.0),
+        })
+        keep = (mun_codes.notna() & target_years.notna() & heatwave_days.notna()).to_numpy() & ~unparseable
+        if unparseable.any():
+            logger.warning(f"Skipping {int(unparseable.sum())} climate rows with unparseable values")
+        data, changes = data[keep], changes[keep]
+
+        return self.to_records({
+            "municipality_code": DataNormalizer.normalize_municipality_codes(mun_codes[keep]),
+            "scenario": self.get_column(data, col_scenario, "RCP8.5").fillna("RCP8.5").astype(str),
+            "target_year": target_years[keep].astype(int),
+            "avg_temp_change": changes["avg_temp_change"],
+            "max_temp_change": changes["max_temp_change"],
+            "heatwave_days_increase": heatwave_days[keep].astype(int),
+            "avg_precipitation_change": changes["avg_precipitation_change"],
+            "extreme_rainfall_increase": changes["extreme_rainfall_increase"],
+            "drought_risk_increase": changes["drought_risk_increase"],
+            "sea_level_rise_cm": changes["sea_level_rise_cm"],
+            "flood_risk_multiplier": changes["flood_risk_multiplier"],
+        })
 
     def load(self, transformed_data: List[Dict[str, Any]]) -> int:
         """
@@ -99,5 +104,5 @@ class ClimateIngestor(BaseIngestor):
                 count += 1
             
         self.db.commit()
-        logger.info(f"Climate Ingestion complete. Records added: {count}")
+        logger.info(f"Climate chunk loaded. Records added: {count}")
         return count
@@ -3,6 +3,7 @@ import logging
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from .base import BaseIngestor
+from app.data_pipeline.processing.normalizer import DataNormalizer
 from app.models.geography import Municipality
 from app.models.demographics import CrimeStatistics
 
@@ -14,13 +15,8 @@ class CrimeIngestor(BaseIngestor):
     Expected source: CSV or Excel from ISTAT.
     """
     
-    def fetch(self, source: str) -> pd.DataFrame:
-        if source.endswith('.csv'):
-            return pd.read_csv(source)
-        elif source.endswith(('.xls', '.xlsx')):
-            return pd.read_excel(source)
-        else:
-            raise ValueError(f"Unsupported file format: {source}")
+    def fetch(self, source: str) -> Any:
+        return self.read_table(source)
 
     def transform(self, data: pd.DataFrame) -> List[Dict[str, Any]]:
         """
@@ -41,33 +37,39 @@ class CrimeIngestor(BaseIngestor):
         col_vandalism = _get_col(["Vandalism"]) or "Vandalism_Rate"
         col_theft = _get_col(["Theft"]) or "Theft_Rate"
 
-        transformed = []
-        for _, row in data.iterrows():
-            try:
-                mun_code_raw = row.get(col_mun_code)
-                if pd.isna(mun_code_raw): continue
-                
-                mun_code = str(int(float(mun_code_raw))).zfill(6)
-                
-                record = {
-                    "municipality_code": mun_code,
-                    "year": int(row.get(col_year, 2022)),
-                    "total_crimes_per_1000": float(row.get(col_total, 0)),
-                    "violent_crimes_per_1000": float(row.get(col_violent, 0)),
-                    "property_crimes_per_1000": float(row.get(col_property, 0)),
-                    "burglary_rate": float(row.get(col_burglary, 0)),
-                    "vandalism_rate": float(row.get(col_vandalism, 0)),
-                    "theft_rate": float(row.get(col_theft, 0)),
-                }
-                
-                # Derive crime index (normalized 0-100)
-                record["crime_index"] = min(100.0, record["total_crimes_per_1000"] * 2) 
-                
-                transformed.append(record)
-            except Exception as e:
-                logger.warning(f"Skipping crime row due to error: {e}")
-            
-        return transformed
+        def _number(col: str, default: float) -> pd.Series:
+            return pd.to_numeric(self.get_column(data, col, default), errors="coerce").astype(float)
+
+        # Rows without a numeric municipality code or year, or with a rate
+        # that is present but not a number, are skipped
+        mun_codes = _number(col_mun_code, None)
+        years = _number(col_year, 2022)
+        rates, unparseable = self.parse_numbers(data, {
+            "total_crimes_per_1000": (col_total, 0),
+            "violent_crimes_per_1000": (col_violent, 0),
+            "property_crimes_per_1000": (col_property, 0),
+            "burglary_rate": (col_burglary, 0),
+            "vandalism_rate": (col_vandalism, 0),
+            "theft_rate": (col_theft, 0),
+        })
+        keep = (mun_codes.notna() & years.notna()).to_numpy() & ~unparseable
+        if unparseable.any():
+            logger.warning(f"Skipping {int(unparseable.sum())} crime rows with unparseable values")
+        rates = rates[keep]
+        total = rates["total_crimes_per_1000"]
+
+        return self.to_records({
+            "municipality_code": DataNormalizer.normalize_municipality_codes(mun_codes[keep]),
+            "year": years[keep].astype(int),
+            "total_crimes_per_1000": total,
+            "violent_crimes_per_1000": rates["violent_crimes_per_1000"],
+            "property_crimes_per_1000": rates["property_crimes_per_1000"],
+            "burglary_rate": rates["burglary_rate"],
+            "vandalism_rate": rates["vandalism_rate"],
+            "theft_rate": rates["theft_rate"],
+            # Derive crime index (normalized 0-100)
+            "crime_index": (total * 2).clip(upper=100.0),
+        })
 
     def load(self, transformed_data: List[Dict[str, Any]]) -> int:
         """
@@ -112,5 +114,5 @@ class CrimeIngestor(BaseIngestor):
                 count += 1
             
         self.db.commit()
-        logger.info(f"Crime Ingestion complete. Records added/updated: {count}")
+        logger.info(f"Crime chunk loaded. Records added/updated: {count}")
         return count
@@ -4,6 +4,7 @@ from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from datetime import date
 from .base import BaseIngestor
+from app.data_pipeline.processing.normalizer import DataNormalizer
 from app.models.geography import Municipality
 from app.models.demographics import Demographics
 
@@ -15,15 +16,10 @@ class ISTATDemographicsIngestor(BaseIngestor):
     Expected source: Path to a CSV or Excel file or a DataFrame.
     """
     
-    def fetch(self, source: Any) -> pd.DataFrame:
+    def fetch(self, source: Any) -> Any:
         if isinstance(source, pd.DataFrame):
             return source
-        if source.endswith('.csv'):
-            return pd.read_csv(source)
-        elif source.endswith(('.xls', '.xlsx')):
-            return pd.read_excel(source)
-        else:
-            raise ValueError(f"Unsupported file format: {source}")
+        return self.read_table(source)
 
     def transform(self, data: pd.DataFrame) -> List[Dict[str, Any]]:
         """
@@ -53,43 +49,31 @@ class ISTATDemographicsIngestor(BaseIngestor):
         if not data.empty:
             logger.info(f"First row sample: {data.iloc[0].to_dict()}")
 
-        transformed = []
-        for _, row in data.iterrows():
-            try:
-                mun_code_raw = row.get(col_mun_code)
-                if pd.isna(mun_code_raw):
-                    continue
-                
-                # Handle float/int codes (like 15146.0 -> "015146")
-                if isinstance(mun_code_raw, (float, int)):
-                    mun_code = str(int(mun_code_raw)).zfill(6)
-                else:
-                    mun_code = str(mun_code_raw).strip().zfill(6)
+        # Handle float/int codes (like 15146.0 -> "015146"); rows without a code are skipped
+        mun_codes = DataNormalizer.normalize_municipality_codes(self.get_column(data, col_mun_code))
+        # Rows without a population, or whose income or unemployment rate is
+        # present but not a number, are skipped too
+        population = pd.to_numeric(self.get_column(data, col_pop, 0), errors="coerce")
+        numbers, unparseable = self.parse_numbers(data, {
+            "avg_income_euro": (col_income, 0),
+            "unemployment_rate": (col_unemp, 0),
+        })
+        keep = ((mun_codes != "") & population.notna()).to_numpy() & ~unparseable
+        if not keep.all():
+            logger.warning(f"Skipping {int((~keep).sum())} rows without municipality code or population, or with unparseable values")
+        data = data[keep]
 
-                year_val = row.get(col_year) if col_year else 2022
-                year = int(year_val) if not pd.isna(year_val) else 2022
-                if year == 0:
-                    year = 2022
+        year = pd.to_numeric(self.get_column(data, col_year, 2022), errors="coerce").fillna(2022).astype(int)
 
-                record = {
-                    "municipality_code": mun_code,
-                    "year": year,
-                    "total_population": int(row.get(col_pop, 0)),
-                    "avg_income_euro": float(row.get(col_income, 0)),
-                    "unemployment_rate": float(row.get(col_unemp, 0)),
-                }
-                transformed.append(record)
-            except Exception as e:
-                logger.warning(f"Skipping row due to error: {e}")
-            
-        return transformed
+        return self.to_records({
+            "municipality_code": mun_codes[keep],
+            "year": year.mask(year == 0, 2022),
+            "total_population": population[keep].astype(int),
+            "avg_income_euro": numbers["avg_income_euro"][keep],
+            "unemployment_rate": numbers["unemployment_rate"][keep],
+        })
 
-    def load(self, transformed_data: List[Dict[str, Any]]) -> int:
-        """
-        Loads demographics records into the database with optimizations.
-        """
-        count = 0
-        
+    def prepare_load(self) -> Dict[str, Any]:
         # 1. Pre-fetch Municipalities for fast lookup
         municipalities = {m.code: m.id for m in self.db.query(Municipality.code, Municipality.id).all()}
         
@@ -98,9 +82,18 @@ class ISTATDemographicsIngestor(BaseIngestor):
             (d.municipality_id, d.year) 
             for d in self.db.query(Demographics.municipality_id, Demographics.year).all()
         }
+        return {"municipalities": municipalities, "existing_keys": existing_keys}
+
+    def load(self, transformed_data: List[Dict[str, Any]]) -> int:
+        """
+        Loads demographics records into the database with optimizations.
+        """
+        count = 0
+        state = self.load_state()
+        municipalities = state["municipalities"]
+        existing_keys = state["existing_keys"]
         
-        chunk_size = 500
-        for chunk in self.chunk_list(transformed_data, chunk_size):
+        for chunk in self.chunk_list(transformed_data, self.commit_size):
             for data in chunk:
                 mun_code = data["municipality_code"]
                 mun_id = municipalities.get(mun_code)
@@ -129,7 +122,7 @@ class ISTATDemographicsIngestor(BaseIngestor):
                     pass
             
             self.db.commit()
-            logger.info(f"Batched {chunk_size} demographics records...")
+            logger.info(f"Batched {len(chunk)} demographics records...")
             
-        logger.info(f"Demographics Ingestion complete. Records added: {count}")
+        logger.info(f"Demographics chunk loaded. Records added: {count}")
         return count
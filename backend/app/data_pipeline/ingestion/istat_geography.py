@@ -2,9 +2,10 @@ import pandas as pd
 import requests
 import io
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 from sqlalchemy.orm import Session
 from .base import BaseIngestor
+from app.data_pipeline.processing.normalizer import DataNormalizer
 from app.models.geography import Region, Province, Municipality
 
 logger = logging.getLogger(__name__)
@@ -16,11 +17,13 @@ class ISTATGeographyIngestor(BaseIngestor):
     URL: https://www.istat.it/storage/codici-unita-amministrative/Elenco-comuni-italiani.csv
     """
     
+    refreshes_spatial_index = True
+    
     ISTAT_URL = "https://www.istat.it/storage/codici-unita-amministrative/Elenco-comuni-italiani.csv"
     
-    def fetch(self, source: str = None) -> pd.DataFrame:
+    def fetch(self, source: str = None) -> Iterator[pd.DataFrame]:
         """
-        Downloads the latest ISTAT municipality list.
+        Downloads the latest ISTAT municipality list, parsed in chunks.
         """
         url = source or self.ISTAT_URL
         logger.info(f"Downloading ISTAT geography data from {url}")
@@ -30,13 +33,11 @@ class ISTATGeographyIngestor(BaseIngestor):
         
         # ISTAT uses semicolon separator and latin-1 encoding usually
         try:
-            df = pd.read_csv(io.StringIO(response.content.decode('latin-1')), sep=';')
+            text = response.content.decode('latin-1')
         except UnicodeDecodeError:
-            df = pd.read_csv(io.StringIO(response.content.decode('utf-8-sig')), sep=';')
+            text = response.content.decode('utf-8-sig')
             
-        logger.info(f"DataFrame loaded. Columns: {df.columns.tolist()}")
-        logger.info(f"First row: {df.iloc[0].to_dict()}")
-        return df
+        return pd.read_csv(io.StringIO(text), sep=';', chunksize=self.chunk_rows)
 
     def transform(self, data: pd.DataFrame) -> Dict[str, List[Dict[str, Any]]]:
         """
@@ -57,110 +58,108 @@ class ISTATGeographyIngestor(BaseIngestor):
 
         logger.info(f"Detected columns: Reg={col_reg_name}, Prov={col_prov_name}, Mun={col_mun_name}")
 
-        transformed = {
-            "regions": [],
-            "provinces": [],
-            "municipalities": []
+        def _names(col):
+            names = self.get_column(data, col)
+            return names.where(names.isna(), names.astype(str).str.strip())
+
+        def _codes(col, width):
+            numbers = pd.to_numeric(self.get_column(data, col), errors="coerce")
+            codes = pd.Series(None, index=data.index, dtype=object)
+            codes[numbers.notna()] = numbers.dropna().astype("int64").astype(str).str.zfill(width).to_numpy()
+            return codes
+
+        def _named(frame, col):
+            return frame[col].notna() & (frame[col] != "")
+
+        rows = pd.DataFrame({
+            "reg_name": _names(col_reg_name),
+            "reg_code": _codes(col_reg_code, 2),
+            "prov_name": _names(col_prov_name),
+            "prov_code": _codes(col_prov_code, 3),
+            "mun_name": _names(col_mun_name),
+            "mun_code": DataNormalizer.normalize_municipality_codes(self.get_column(data, col_mun_code)),
+        })
+        # Each level needs the codes of the levels above it
+        rows = rows[rows["reg_code"].notna()]
+
+        # 1. Regions and 2. Provinces: first named row of each code
+        regions = rows[_named(rows, "reg_name")].drop_duplicates("reg_code")
+        rows = rows[rows["prov_code"].notna()]
+        provinces = rows[_named(rows, "prov_name")].drop_duplicates("prov_code")
+        # 3. Municipalities
+        municipalities = rows[_named(rows, "mun_name") & (rows["mun_code"] != "")]
+
+        return {
+            "regions": self.to_records({"name": regions["reg_name"], "code": regions["reg_code"]}),
+            "provinces": self.to_records({
+                "name": provinces["prov_name"],
+                "code": provinces["prov_code"],
+                "region_code": provinces["reg_code"],
+            }),
+            "municipalities": self.to_records({
+                "name": municipalities["mun_name"],
+                "code": municipalities["mun_code"],
+                "province_code": municipalities["prov_code"],
+            }),
         }
-        
-        regions_seen = set()
-        provinces_seen = set()
-        
-        def safe_strip(val):
-            if pd.isna(val) or not isinstance(val, str):
-                return str(val) if not pd.isna(val) else None
-            return val.strip()
 
-        for _, row in data.iterrows():
-            # 1. Region
-            reg_name = safe_strip(row.get(col_reg_name))
-            reg_code_val = row.get(col_reg_code)
-            if pd.isna(reg_code_val): continue
-            reg_code = str(int(reg_code_val)).zfill(2)
-            
-            if reg_name and reg_code not in regions_seen:
-                transformed["regions"].append({"name": reg_name, "code": reg_code})
-                regions_seen.add(reg_code)
-            
-            # 2. Province
-            prov_name = safe_strip(row.get(col_prov_name))
-            prov_code_val = row.get(col_prov_code)
-            if pd.isna(prov_code_val): continue
-            prov_code = str(int(prov_code_val)).zfill(3)
-            
-            if prov_name and prov_code not in provinces_seen:
-                transformed["provinces"].append({
-                    "name": prov_name, 
-                    "code": prov_code,
-                    "region_code": reg_code
-                })
-                provinces_seen.add(prov_code)
-                
-            # 3. Municipality
-            mun_name = safe_strip(row.get(col_mun_name))
-            mun_code_val = row.get(col_mun_code)
-            if pd.isna(mun_code_val): continue
-            mun_code = str(mun_code_val).zfill(6)
-            
-            if mun_name and mun_code:
-                transformed["municipalities"].append({
-                    "name": mun_name,
-                    "code": mun_code,
-                    "province_code": prov_code
-                })
-                
-        return transformed
+    def prepare_load(self) -> Dict[str, Any]:
+        # Pre-fetch existing Regions, Provinces and Mun codes to avoid duplicates
+        return {
+            "regions": {code: region_id for code, region_id in self.db.query(Region.code, Region.id).all()},
+            "provinces": {code: province_id for code, province_id in self.db.query(Province.code, Province.id).all()},
+            "municipality_codes": {m.code for m in self.db.query(Municipality.code).all()},
+        }
 
     def load(self, transformed_data: Dict[str, List[Dict[str, Any]]]) -> int:
         """
         Loads hierarchical geography data into the database with optimizations.
+        Regions and provinces seen in earlier chunks are kept in the load state.
         """
         count = 0
+        state = self.load_state()
+        existing_regions = state["regions"]
+        existing_provinces = state["provinces"]
+        existing_mun_codes = state["municipality_codes"]
         
-        # 1. Pre-fetch existing Regions
-        existing_regions = {r.code: r for r in self.db.query(Region).all()}
-        
-        # Load New Regions
+        # 1. Load New Regions
+        new_regions = []
         for r_data in transformed_data["regions"]:
             if r_data["code"] not in existing_regions:
                 region = Region(name=r_data["name"], code=r_data["code"])
                 self.db.add(region)
-                existing_regions[r_data["code"]] = region
+                new_regions.append(region)
                 count += 1
         self.db.flush() 
+        existing_regions.update({r.code: r.id for r in new_regions})
         
-        # 2. Pre-fetch existing Provinces
-        existing_provinces = {p.code: p for p in self.db.query(Province).all()}
-        
-        # Load New Provinces
+        # 2. Load New Provinces
+        new_provinces = []
         for p_data in transformed_data["provinces"]:
             if p_data["code"] not in existing_provinces:
-                region = existing_regions.get(p_data["region_code"])
-                if region:
-                    province = Province(name=p_data["name"], code=p_data["code"], region_id=region.id)
+                region_id = existing_regions.get(p_data["region_code"])
+                if region_id:
+                    province = Province(name=p_data["name"], code=p_data["code"], region_id=region_id)
                     self.db.add(province)
-                    existing_provinces[p_data["code"]] = province
+                    new_provinces.append(province)
                     count += 1
         self.db.flush()
+        existing_provinces.update({p.code: p.id for p in new_provinces})
         
         # 3. Load Municipalities in Batches
-        # Pre-fetch existing Mun codes to avoid duplicates
-        existing_mun_codes = {m.code for m in self.db.query(Municipality.code).all()}
-        
-        chunk_size = 500
-        for chunk in self.chunk_list(transformed_data["municipalities"], chunk_size):
+        for chunk in self.chunk_list(transformed_data["municipalities"], self.commit_size):
             for m_data in chunk:
                 if m_data["code"] not in existing_mun_codes:
-                    province = existing_provinces.get(m_data["province_code"])
-                    if province:
-                        mun = Municipality(name=m_data["name"], code=m_data["code"], province_id=province.id)
+                    province_id = existing_provinces.get(m_data["province_code"])
+                    if province_id:
+                        mun = Municipality(name=m_data["name"], code=m_data["code"], province_id=province_id)
                         self.db.add(mun)
                         existing_mun_codes.add(m_data["code"])
                         count += 1
             
             # Commit each batch to keep memory and transaction log small
             self.db.commit()
-            logger.info(f"Batched {chunk_size} municipalities...")
+            logger.info(f"Batched {len(chunk)} municipalities...")
         
-        logger.info(f"Geography Ingestion complete. Total new records created: {count}")
+        logger.info(f"Geography chunk loaded. New records created: {count}")
         return count
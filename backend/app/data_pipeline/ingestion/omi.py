@@ -1,9 +1,11 @@
+import numpy as np
 import pandas as pd
 from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
 from datetime import date
 import logging
 from .base import BaseIngestor
+from app.data_pipeline.processing.normalizer import DataNormalizer
 from app.models.geography import OMIZone
 from app.models.property import PropertyPrice, PropertyType, TransactionType
 
@@ -15,16 +17,13 @@ class OMIIngestor(BaseIngestor):
     Expected source: Path to a CSV or Excel file containing OMI price data.
     """
     
-    def fetch(self, source: str) -> pd.DataFrame:
+    refreshes_spatial_index = True
+    
+    def fetch(self, source: str) -> Any:
         """
-        Reads OMI data from a file.
+        Reads OMI data from a file, in chunks for CSV.
         """
-        if source.endswith('.csv'):
-            return pd.read_csv(source)
-        elif source.endswith(('.xls', '.xlsx')):
-            return pd.read_excel(source)
-        else:
-            raise ValueError(f"Unsupported file format: {source}")
+        return self.read_table(source)
 
     def transform(self, data: pd.DataFrame) -> List[Dict[str, Any]]:
         """
@@ -59,67 +58,54 @@ class OMIIngestor(BaseIngestor):
         if not data.empty:
             logger.info(f"First OMI row sample: {data.iloc[0].to_dict()}")
 
-        transformed = []
-        for _, row in data.iterrows():
-            try:
-                # 1. Resolve Zone Code (prefer Zona_OMI string)
-                zone_code_raw = row.get(col_zone)
-                if pd.isna(zone_code_raw):
-                    continue
-                zone_code = str(zone_code_raw).strip()
-                
-                # 2. Resolve Municipality Code for fallback creation
-                mun_code_raw = row.get(col_mun_code)
-                if isinstance(mun_code_raw, (float, int)):
-                    mun_code = str(int(mun_code_raw)).zfill(6)
-                else:
-                    mun_code = str(mun_code_raw).strip().zfill(6)
+        # 1. Resolve Zone Code (prefer Zona_OMI string); rows without one are skipped
+        zone_codes = self.get_column(data, col_zone)
+        keep = zone_codes.notna()
+        data, zone_codes = data[keep], zone_codes[keep]
+        if data.empty:
+            return []
 
-                min_p_val = row.get(col_min, 0)
-                max_p_val = row.get(col_max, 0)
-                avg_p_val = row.get(col_avg)
+        # 2. Italian-formatted prices. A price that is present but unparseable
+        # ("n/d", junk) skips the row; a missing min/max (cell or whole column)
+        # is 0 and a missing average is the midpoint
+        raw_prices = [self.get_column(data, col) for col in (col_min, col_max, col_avg)]
+        prices = [DataNormalizer.normalize_prices(raw, default=np.nan) for raw in raw_prices]
+        unparseable = np.zeros(len(data), dtype=bool)
+        for raw, parsed in zip(raw_prices, prices):
+            unparseable |= (raw.notna() & parsed.isna()).to_numpy()
+        if unparseable.any():
+            logger.warning(f"Skipping {int(unparseable.sum())} OMI rows with unparseable prices")
+            keep = ~unparseable
+            data, zone_codes = data[keep], zone_codes[keep]
+            prices = [parsed[keep] for parsed in prices]
+            if data.empty:
+                return []
+        min_p, max_p, avg_p = prices
+        min_p, max_p = min_p.fillna(0.0), max_p.fillna(0.0)
+        avg_p = avg_p.fillna((min_p + max_p) / 2)
 
-                min_p = float(str(min_p_val).replace(',', '.')) if not pd.isna(min_p_val) else 0.0
-                max_p = float(str(max_p_val).replace(',', '.')) if not pd.isna(max_p_val) else 0.0
-                
-                if not pd.isna(avg_p_val):
-                    avg_p = float(str(avg_p_val).replace(',', '.'))
-                else:
-                    avg_p = (min_p + max_p) / 2
-                
-                year_val = row.get(col_year, 0)
-                sem_val = row.get(col_sem, 0)
-                
-                record = {
-                    "omi_zone_code": zone_code,
-                    "municipality_code": mun_code,
-                    "year": int(year_val) if not pd.isna(year_val) else 2022,
-                    "semester": int(sem_val) if not pd.isna(sem_val) else 1,
-                    "property_type": self._map_property_type(row.get(col_type)),
-                    "transaction_type": self._map_transaction_type(row.get(col_market)),
-                    "min_price": min_p,
-                    "max_price": max_p,
-                    "avg_price": avg_p,
-                    "property_state": str(row.get(col_state, "Normale"))
-                }
-                transformed.append(record)
-            except Exception as e:
-                logger.warning(f"Skipping row due to error: {e}")
-            
-        return transformed
+        return self.to_records({
+            "omi_zone_code": zone_codes.astype(str).str.strip(),
+            # 3. Municipality Code for fallback creation
+            "municipality_code": DataNormalizer.normalize_municipality_codes(self.get_column(data, col_mun_code)),
+            "year": pd.to_numeric(self.get_column(data, col_year, 0), errors="coerce").fillna(2022).astype(int),
+            "semester": pd.to_numeric(self.get_column(data, col_sem, 0), errors="coerce").fillna(1).astype(int),
+            "property_type": DataNormalizer.map_categories(self.get_column(data, col_type), self._map_property_type),
+            "transaction_type": DataNormalizer.map_categories(self.get_column(data, col_market), self._map_transaction_type),
+            "min_price": min_p,
+            "max_price": max_p,
+            "avg_price": avg_p,
+            "property_state": self.get_column(data, col_state, "Normale").fillna("Normale").astype(str),
+        })
 
-    def load(self, transformed_data: List[Dict[str, Any]]) -> int:
-        """
-        Loads OMI records into the database with optimizations.
-        """
-        count = 0
+    def prepare_load(self) -> Dict[str, Any]:
         from app.models.geography import Municipality
         
         # 1. Pre-fetch existing OMI Zones
-        existing_zones = {z.zone_code: z for z in self.db.query(OMIZone).all()}
+        existing_zones = {code: zone_id for code, zone_id in self.db.query(OMIZone.zone_code, OMIZone.id).all()}
         
         # 2. Pre-fetch Municipalities for zone creation
-        municipalities = {m.code: m for m in self.db.query(Municipality).all()}
+        municipalities = {m.code: (m.id, m.name) for m in self.db.query(Municipality.code, Municipality.id, Municipality.name).all()}
         
         # 3. Pre-fetch existing PropertyPrice keys (zone_id, year, semester, type, trans)
         existing_prices = {
@@ -132,36 +118,48 @@ class OMIIngestor(BaseIngestor):
                 PropertyPrice.transaction_type
             ).all()
         }
+        return {"zones": existing_zones, "municipalities": municipalities, "prices": existing_prices}
+
+    def load(self, transformed_data: List[Dict[str, Any]]) -> int:
+        """
+        Loads OMI records into the database with optimizations.
+        """
+        count = 0
+        state = self.load_state()
+        existing_zones = state["zones"]
+        municipalities = state["municipalities"]
+        existing_prices = state["prices"]
         
-        chunk_size = 500
-        for chunk in self.chunk_list(transformed_data, chunk_size):
+        for chunk in self.chunk_list(transformed_data, self.commit_size):
             for data in chunk:
                 # 1. Resolve OMI Zone
                 zone_code = data["omi_zone_code"]
-                zone = existing_zones.get(zone_code)
+                zone_id = existing_zones.get(zone_code)
                 
-                if not zone:
+                if not zone_id:
                     istat_code = data.get("municipality_code")
                     municipality = municipalities.get(istat_code)
                     if municipality:
+                        municipality_id, municipality_name = municipality
                         zone = OMIZone(
                             zone_code=zone_code,
-                            municipality_id=municipality.id,
-                            zone_name=f"OMI Zone {zone_code.split('_')[-1]} - {municipality.name}",
+                            municipality_id=municipality_id,
+                            zone_name=f"OMI Zone {zone_code.split('_')[-1]} - {municipality_name}",
                             zone_type="Residenziale"
                         )
                         self.db.add(zone)
                         self.db.flush() # Get zone.id
-                        existing_zones[zone_code] = zone
+                        zone_id = zone.id
+                        existing_zones[zone_code] = zone_id
                     else:
                         logger.warning(f"Skipping record: Municipality {istat_code} not found for zone {zone_code}")
                         continue
                 
                 # 2. Check if price record exists
-                key = (zone.id, data["year"], data["semester"], data["property_type"], data["transaction_type"])
+                key = (zone_id, data["year"], data["semester"], data["property_type"], data["transaction_type"])
                 if key not in existing_prices:
                     price_record = PropertyPrice(
-                        omi_zone_id=zone.id,
+                        omi_zone_id=zone_id,
                         year=data["year"],
                         semester=data["semester"],
                         reference_date=date(data["year"], 6 if data["semester"] == 1 else 12, 1),
@@ -177,9 +175,9 @@ class OMIIngestor(BaseIngestor):
                     count += 1
             
             self.db.commit()
-            logger.info(f"Batched {chunk_size} OMI records...")
+            logger.info(f"Batched {len(chunk)} OMI records...")
             
-        logger.info(f"OMI Ingestion complete. Records added: {count}")
+        logger.info(f"OMI chunk loaded. Records added: {count}")
         return count
 
     def _map_property_type(self, val: str) -> PropertyType:
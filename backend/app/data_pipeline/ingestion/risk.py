@@ -3,6 +3,7 @@ import logging
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from .base import BaseIngestor
+from app.data_pipeline.processing.normalizer import DataNormalizer
 from app.models.geography import Municipality
 from app.models.risk import SeismicRisk, FloodRisk, LandslideRisk
 
@@ -14,13 +15,8 @@ class RiskIngestor(BaseIngestor):
     Source: ISPRA, INGV
     """
     
-    def fetch(self, source: str) -> pd.DataFrame:
-        if source.endswith('.csv'):
-            return pd.read_csv(source)
-        elif source.endswith(('.xls', '.xlsx')):
-            return pd.read_excel(source)
-        else:
-            raise ValueError(f"Unsupported file format: {source}")
+    def fetch(self, source: str) -> Any:
+        return self.read_table(source)
 
     def transform(self, data: pd.DataFrame) -> List[Dict[str, Any]]:
         """
@@ -48,34 +44,29 @@ class RiskIngestor(BaseIngestor):
         if not data.empty:
             logger.info(f"First row sample: {data.iloc[0].to_dict()}")
 
-        transformed = []
-        for _, row in data.iterrows():
-            try:
-                mun_code_raw = row.get(col_mun_code)
-                if pd.isna(mun_code_raw): continue
-                
-                mun_code = str(int(float(mun_code_raw))).zfill(6)
-                
-                record = {
-                    "municipality_code": mun_code,
-                    "risk_type": str(row.get(col_risk_type)).lower(),
-                    "level": str(row.get(col_level)),
-                    "score": float(row.get(col_score, 0)),
-                    "pga": float(row.get("PGA", 0)), # Optional for seismic
-                    "area_pct": float(row.get("Area_Pct", 0)), # Optional for flood/landslide
-                }
-                transformed.append(record)
-            except Exception as e:
-                logger.warning(f"Skipping risk row due to error: {e}")
-            
-        return transformed
+        # Rows without a numeric municipality code, or with an unparseable
+        # score/PGA/area, are skipped; missing values are 0
+        mun_codes = pd.to_numeric(self.get_column(data, col_mun_code), errors="coerce")
+        numbers, unparseable = self.parse_numbers(data, {
+            "score": (col_score, 0),
+            "pga": ("PGA", 0),  # Optional for seismic
+            "area_pct": ("Area_Pct", 0),  # Optional for flood/landslide
+        })
+        keep = mun_codes.notna().to_numpy() & ~unparseable
+        if unparseable.any():
+            logger.warning(f"Skipping {int(unparseable.sum())} risk rows with unparseable values")
+        data, numbers = data[keep], numbers[keep].fillna(0.0)
 
-    def load(self, transformed_data: List[Dict[str, Any]]) -> int:
-        """
-        Loads risk records into the database with optimizations.
-        """
-        count = 0
-        
+        return self.to_records({
+            "municipality_code": DataNormalizer.normalize_municipality_codes(mun_codes[keep]),
+            "risk_type": self.get_column(data, col_risk_type).fillna("").astype(str).str.lower(),
+            "level": self.get_column(data, col_level).fillna("").astype(str),
+            "score": numbers["score"],
+            "pga": numbers["pga"],
+            "area_pct": numbers["area_pct"],
+        })
+
+    def prepare_load(self) -> Dict[str, Any]:
         # 1. Pre-fetch Municipalities
         municipalities = {m.code: m.id for m in self.db.query(Municipality.code, Municipality.id).all()}
         
@@ -83,9 +74,25 @@ class RiskIngestor(BaseIngestor):
         existing_seismic = {r.municipality_id for r in self.db.query(SeismicRisk.municipality_id).all()}
         existing_flood = {r.municipality_id for r in self.db.query(FloodRisk.municipality_id).all()}
         existing_landslide = {r.municipality_id for r in self.db.query(LandslideRisk.municipality_id).all()}
+        return {
+            "municipalities": municipalities,
+            "seismic": existing_seismic,
+            "flood": existing_flood,
+            "landslide": existing_landslide,
+        }
+
+    def load(self, transformed_data: List[Dict[str, Any]]) -> int:
+        """
+        Loads risk records into the database with optimizations.
+        """
+        count = 0
+        state = self.load_state()
+        municipalities = state["municipalities"]
+        existing_seismic = state["seismic"]
+        existing_flood = state["flood"]
+        existing_landslide = state["landslide"]
         
-        chunk_size = 500
-        for chunk in self.chunk_list(transformed_data, chunk_size):
+        for chunk in self.chunk_list(transformed_data, self.commit_size):
             for data in chunk:
                 mun_id = municipalities.get(data["municipality_code"])
                 if not mun_id:
@@ -106,9 +113,9 @@ class RiskIngestor(BaseIngestor):
                 count += 1
             
             self.db.commit()
-            logger.info(f"Batched {chunk_size} risk records...")
+            logger.info(f"Batched {len(chunk)} risk records...")
             
-        logger.info(f"Risk Ingestion complete. Records processed: {count}")
+        logger.info(f"Risk chunk loaded. Records processed: {count}")
         return count
 
     def _load_seismic(self, mun_id: int, data: Dict[str, Any]):
@@ -1,6 +1,7 @@
+import numpy as np
 import pandas as pd
 import logging
-from typing import Any
+from typing import Any, Callable
 
 logger = logging.getLogger(__name__)
 
@@ -51,3 +52,43 @@ class DataNormalizer:
             return float(str(value).replace('%', '').replace(',', '.'))
         except Exception:
             return 0.0
+
+    # Series versions: one pass over a whole column instead of a call per cell
+
+    @staticmethod
+    def normalize_municipality_codes(codes: pd.Series) -> pd.Series:
+        """
+        normalize_municipality_code over a column ("" for missing codes)
+        """
+        numbers = pd.to_numeric(codes, errors="coerce")
+        is_number = numbers.notna() & np.isfinite(numbers)
+        is_text = codes.notna() & ~is_number
+        normalized = pd.Series("", index=codes.index, dtype=object)
+        normalized[is_number] = numbers[is_number].astype("int64").astype(str).str.zfill(6).to_numpy()
+        if is_text.any():
+            normalized[is_text] = codes[is_text].astype(str).str.strip().str.zfill(6).to_numpy()
+        return normalized
+
+    @staticmethod
+    def normalize_prices(values: pd.Series, default: float = 0.0) -> pd.Series:
+        """
+        normalize_price over a column; missing or unparseable values become `default`
+        """
+        if pd.api.types.is_numeric_dtype(values):
+            return values.astype(float).fillna(default)
+
+        text = values.astype(str).str.strip().str.replace('€', '', regex=False).str.replace(' ', '', regex=False)
+        has_comma = text.str.contains(',', regex=False, na=False)
+        text[has_comma] = text[has_comma].str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+        return pd.to_numeric(text, errors="coerce").fillna(default)
+
+    @staticmethod
+    def map_categories(values: pd.Series, mapper: Callable[[str], Any]) -> pd.Series:
+        """
+        Apply a scalar mapper (e.g. a label -> enum lookup) once per distinct
+        value of the column rather than once per row
+        """
+        categories = pd.Categorical(values)
+        # Missing values have code -1: the last slot holds their mapping
+        mapped = np.array([mapper(c) for c in categories.categories] + [mapper(None)], dtype=object)
+        return pd.Series(mapped[categories.codes], index=values.index, dtype=object)
@@ -1,18 +1,42 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 import logging
 
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import MetricsMiddleware, PROMETHEUS_AVAILABLE, CONTENT_TYPE_LATEST, render_metrics
+from app.core.query_tracking import QueryTrackingMiddleware, QUERY_COUNT_HEADER, QUERY_TIME_HEADER
+from app.core.profiling import ProfilingMiddleware, PROFILE_ID_HEADER
+from app.core.tracing import TracingMiddleware, setup_tracing
 from app.core.database import SessionLocal
 from app.core.logging_config import setup_logging
+from app.services.score_jobs import job_runner
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 
 # Initialize Logging
 setup_logging()
 logger = logging.getLogger(__name__)
+setup_tracing("property-api")
 
-app = FastAPI(title=settings.PROJECT_NAME)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background score jobs: start workers and requeue jobs left over from a restart
+    job_runner.start()
+    try:
+        requeued = await run_in_threadpool(job_runner.recover)
+        if requeued:
+            logger.info(f"Requeued {requeued} score jobs")
+    except Exception as e:
+        logger.error(f"Score job recovery failed: {e}")
+    yield
+    job_runner.shutdown()
+
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 # Set all CORS enabled origins with explicit methods (security hardening)
 if settings.BACKEND_CORS_ORIGINS:
@@ -22,8 +46,26 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "OPTIONS"],  # Explicit methods only
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "Link", QUERY_COUNT_HEADER, QUERY_TIME_HEADER, PROFILE_ID_HEADER],
     )
 
+# Negotiate gzip/brotli for JSON responses (precompressed cache hits pass through)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+# SQL statement count / DB time per request (N+1 detection)
+if settings.QUERY_TRACKING_ENABLED:
+    app.add_middleware(QueryTrackingMiddleware)
+
+# Sampling profiler for requests presenting the admin token (inert without one)
+app.add_middleware(ProfilingMiddleware)
+
+# OpenTelemetry SERVER span per request (no-op unless TRACING_ENABLED)
+app.add_middleware(TracingMiddleware)
+
+# Outermost: per-route latency and in-flight requests for /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
 @app.get("/")
@@ -31,6 +73,13 @@ def read_root():
     logger.info("Root endpoint accessed")
     return {"message": f"Welcome to {settings.PROJECT_NAME} API"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (route latency, DB pool, caches, Nominatim)."""
+    if not (settings.METRICS_ENABLED and PROMETHEUS_AVAILABLE):
+        return Response(content="prometheus_client not installed or metrics disabled", status_code=501)
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
@@ -1,13 +1,14 @@
 from .base import Base
-from .geography import Region, Province, Municipality, OMIZone
+from .geography import Region, Province, Municipality, OMIZone, MunicipalitySubdivision, OMIZoneSubdivision
 from .property import PropertyPrice
 from .demographics import Demographics, CrimeStatistics
 from .risk import SeismicRisk, FloodRisk, LandslideRisk, ClimateProjection, AirQuality
 from .listing import RealEstateListing
-from .score import InvestmentScore
+from .score import InvestmentScore, ScoreJob
 from .infrastructure import TransportNode
 from .services import ServiceNode
 from .user import User
+from .geocoding import GeocodeCacheEntry
 
 __all__ = [
     "Base",
@@ -15,6 +16,8 @@ __all__ = [
     "Province", 
     "Municipality",
     "OMIZone",
+    "MunicipalitySubdivision",
+    "OMIZoneSubdivision",
     "PropertyPrice",
     "Demographics",
     "CrimeStatistics",
@@ -24,5 +27,7 @@ __all__ = [
     "ClimateProjection",
     "AirQuality",
     "InvestmentScore",
+    "ScoreJob",
     "User",
+    "GeocodeCacheEntry",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float, Date, JSON, String
+from sqlalchemy import Column, Integer, ForeignKey, Float, Date, JSON, String, Index
 from sqlalchemy.orm import relationship
 from .base import Base, TimestampMixin
 
@@ -40,6 +40,10 @@ class Demographics(Base, TimestampMixin):
     # Education
     higher_education_rate = Column(Float)  # % with university degree
     
+    __table_args__ = (
+        Index('ix_demographics_municipality_year', 'municipality_id', 'year'),
+    )
+    
     # Relationships
     municipality = relationship("Municipality", back_populates="demographics")
     
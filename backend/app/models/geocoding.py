@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, UniqueConstraint
+from .base import Base, TimestampMixin
+
+class GeocodeCacheEntry(Base, TimestampMixin):
+    """Cached geocoder response (forward or reverse), keyed by normalized query"""
+    __tablename__ = "geocode_cache"
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(10), nullable=False)  # "forward" or "reverse"
+    query_key = Column(String(500), nullable=False)  # Folded query text, or rounded "lat,lon"
+    result = Column(JSON)  # NULL: the geocoder found nothing (negative entry)
+    expires_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('kind', 'query_key', name='uq_geocode_cache_kind_query_key'),
+        Index('ix_geocode_cache_expires_at', 'expires_at'),
+    )
+    
+    def __repr__(self):
+        return f"<GeocodeCacheEntry {self.kind}: {self.query_key}>"
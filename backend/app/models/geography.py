@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, UniqueConstraint, Index, DDL, event, text
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geometry
+from app.core.constants import SUBDIVIDE_MAX_VERTICES
 from .base import Base, TimestampMixin
 
 class Region(Base, TimestampMixin):
@@ -26,7 +27,7 @@ class Province(Base, TimestampMixin):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     code = Column(String(10), nullable=False, unique=True)  # ISTAT code
-    region_id = Column(Integer, ForeignKey("regions.id"), nullable=False)
+    region_id = Column(Integer, ForeignKey("regions.id"), nullable=False, index=True)
     geometry = Column(Geometry('MULTIPOLYGON', srid=4326))
     
     # Phase 6: Regional Baseline (Capital's Rent)
@@ -72,6 +73,21 @@ class Municipality(Base, TimestampMixin):
     
     # Phase 6: Rental Market (City Level)
     avg_rent_sqm = Column(Float, nullable=True) # Annual Euros per Sqm (Aggregated) # Percentage of households with >100Mbps
+
+    # Keyset pagination: (sort key, id) so every page is a single index seek
+    __table_args__ = (
+        Index('ix_municipalities_name_id', 'name', 'id'),
+        Index('ix_municipalities_population_id', 'population', 'id'),
+        Index('ix_municipalities_province_name', 'province_id', 'name', 'id'),
+        Index('ix_municipalities_province_population', 'province_id', 'population', 'id'),
+        # Descending population pages list NULLs last, which a backward scan
+        # of the ascending indexes (NULLs first) cannot serve
+        Index('ix_municipalities_population_desc_id', text('population DESC NULLS LAST'), text('id DESC')),
+        Index(
+            'ix_municipalities_province_population_desc',
+            'province_id', text('population DESC NULLS LAST'), text('id DESC'),
+        ),
+    )
     
     # Relationships
     province = relationship("Province", back_populates="municipalities")
@@ -139,3 +155,72 @@ class CadastralParcel(Base, TimestampMixin):
 
     def __repr__(self):
         return f"<CadastralParcel {self.foglio}/{self.particella}>"
+
+
+class MunicipalitySubdivision(Base):
+    """
+    Municipality boundary split with ST_Subdivide into pieces of at most
+    SUBDIVIDE_MAX_VERTICES vertices, for point-in-polygon queries.
+
+    Derived data: maintained by a trigger on municipalities.geometry.
+    """
+    __tablename__ = "municipality_subdivisions"
+
+    id = Column(Integer, primary_key=True)
+    municipality_id = Column(Integer, ForeignKey("municipalities.id", ondelete="CASCADE"), nullable=False, index=True)
+    parent_area = Column(Float, nullable=False)  # ST_Area of the whole boundary: smallest match wins
+    geometry = Column(Geometry('GEOMETRY', srid=4326, spatial_index=False), nullable=False)
+
+    __table_args__ = (
+        Index('ix_municipality_subdivisions_geometry', 'geometry', postgresql_using='gist'),
+    )
+
+
+class OMIZoneSubdivision(Base):
+    """OMI zone boundary split with ST_Subdivide (see MunicipalitySubdivision)."""
+    __tablename__ = "omi_zone_subdivisions"
+
+    id = Column(Integer, primary_key=True)
+    omi_zone_id = Column(Integer, ForeignKey("omi_zones.id", ondelete="CASCADE"), nullable=False, index=True)
+    parent_area = Column(Float, nullable=False)
+    geometry = Column(Geometry('GEOMETRY', srid=4326, spatial_index=False), nullable=False)
+
+    __table_args__ = (
+        Index('ix_omi_zone_subdivisions_geometry', 'geometry', postgresql_using='gist'),
+    )
+
+
+def subdivision_sync_ddl(parent: str, pieces: str, key: str, max_vertices: int = SUBDIVIDE_MAX_VERTICES):
+    """
+    Trigger keeping `pieces` in sync with `parent`.geometry: every insert or
+    geometry update replaces the row's pieces; deletes cascade through the FK.
+    """
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION sync_{pieces}() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM {pieces} WHERE {key} = NEW.id;
+            IF NEW.geometry IS NOT NULL THEN
+                INSERT INTO {pieces} ({key}, parent_area, geometry)
+                SELECT NEW.id, ST_Area(NEW.geometry), ST_Subdivide(NEW.geometry, {max_vertices});
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS sync_{pieces} ON {parent}",
+        f"""
+        CREATE TRIGGER sync_{pieces}
+        AFTER INSERT OR UPDATE OF geometry ON {parent}
+        FOR EACH ROW EXECUTE FUNCTION sync_{pieces}()
+        """,
+    ]
+
+
+# The pieces tables are created after their parents (FK), so the triggers go there
+for _model, _parent, _key in (
+    (MunicipalitySubdivision, "municipalities", "municipality_id"),
+    (OMIZoneSubdivision, "omi_zones", "omi_zone_id"),
+):
+    for _statement in subdivision_sync_ddl(_parent, _model.__tablename__, _key):
+        event.listen(_model.__table__, "after_create", DDL(_statement))
@@ -35,6 +35,11 @@ class RealEstateListing(Base, TimestampMixin):
     days_on_market = Column(Integer, default=0)
     views = Column(Integer, default=0)
     
+    __table_args__ = (
+        # Market pulse: a municipality's active (or delisted) listings on one platform
+        Index('ix_real_estate_listings_municipality_platform_active', 'municipality_id', 'source_platform', 'is_active'),
+    )
+    
     # Relationships
     municipality = relationship("Municipality")
     omi_zone = relationship("OMIZone")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, Date, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, Date, Enum, Index
 from sqlalchemy.orm import relationship
 from .base import Base, TimestampMixin
 import enum
@@ -44,6 +44,11 @@ class PropertyPrice(Base, TimestampMixin):
     rental_yield = Column(Float)  # Calculated rental yield percentage
     price_change_yoy = Column(Float)  # Year-over-year change percentage
     
+    __table_args__ = (
+        # Latest prices of a zone for one property type (scoring engine)
+        Index('ix_property_prices_zone_type_period', 'omi_zone_id', 'property_type', 'year', 'semester'),
+    )
+    
     # Relationships
     omi_zone = relationship("OMIZone", back_populates="property_prices")
     
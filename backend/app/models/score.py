@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float, Date, JSON
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Float, Date, DateTime, JSON, Index, Enum, text
 from sqlalchemy.orm import relationship
 from .base import Base, TimestampMixin
+import enum
 
 class InvestmentScore(Base, TimestampMixin):
     """Calculated investment scores (cached)"""
@@ -35,6 +36,23 @@ class InvestmentScore(Base, TimestampMixin):
     
     # Supporting data
     score_metadata = Column(JSON)
+
+    __table_args__ = (
+        # Latest municipality-level score lookups (DISTINCT ON municipality_id)
+        Index(
+            'ix_investment_scores_municipality_latest',
+            'municipality_id', text('calculation_date DESC'),
+            postgresql_where=text('omi_zone_id IS NULL'),
+        ),
+        # Latest zone-level score lookups (DISTINCT ON omi_zone_id)
+        Index(
+            'ix_investment_scores_zone_latest',
+            'omi_zone_id', text('calculation_date DESC'),
+            postgresql_where=text('omi_zone_id IS NOT NULL'),
+        ),
+        # Score upsert: existing record for the same location and date
+        Index('ix_investment_scores_location_date', 'municipality_id', 'omi_zone_id', 'calculation_date'),
+    )
     
     # Relationships
     municipality = relationship("Municipality", back_populates="investment_scores")
@@ -43,3 +61,48 @@ class InvestmentScore(Base, TimestampMixin):
     def __repr__(self):
         zone_id = self.omi_zone_id or self.municipality_id
         return f"<InvestmentScore {zone_id}: {self.overall_score:.1f}>"
+
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class ScoreJob(Base, TimestampMixin):
+    """Queued score calculation (POST /scores/jobs)"""
+    __tablename__ = "score_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.PENDING)
+
+    # Parameters
+    municipality_id = Column(Integer, ForeignKey("municipalities.id"))
+    omi_zone_id = Column(Integer, ForeignKey("omi_zones.id"))
+    custom_weights = Column(JSON)
+    dedup_key = Column(String(64), nullable=False)  # sha256 of the normalized parameters
+
+    # Outcome
+    score_id = Column(Integer, ForeignKey("investment_scores.id"))
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        # At most one queued/running job per parameter set (deduplication)
+        Index(
+            'ux_score_jobs_active_dedup_key',
+            'dedup_key',
+            unique=True,
+            postgresql_where=text("status IN ('PENDING', 'RUNNING')"),
+        ),
+        Index('ix_score_jobs_status_created', 'status', 'created_at'),
+    )
+
+    score = relationship("InvestmentScore")
+
+    def __repr__(self):
+        return f"<ScoreJob {self.id}: {self.status.value if self.status else None}>"
@@ -0,0 +1,318 @@
+"""
+Export Service - Streaming bulk exports of scores, prices and risks.
+
+Each export is a SQL query plus a typed column list. Rows are read through a
+server-side cursor (`yield_per`) in chunks of EXPORT_CHUNK_SIZE and encoded
+chunk by chunk, so memory stays flat regardless of export size.
+
+Supported formats:
+- ndjson: one JSON object per line
+- csv: header row plus one line per record
+- parquet: one row group per chunk (requires the optional `pyarrow` package)
+"""
+
+import csv
+import enum
+import importlib.util
+import io
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import case, func, literal, select
+from sqlalchemy.orm import Session
+
+from app.core.constants import EXPORT_CHUNK_SIZE
+from app.core.serialization import dumps
+from app.models.geography import Municipality, OMIZone, Province, Region
+from app.models.property import PropertyPrice, PropertyType, TransactionType
+from app.models.risk import SeismicRisk, FloodRisk, LandslideRisk
+from app.models.score import InvestmentScore
+
+# pyarrow is imported by the Parquet writer itself: it is only needed for that format
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    """An exported column: output name, SQL expression and logical type."""
+    name: str
+    expression: Any
+    kind: str  # "int", "float", "str" or "date"
+
+
+def _parquet_type(kind: str):
+    import pyarrow as pa
+    return {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "date": pa.date32()}[kind]
+
+
+def _plain(value: Any) -> Any:
+    """Enum members become their value; everything else is left as-is."""
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+# =============================================================================
+# EXPORT DEFINITIONS
+# =============================================================================
+
+_COMPONENT_COLUMNS = [
+    ("price_trend", InvestmentScore.price_trend_score),
+    ("affordability", InvestmentScore.affordability_score),
+    ("rental_yield", InvestmentScore.rental_yield_score),
+    ("demographics", InvestmentScore.demographics_score),
+    ("crime", InvestmentScore.crime_score),
+    ("connectivity", InvestmentScore.connectivity_score),
+    ("digital_connectivity", InvestmentScore.digital_connectivity_score),
+    ("services", InvestmentScore.services_score),
+    ("air_quality", InvestmentScore.air_quality_score),
+    ("seismic", InvestmentScore.seismic_risk_score),
+    ("flood", InvestmentScore.flood_risk_score),
+    ("landslide", InvestmentScore.landslide_risk_score),
+    ("climate", InvestmentScore.climate_risk_score),
+]
+
+
+def score_export(level: str = "all"):
+    """
+    Latest score per municipality and per OMI zone, with all components.
+
+    `level` is "municipality", "zone" or "all".
+    """
+    municipality_id = func.coalesce(InvestmentScore.municipality_id, OMIZone.municipality_id)
+    columns = [
+        ExportColumn("level", case((InvestmentScore.omi_zone_id.is_(None), literal("municipality")), else_=literal("zone")), "str"),
+        ExportColumn("municipality_id", municipality_id, "int"),
+        ExportColumn("municipality_code", Municipality.code, "str"),
+        ExportColumn("municipality_name", Municipality.name, "str"),
+        ExportColumn("omi_zone_id", InvestmentScore.omi_zone_id, "int"),
+        ExportColumn("omi_zone_code", OMIZone.zone_code, "str"),
+        ExportColumn("calculation_date", InvestmentScore.calculation_date, "date"),
+        ExportColumn("overall_score", InvestmentScore.overall_score, "float"),
+        ExportColumn("confidence", InvestmentScore.confidence_score, "float"),
+    ] + [ExportColumn(f"{name}_score", col, "float") for name, col in _COMPONENT_COLUMNS]
+
+    stmt = (
+        select(*[c.expression.label(c.name) for c in columns])
+        .select_from(InvestmentScore)
+        .outerjoin(OMIZone, OMIZone.id == InvestmentScore.omi_zone_id)
+        .outerjoin(Municipality, Municipality.id == municipality_id)
+        .distinct(InvestmentScore.municipality_id, InvestmentScore.omi_zone_id)
+        .order_by(
+            InvestmentScore.municipality_id,
+            InvestmentScore.omi_zone_id,
+            InvestmentScore.calculation_date.desc(),
+        )
+    )
+    if level == "municipality":
+        stmt = stmt.where(InvestmentScore.omi_zone_id.is_(None))
+    elif level == "zone":
+        stmt = stmt.where(InvestmentScore.omi_zone_id.isnot(None))
+    return columns, stmt
+
+
+def price_export(
+    year_from: Optional[int] = None,
+    property_type: Optional[PropertyType] = None,
+    transaction_type: Optional[TransactionType] = None,
+):
+    """OMI price records per zone and semester."""
+    columns = [
+        ExportColumn("municipality_id", Municipality.id, "int"),
+        ExportColumn("municipality_code", Municipality.code, "str"),
+        ExportColumn("municipality_name", Municipality.name, "str"),
+        ExportColumn("omi_zone_id", OMIZone.id, "int"),
+        ExportColumn("omi_zone_code", OMIZone.zone_code, "str"),
+        ExportColumn("year", PropertyPrice.year, "int"),
+        ExportColumn("semester", PropertyPrice.semester, "int"),
+        ExportColumn("property_type", PropertyPrice.property_type, "str"),
+        ExportColumn("transaction_type", PropertyPrice.transaction_type, "str"),
+        ExportColumn("property_state", PropertyPrice.property_state, "str"),
+        ExportColumn("min_price", PropertyPrice.min_price, "float"),
+        ExportColumn("max_price", PropertyPrice.max_price, "float"),
+        ExportColumn("avg_price", PropertyPrice.avg_price, "float"),
+        ExportColumn("min_rent", PropertyPrice.min_rent, "float"),
+        ExportColumn("max_rent", PropertyPrice.max_rent, "float"),
+        ExportColumn("avg_rent", PropertyPrice.avg_rent, "float"),
+        ExportColumn("rental_yield", PropertyPrice.rental_yield, "float"),
+        ExportColumn("price_change_yoy", PropertyPrice.price_change_yoy, "float"),
+    ]
+    stmt = (
+        select(*[c.expression.label(c.name) for c in columns])
+        .select_from(PropertyPrice)
+        .join(OMIZone, OMIZone.id == PropertyPrice.omi_zone_id)
+        .join(Municipality, Municipality.id == OMIZone.municipality_id)
+        .order_by(PropertyPrice.id)
+    )
+    if year_from is not None:
+        stmt = stmt.where(PropertyPrice.year >= year_from)
+    if property_type is not None:
+        stmt = stmt.where(PropertyPrice.property_type == property_type)
+    if transaction_type is not None:
+        stmt = stmt.where(PropertyPrice.transaction_type == transaction_type)
+    return columns, stmt
+
+
+def risk_export():
+    """Seismic, flood and landslide indicators per municipality."""
+    columns = [
+        ExportColumn("municipality_id", Municipality.id, "int"),
+        ExportColumn("municipality_code", Municipality.code, "str"),
+        ExportColumn("municipality_name", Municipality.name, "str"),
+        ExportColumn("province_name", Province.name, "str"),
+        ExportColumn("region_name", Region.name, "str"),
+        ExportColumn("seismic_zone", SeismicRisk.seismic_zone, "int"),
+        ExportColumn("seismic_pga", SeismicRisk.peak_ground_acceleration, "float"),
+        ExportColumn("seismic_hazard_level", SeismicRisk.hazard_level, "str"),
+        ExportColumn("seismic_risk_score", SeismicRisk.risk_score, "float"),
+        ExportColumn("flood_risk_level", FloodRisk.risk_level, "str"),
+        ExportColumn("flood_risk_score", FloodRisk.risk_score, "float"),
+        ExportColumn("flood_high_hazard_area_pct", FloodRisk.high_hazard_area_pct, "float"),
+        ExportColumn("flood_population_exposed", FloodRisk.population_exposed, "int"),
+        ExportColumn("landslide_risk_level", LandslideRisk.risk_level, "str"),
+        ExportColumn("landslide_risk_score", LandslideRisk.risk_score, "float"),
+        ExportColumn("landslide_high_hazard_area_pct", LandslideRisk.high_hazard_area_pct, "float"),
+        ExportColumn("landslide_population_exposed", LandslideRisk.population_exposed, "int"),
+    ]
+    stmt = (
+        select(*[c.expression.label(c.name) for c in columns])
+        .select_from(Municipality)
+        .outerjoin(Province, Province.id == Municipality.province_id)
+        .outerjoin(Region, Region.id == Province.region_id)
+        .outerjoin(SeismicRisk, SeismicRisk.municipality_id == Municipality.id)
+        .outerjoin(FloodRisk, FloodRisk.municipality_id == Municipality.id)
+        .outerjoin(LandslideRisk, LandslideRisk.municipality_id == Municipality.id)
+        .order_by(Municipality.id)
+    )
+    return columns, stmt
+
+
+# =============================================================================
+# STREAMING
+# =============================================================================
+
+def iter_chunks(db: Session, stmt, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Sequence[Any]]:
+    """Yield lists of rows fetched through a server-side cursor."""
+    result = db.execute(stmt.execution_options(yield_per=chunk_size))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def _encode_ndjson(columns: List[ExportColumn], chunks) -> Iterator[bytes]:
+    names = [c.name for c in columns]
+    for rows in chunks:
+        yield b"".join(
+            dumps({name: _plain(value) for name, value in zip(names, row)}) + b"\n"
+            for row in rows
+        )
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return _plain(value)
+
+
+def _encode_csv(columns: List[ExportColumn], chunks) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([c.name for c in columns])
+    for rows in chunks:
+        for row in rows:
+            writer.writerow([_csv_cell(value) for value in row])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the generator."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _encode_parquet(columns: List[ExportColumn], chunks) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(c.name, _parquet_type(c.kind)) for c in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in chunks:
+            arrays = [
+                pa.array([_plain(row[i]) for row in rows], type=schema.field(i).type)
+                for i in range(len(columns))
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+_ENCODERS: Dict[str, Callable] = {
+    "ndjson": _encode_ndjson,
+    "csv": _encode_csv,
+    "parquet": _encode_parquet,
+}
+
+
+def stream_export(
+    session_factory: Callable[[], Session],
+    columns: List[ExportColumn],
+    stmt,
+    fmt: str,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Generator producing the encoded export.
+
+    Opens its own session (the request-scoped one may be closed before the
+    body finishes streaming) and closes it when the stream ends or the client
+    disconnects.
+    """
+    db = session_factory()
+    try:
+        yield from _ENCODERS[fmt](columns, iter_chunks(db, stmt, chunk_size))
+    except Exception as e:
+        logger.error(f"Export stream failed ({fmt}): {e}")
+        raise
+    finally:
+        db.close()
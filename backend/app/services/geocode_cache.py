@@ -0,0 +1,215 @@
+"""
+Geocode Cache - Persistent cache in front of Nominatim.
+
+Every geocoder in the codebase (GeocodingService, GeocoderService and the
+centroid backfill script) goes through `cached_lookup` (or, in batch mode,
+`lookup_many` / `store_many`):
+
+1. an in-process copy (GEOCODE_MEMORY_TTL_SECONDS) answers repeats without
+   leaving the process
+2. the `geocode_cache` table answers repeats across processes and restarts
+3. only then is Nominatim called, and its answer stored
+
+Keys are normalized so trivially different spellings share an entry:
+every geocoder builds its forward query with `forward_query` (the address
+qualified with its country, once) and keys it on the folded query text
+("Duomo, Milano" and "duomo  milano, Italy" are one key); reverse lookups
+round coordinates to 5 decimals (~1 m). "No result" answers are cached too (negative entries, with
+their own shorter expiry); errors and timeouts are never cached.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.cache import SimpleTTLCache
+from app.core.config import settings
+from app.core.constants import GEOCODE_CACHE_MAX_ENTRIES
+from app.core.database import SessionLocal
+from app.models.geocoding import GeocodeCacheEntry
+from app.services.search_index import fold
+
+logger = logging.getLogger(__name__)
+
+FORWARD = "forward"
+REVERSE = "reverse"
+
+MAX_KEY_LENGTH = 500
+
+# Country appended to forward queries that do not name one
+DEFAULT_COUNTRY = "Italy"
+
+# Keys per IN (...) query in lookup_many()
+LOOKUP_CHUNK_SIZE = 1000
+
+# Returned by lookup() when nothing usable is cached (None is a cached "no result")
+MISS = object()
+
+memory_cache = SimpleTTLCache("geocode", max_entries=GEOCODE_CACHE_MAX_ENTRIES)
+
+
+def forward_query(address: str, country: Optional[str] = DEFAULT_COUNTRY) -> str:
+    """
+    Provider query for `address`: the address followed by its country,
+    unless it already ends with it ("Duomo, Milano" and "Duomo, Milano,
+    Italy" are the same query).
+    """
+    address = address.strip()
+    folded, folded_country = fold(address), fold(country or "")
+    if not folded_country or folded == folded_country or folded.endswith(f" {folded_country}"):
+        return address
+    return f"{address}, {country}"
+
+
+def forward_key(query: str) -> str:
+    """Cache key of a forward (text -> coordinates) lookup."""
+    return fold(query)[:MAX_KEY_LENGTH]
+
+
+def reverse_key(latitude: float, longitude: float) -> str:
+    """Cache key of a reverse (coordinates -> address) lookup."""
+    return f"{latitude:.5f},{longitude:.5f}"
+
+
+def _memory_key(kind: str, key: str) -> str:
+    return f"geocode:{kind}:{key}"
+
+
+def _session(bind=None) -> Session:
+    return Session(bind=bind) if bind is not None else SessionLocal()
+
+
+def lookup(kind: str, key: str, bind=None) -> Any:
+    """Cached result (None for a cached "no result"), or MISS."""
+    held = memory_cache.get(_memory_key(kind, key))
+    if held is not None:
+        return held["result"]
+    if not settings.GEOCODE_CACHE_ENABLED:
+        return MISS
+
+    try:
+        with _session(bind) as db:
+            entry = (
+                db.query(GeocodeCacheEntry.result, GeocodeCacheEntry.expires_at)
+                .filter(
+                    GeocodeCacheEntry.kind == kind,
+                    GeocodeCacheEntry.query_key == key,
+                    GeocodeCacheEntry.expires_at > datetime.utcnow(),
+                )
+                .first()
+            )
+    except SQLAlchemyError as e:
+        logger.warning(f"Geocode cache read failed for {kind} '{key}': {e}")
+        return MISS
+    if entry is None:
+        return MISS
+
+    _remember(kind, key, entry.result, entry.expires_at)
+    return entry.result
+
+
+def lookup_many(kind: str, keys: Iterable[str], bind=None) -> Dict[str, Any]:
+    """Cached results of several keys at once: {key: result} for the hits only."""
+    found = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        held = memory_cache.get(_memory_key(kind, key))
+        if held is not None:
+            found[key] = held["result"]
+        else:
+            missing.append(key)
+    if not missing or not settings.GEOCODE_CACHE_ENABLED:
+        return found
+
+    try:
+        with _session(bind) as db:
+            for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+                rows = db.query(
+                    GeocodeCacheEntry.query_key, GeocodeCacheEntry.result, GeocodeCacheEntry.expires_at
+                ).filter(
+                    GeocodeCacheEntry.kind == kind,
+                    GeocodeCacheEntry.query_key.in_(missing[start:start + LOOKUP_CHUNK_SIZE]),
+                    GeocodeCacheEntry.expires_at > datetime.utcnow(),
+                )
+                for row in rows:
+                    _remember(kind, row.query_key, row.result, row.expires_at)
+                    found[row.query_key] = row.result
+    except SQLAlchemyError as e:
+        logger.warning(f"Geocode cache bulk read failed ({kind}, {len(missing)} keys): {e}")
+    return found
+
+
+def store(kind: str, key: str, result: Optional[dict], bind=None) -> None:
+    """Persist a geocoder answer (None = no result) with the configured expiry."""
+    store_many(kind, {key: result}, bind)
+
+
+def store_many(kind: str, results: Dict[str, Optional[dict]], bind=None) -> None:
+    """Persist several answers ({key: result}) in one statement."""
+    if not results:
+        return
+    now = datetime.utcnow()
+    rows = []
+    for key, result in results.items():
+        ttl = settings.GEOCODE_CACHE_TTL_SECONDS if result is not None else settings.GEOCODE_NEGATIVE_TTL_SECONDS
+        expires_at = now + timedelta(seconds=ttl)
+        _remember(kind, key, result, expires_at)
+        rows.append(
+            {"kind": kind, "query_key": key, "result": result, "expires_at": expires_at, "created_at": now, "updated_at": now}
+        )
+    if not settings.GEOCODE_CACHE_ENABLED:
+        return
+
+    statement = insert(GeocodeCacheEntry).values(rows)
+    statement = statement.on_conflict_do_update(
+        constraint="uq_geocode_cache_kind_query_key",
+        set_={
+            "result": statement.excluded.result,
+            "expires_at": statement.excluded.expires_at,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+    try:
+        with _session(bind) as db:
+            db.execute(statement)
+            db.commit()
+    except SQLAlchemyError as e:
+        logger.warning(f"Geocode cache write failed ({kind}, {len(rows)} keys): {e}")
+
+
+def cached_lookup(kind: str, key: str, fetch: Callable[[], Optional[dict]], bind=None) -> Optional[dict]:
+    """
+    Cached answer for `key`, calling `fetch()` only on a miss.
+
+    `fetch` returns the result or None when the geocoder found nothing (both
+    cached) and raises on failure (nothing cached, the error propagates).
+    """
+    cached = lookup(kind, key, bind)
+    if cached is not MISS:
+        return cached
+    result = fetch()
+    store(kind, key, result, bind)
+    return result
+
+
+def purge_expired(db: Session) -> int:
+    """Delete expired entries; returns how many."""
+    deleted = (
+        db.query(GeocodeCacheEntry)
+        .filter(GeocodeCacheEntry.expires_at <= datetime.utcnow())
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def _remember(kind: str, key: str, result: Optional[dict], expires_at: datetime) -> None:
+    remaining = (expires_at - datetime.utcnow()).total_seconds()
+    ttl = min(settings.GEOCODE_MEMORY_TTL_SECONDS, remaining)
+    if ttl > 0:
+        # Wrapped so a cached "no result" is distinguishable from a memory miss
+        memory_cache.set(_memory_key(kind, key), {"result": result}, ttl)
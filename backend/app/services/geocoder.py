@@ -1,7 +1,11 @@
+import logging
 from typing import Tuple, Optional
-import time
-import requests
+from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.services import geocode_cache
+from app.services.geocoding_providers import geocoder_provider
+
+logger = logging.getLogger(__name__)
 
 class GeocoderService:
     """
@@ -12,43 +16,49 @@ class GeocoderService:
     def __init__(self, api_key: Optional[str] = None):
         # We can use Nominatim (free) or Google Maps / Mapbox (paid)
         self.api_key = api_key or settings.GEOCODING_API_KEY
-        self.base_url = "https://nominatim.openstreetmap.org/search"
-        self.user_agent = "ItalianPropertyIntelligencePlatform/1.0"
+        # Configured provider (GEOCODER_PROVIDER), sharing its process-wide
+        # (optionally host-wide) rate limit
+        self.provider = geocoder_provider
 
-    def geocode(self, address: str) -> Optional[Tuple[float, float]]:
+    def geocode(self, address: str, db: Optional[Session] = None) -> Optional[Tuple[float, float]]:
         """
         Geocodes an address. Returns (latitude, longitude) or None.
+        Answers are shared with GeocodingService through the geocode cache
+        (same query, so same key).
         """
-        params = {
-            "q": address,
-            "format": "json",
-            "limit": 1
-        }
-        headers = {
-            "User-Agent": self.user_agent
-        }
-        
+        query = geocode_cache.forward_query(address)
         try:
-            response = requests.get(self.base_url, params=params, headers=headers)
-            response.raise_for_status()
-            results = response.json()
-            
-            if results:
-                lat = float(results[0]["lat"])
-                lon = float(results[0]["lon"])
-                return lat, lon
-            
-            return None
+            result = geocode_cache.cached_lookup(
+                geocode_cache.FORWARD,
+                geocode_cache.forward_key(query),
+                lambda: self._search(query),
+                bind=db.get_bind() if db is not None else None,
+            )
         except Exception as e:
-            print(f"Geocoding error for {address}: {e}")
+            logger.error(f"Geocoding failed for '{address}': {e}")
             return None
-        finally:
-            # Respect Nominatim's usage policy (max 1 request per second)
-            time.sleep(1)
+        if result:
+            return result["latitude"], result["longitude"]
+        return None
 
-    def reverse_geocode(self, lat: float, lon: float) -> Optional[str]:
+    def _search(self, address: str) -> Optional[dict]:
+        return self.provider.search_sync(address)
+
+    def reverse_geocode(self, lat: float, lon: float, db: Optional[Session] = None) -> Optional[str]:
         """
         Reverse geocodes coordinates to an address.
         """
-        # Implementation for reverse geocoding
-        pass
+        try:
+            result = geocode_cache.cached_lookup(
+                geocode_cache.REVERSE,
+                geocode_cache.reverse_key(lat, lon),
+                lambda: self._reverse(lat, lon),
+                bind=db.get_bind() if db is not None else None,
+            )
+        except Exception as e:
+            logger.error(f"Reverse geocoding failed for ({lat}, {lon}): {e}")
+            return None
+        return result["display_name"] if result else None
+
+    def _reverse(self, lat: float, lon: float) -> Optional[dict]:
+        return self.provider.reverse_sync(lat, lon)
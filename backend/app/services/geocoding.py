@@ -1,118 +1,156 @@
+import asyncio
 import logging
-import requests
-import time
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterable, List
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
 from geoalchemy2.shape import from_shape
 from shapely.geometry import Point
-from app.models.geography import Municipality, OMIZone
+from app.models.geography import Municipality, MunicipalitySubdivision, OMIZone, OMIZoneSubdivision
 from app.core.config import settings
+from app.services import geocode_cache
+from app.services.geocoding_providers import GeocoderUnavailable, GeocodingProvider, geocoder_provider
+from app.services.search_index import get_search_index
+from app.services.spatial_index import get_spatial_index
 
 logger = logging.getLogger(__name__)
 
+# Addresses geocoded (and cached) per round in geocode_batch()
+BATCH_CHUNK_SIZE = 500
+
 class GeocodingService:
     """
-    Geocoding service using Nominatim (OpenStreetMap) API
+    Geocoding service using the configured provider (Nominatim or Photon)
     Handles address to coordinates conversion and spatial resolution
     """
     
-    def __init__(self):
-        self.base_url = settings.NOMINATIM_BASE_URL
-        self.user_agent = settings.NOMINATIM_USER_AGENT
-        self.rate_limit_delay = 1.0  # Nominatim requires 1 request per second
+    def __init__(self, provider: GeocodingProvider = geocoder_provider):
+        # Shared provider: one rate limit for every caller, see app.services.geocoding_providers
+        self.provider = provider
         
     def geocode_address(
         self,
         address: str,
-        country: str = "Italy"
+        country: str = "Italy",
+        db: Optional[Session] = None
     ) -> Optional[Dict[str, Any]]:
         """
-        Convert address to coordinates
+        Convert address to coordinates.
+        Answers are cached (including "not found"), see app.services.geocode_cache;
+        `db` selects the database holding the cache. Returns None as well when
+        the provider cannot answer within GEOCODE_REQUEST_BUDGET_SECONDS.
         """
+        query = geocode_cache.forward_query(address, country)
         try:
-            # Rate limiting
-            time.sleep(self.rate_limit_delay)
-            
-            params = {
-                'q': f"{address}, {country}",
-                'format': 'json',
-                'addressdetails': 1,
-                'limit': 1,
-            }
-            
-            headers = {
-                'User-Agent': self.user_agent
-            }
-            
-            response = requests.get(
-                f"{self.base_url}/search",
-                params=params,
-                headers=headers,
-                timeout=10
+            return geocode_cache.cached_lookup(
+                geocode_cache.FORWARD,
+                geocode_cache.forward_key(query),
+                lambda: self._search(query),
+                bind=db.get_bind() if db is not None else None,
             )
-            response.raise_for_status()
-            
-            results = response.json()
-            
-            if not results:
-                logger.warning(f"No results found for address: {address}")
-                return None
-            
-            result = results[0]
-            
-            return {
-                'latitude': float(result['lat']),
-                'longitude': float(result['lon']),
-                'display_name': result['display_name'],
-                'address_details': result.get('address', {}),
-            }
-            
+        except GeocoderUnavailable as e:
+            logger.warning(f"Geocoding skipped for '{address}': {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Geocoding failed for '{address}': {e}")
+            return None
+    
+    async def geocode_address_async(
+        self,
+        address: str,
+        country: str = "Italy",
+        db: Optional[Session] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Non-blocking geocode_address(): waiting for the rate limit does not hold
+        a thread, and identical concurrent queries share one provider call.
+        """
+        query = geocode_cache.forward_query(address, country)
+        key = geocode_cache.forward_key(query)
+        bind = db.get_bind() if db is not None else None
+        cached = await run_in_threadpool(geocode_cache.lookup, geocode_cache.FORWARD, key, bind)
+        if cached is not geocode_cache.MISS:
+            return cached
+        try:
+            result = await self.provider.search(query)
+        except GeocoderUnavailable as e:
+            logger.warning(f"Geocoding skipped for '{address}': {e}")
+            return None
         except Exception as e:
             logger.error(f"Geocoding failed for '{address}': {e}")
             return None
+        await run_in_threadpool(geocode_cache.store, geocode_cache.FORWARD, key, result, bind)
+        return result
+    
+    def geocode_batch(
+        self,
+        addresses: Iterable[str],
+        country: str = "Italy",
+        db: Optional[Session] = None
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Geocode many addresses: {address: result or None}.
+        Cache hits are read in bulk; misses are sent to the provider up to
+        GEOCODER_MAX_CONCURRENCY at a time (within its rate limit) and cached
+        chunk by chunk, so an interrupted run resumes where it stopped.
+        Blocking: meant for scripts and jobs, not for use inside an event loop.
+        """
+        bind = db.get_bind() if db is not None else None
+        queries = {address: geocode_cache.forward_query(address, country) for address in addresses}
+        keys = {address: geocode_cache.forward_key(query) for address, query in queries.items()}
+        results = geocode_cache.lookup_many(geocode_cache.FORWARD, keys.values(), bind)
+        
+        pending = {}
+        for address, key in keys.items():
+            if key not in results:
+                pending.setdefault(key, queries[address])
+        logger.info(f"Batch geocoding {len(keys)} addresses: {len(keys) - len(pending)} cached, {len(pending)} to fetch")
+        
+        pending_keys = list(pending)
+        for start in range(0, len(pending_keys), BATCH_CHUNK_SIZE):
+            chunk = {pending[key]: key for key in pending_keys[start:start + BATCH_CHUNK_SIZE]}
+            fetched = asyncio.run(self.provider.search_many(chunk))
+            answers = {chunk[query]: result for query, result in fetched.items()}
+            geocode_cache.store_many(geocode_cache.FORWARD, answers, bind)
+            results.update(answers)
+            logger.info(f"Batch geocoding: {min(start + BATCH_CHUNK_SIZE, len(pending_keys))}/{len(pending_keys)} fetched")
+        
+        return {address: results.get(key) for address, key in keys.items()}
+    
+    def _search(self, query: str) -> Optional[Dict[str, Any]]:
+        """Provider search; None when nothing matches, raises on failure."""
+        result = self.provider.search_sync(query, budget=settings.GEOCODE_REQUEST_BUDGET_SECONDS)
+        if result is None:
+            logger.warning(f"No results found for address: {query}")
+        return result
     
     def reverse_geocode(
         self,
         latitude: float,
-        longitude: float
+        longitude: float,
+        db: Optional[Session] = None
     ) -> Optional[Dict[str, Any]]:
         """
-        Convert coordinates to address
+        Convert coordinates to address (cached like geocode_address)
         """
         try:
-            time.sleep(self.rate_limit_delay)
-            
-            params = {
-                'lat': latitude,
-                'lon': longitude,
-                'format': 'json',
-                'addressdetails': 1,
-            }
-            
-            headers = {
-                'User-Agent': self.user_agent
-            }
-            
-            response = requests.get(
-                f"{self.base_url}/reverse",
-                params=params,
-                headers=headers,
-                timeout=10
+            return geocode_cache.cached_lookup(
+                geocode_cache.REVERSE,
+                geocode_cache.reverse_key(latitude, longitude),
+                lambda: self._reverse(latitude, longitude),
+                bind=db.get_bind() if db is not None else None,
             )
-            response.raise_for_status()
-            
-            result = response.json()
-            
-            return {
-                'display_name': result.get('display_name'),
-                'address_details': result.get('address', {}),
-            }
-            
+        except GeocoderUnavailable as e:
+            logger.warning(f"Reverse geocoding skipped for ({latitude}, {longitude}): {e}")
+            return None
         except Exception as e:
             logger.error(f"Reverse geocoding failed for ({latitude}, {longitude}): {e}")
             return None
     
+    def _reverse(self, latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+        """Provider reverse lookup; None when nothing matches, raises on failure."""
+        return self.provider.reverse_sync(latitude, longitude, budget=settings.GEOCODE_REQUEST_BUDGET_SECONDS)
+    
     def find_municipality_by_coordinates(
         self,
         db: Session,
@@ -120,15 +158,26 @@ class GeocodingService:
         longitude: float
     ) -> Optional[Municipality]:
         """
-        Find municipality containing coordinates using PostGIS
+        Find municipality containing coordinates (in-memory spatial index,
+        PostGIS on the subdivided boundaries while the index is not loaded)
         """
+        index = get_spatial_index(db)
+        if index is not None:
+            area = index.municipality_at(latitude, longitude)
+            return db.get(Municipality, area.id) if area else None
         try:
-            # Create a point and use PostGIS spatial query
+            # Create a point and use PostGIS spatial query. Pieces are small, so the
+            # test is cheap; ST_Intersects because a point on the seam between two
+            # pieces is on the boundary of both (not ST_Contains'ed by either)
             point = f"SRID=4326;POINT({longitude} {latitude})"
             
-            municipality = db.query(Municipality).filter(
-                func.ST_Contains(Municipality.geometry, point)
-            ).first()
+            municipality = (
+                db.query(Municipality)
+                .join(MunicipalitySubdivision, MunicipalitySubdivision.municipality_id == Municipality.id)
+                .filter(func.ST_Intersects(MunicipalitySubdivision.geometry, point))
+                .order_by(MunicipalitySubdivision.parent_area, MunicipalitySubdivision.municipality_id)
+                .first()
+            )
             
             if municipality:
                 logger.info(f"Found municipality: {municipality.name}")
@@ -145,14 +194,23 @@ class GeocodingService:
         longitude: float
     ) -> Optional[OMIZone]:
         """
-        Find OMI zone containing coordinates using PostGIS
+        Find OMI zone containing coordinates (in-memory spatial index,
+        PostGIS on the subdivided boundaries while the index is not loaded)
         """
+        index = get_spatial_index(db)
+        if index is not None:
+            area = index.zone_at(latitude, longitude)
+            return db.get(OMIZone, area.id) if area else None
         try:
             point = f"SRID=4326;POINT({longitude} {latitude})"
             
-            omi_zone = db.query(OMIZone).filter(
-                func.ST_Contains(OMIZone.geometry, point)
-            ).first()
+            omi_zone = (
+                db.query(OMIZone)
+                .join(OMIZoneSubdivision, OMIZoneSubdivision.omi_zone_id == OMIZone.id)
+                .filter(func.ST_Intersects(OMIZoneSubdivision.geometry, point))
+                .order_by(OMIZoneSubdivision.parent_area, OMIZoneSubdivision.omi_zone_id)
+                .first()
+            )
             
             if omi_zone:
                 logger.debug(f"Found OMI zone: {omi_zone.zone_code}")
@@ -168,17 +226,62 @@ class GeocodingService:
         name: str
     ) -> Optional[Municipality]:
         """
-        Find municipality by name (exact or ilike)
+        Find municipality by name through the in-memory search index
+        (accent/case-insensitive, "Comune di" prefix ignored, prefix matches allowed)
         """
-        # Try exact match first
-        muni = db.query(Municipality).filter(Municipality.name.ilike(name)).first()
-        if muni:
-            return muni
-        
-        # Try cleaning the name (Italians often use 'Milano' for 'Comune di Milano')
-        clean_name = name.replace("Comune di ", "").replace("Municipio di ", "").strip()
-        muni = db.query(Municipality).filter(Municipality.name.ilike(f"%{clean_name}%")).first()
-        return muni
+        match = get_search_index(db).best_municipality(name)
+        return db.get(Municipality, match.id) if match else None
+
+    def _gazetteer_municipality(self, db: Session, query: str) -> Optional[Municipality]:
+        candidates = [query] + [part for part in reversed(query.split(",")[1:]) if part.strip()]
+        for candidate in candidates:
+            municipality = self.find_municipality_by_name(db, candidate)
+            if municipality:
+                return municipality
+        return None
+
+    def _resolve_omi_zone(
+        self,
+        db: Session,
+        municipality_id: int,
+        latitude: Optional[float],
+        longitude: Optional[float]
+    ) -> Optional[Dict[str, Any]]:
+        """OMI zone containing the point, else the municipality's first residential zone."""
+        if latitude is not None and longitude is not None:
+            index = get_spatial_index(db)
+            if index is not None:
+                area = index.zone_at(latitude, longitude)
+                if area:
+                    # Answered in memory, no database round-trip
+                    return {'id': area.id, 'zone_code': area.code, 'zone_name': area.name}
+            else:
+                omi_zone = self.find_omi_zone_by_coordinates(db, latitude, longitude)
+                if omi_zone:
+                    return self._zone_dict(omi_zone)
+        # Fallback to first residential zone in municipality if no spatial match
+        omi_zone = db.query(OMIZone).filter(
+            OMIZone.municipality_id == municipality_id,
+            OMIZone.zone_type == "Residenziale"
+        ).first()
+        return self._zone_dict(omi_zone) if omi_zone else None
+
+    def _municipality_at(self, db: Session, latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+        """Municipality containing the point as a result dict (spatial index first)."""
+        index = get_spatial_index(db)
+        if index is not None:
+            area = index.municipality_at(latitude, longitude)
+            return {'id': area.id, 'name': area.name, 'code': area.code} if area else None
+        municipality = self.find_municipality_by_coordinates(db, latitude, longitude)
+        return self._municipality_dict(municipality) if municipality else None
+
+    @staticmethod
+    def _municipality_dict(municipality: Municipality) -> Dict[str, Any]:
+        return {'id': municipality.id, 'name': municipality.name, 'code': municipality.code}
+
+    @staticmethod
+    def _zone_dict(omi_zone: OMIZone) -> Dict[str, Any]:
+        return {'id': omi_zone.id, 'zone_code': omi_zone.zone_code, 'zone_name': omi_zone.zone_name}
 
     def resolve_search_query(
         self,
@@ -189,7 +292,29 @@ class GeocodingService:
         Main entry point for resolving a search query.
         Now includes robust fallbacks for missing geometries.
         """
-        result = {
+        local = self._resolve_locally(db, query)
+        if local:
+            return local
+        return self._resolve_geocoded(db, query, self.geocode_address(query, db=db))
+
+    async def resolve_search_query_async(
+        self,
+        db: Session,
+        query: str
+    ) -> Dict[str, Any]:
+        """
+        resolve_search_query() for async endpoints: database work runs in the
+        threadpool, the geocoder call (if any) on the event loop.
+        """
+        local = await run_in_threadpool(self._resolve_locally, db, query)
+        if local:
+            return local
+        geocoded = await self.geocode_address_async(query, db=db)
+        return await run_in_threadpool(self._resolve_geocoded, db, query, geocoded)
+
+    @staticmethod
+    def _empty_result(query: str) -> Dict[str, Any]:
+        return {
             'query': query,
             'found': False,
             'geocoded': None,
@@ -197,9 +322,37 @@ class GeocodingService:
             'omi_zone': None,
             'coordinates': None,
         }
-        
-        # 1. Try Geocoding via Nominatim
-        geocoded = self.geocode_address(query)
+
+    def _resolve_locally(self, db: Session, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Plain municipality name or postal code: answered from the search index,
+        with no geocoder round-trip. None when the query is anything else.
+        """
+        direct = get_search_index(db).resolve(query)
+        if direct:
+            result = self._empty_result(query)
+            result['found'] = True
+            result['municipality'] = {
+                'id': direct.municipality_id,
+                'name': direct.municipality_name,
+                'code': direct.code
+            }
+            if direct.latitude is not None:
+                result['coordinates'] = {'latitude': direct.latitude, 'longitude': direct.longitude}
+            result['omi_zone'] = self._resolve_omi_zone(
+                db, direct.municipality_id, direct.latitude, direct.longitude
+            )
+            return result
+        return None
+
+    def _resolve_geocoded(
+        self,
+        db: Session,
+        query: str,
+        geocoded: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Resolve municipality and OMI zone from a geocoder answer (None if unavailable)."""
+        result = self._empty_result(query)
         
         if geocoded:
             lat, lon = geocoded['latitude'], geocoded['longitude']
@@ -207,7 +360,7 @@ class GeocodingService:
             result['coordinates'] = {'latitude': lat, 'longitude': lon}
             
             # 2a. Spatial Resolution (Preferred)
-            municipality = self.find_municipality_by_coordinates(db, lat, lon)
+            municipality = self._municipality_at(db, lat, lon)
             
             if not municipality:
                 # 2b. Geocoding Result Name Fallback
@@ -216,43 +369,35 @@ class GeocodingService:
                 city_name = nom_address.get('city') or nom_address.get('town') or nom_address.get('village')
                 if city_name:
                     logger.info(f"Spatial lookup failed, trying Nominatim name fallback: {city_name}")
-                    municipality = self.find_municipality_by_name(db, city_name)
+                    named = self.find_municipality_by_name(db, city_name)
+                    municipality = self._municipality_dict(named) if named else None
             
             if municipality:
                 result['found'] = True
-                result['municipality'] = {
-                    'id': municipality.id,
-                    'name': municipality.name,
-                    'code': municipality.code
-                }
+                result['municipality'] = municipality
                 
                 # 3. Resolve OMI Zone
-                omi_zone = self.find_omi_zone_by_coordinates(db, lat, lon)
-                if not omi_zone:
-                    # Fallback to first residential zone in municipality if no spatial match
-                    from app.models.geography import OMIZone
-                    omi_zone = db.query(OMIZone).filter(
-                        OMIZone.municipality_id == municipality.id,
-                        OMIZone.zone_type == "Residenziale"
-                    ).first()
-                
-                if omi_zone:
-                    result['omi_zone'] = {
-                        'id': omi_zone.id,
-                        'zone_code': omi_zone.zone_code,
-                        'zone_name': omi_zone.zone_name
-                    }
+                result['omi_zone'] = self._resolve_omi_zone(db, municipality['id'], lat, lon)
         
-        # 4. Final Fallback: Direct Query Match (if geocoding failed or didn't find muni)
+        # 4. Final Fallback: local gazetteer (geocoding failed, was over budget, or
+        # didn't find the municipality): the whole query, then its comma-separated
+        # parts from the last ("Via Roma 12, Milano" -> "Milano")
         if not result['municipality']:
-            municipality = self.find_municipality_by_name(db, query)
+            municipality = self._gazetteer_municipality(db, query)
             if municipality:
                 result['found'] = True
-                result['municipality'] = {
-                    'id': municipality.id,
-                    'name': municipality.name,
-                    'code': municipality.code
-                }
+                result['municipality'] = self._municipality_dict(municipality)
                 # No coordinates or OMI zone in this fallback unless we geocode it specifically
         
         return result
+
+
+_service: Optional[GeocodingService] = None
+
+
+def get_geocoding_service() -> GeocodingService:
+    """Process-wide geocoding service for the API, built on first use rather than at import."""
+    global _service
+    if _service is None:
+        _service = GeocodingService()
+    return _service
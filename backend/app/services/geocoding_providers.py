@@ -0,0 +1,444 @@
+"""
+Geocoding Providers - One interface in front of every geocoding backend.
+
+`GeocodingProvider` implements everything that is provider-independent;
+subclasses only describe their endpoints and answer format:
+
+- `NominatimProvider`: the public nominatim.openstreetmap.org or a
+  self-hosted Nominatim
+- `PhotonProvider`: a self-hosted Photon instance (komoot/photon)
+
+The active provider is chosen by configuration (GEOCODER_PROVIDER,
+GEOCODER_BASE_URL) and exposed as `geocoder_provider`; every geocoder in
+the codebase uses it.
+
+Rate limiting: the public Nominatim allows one request per second per
+application. Every caller shares a single budget through `TokenBucket`:
+
+- within a process, the bucket is shared by all threads and coroutines
+- with GEOCODER_RATE_LIMIT_FILE set, its state lives in that file under an
+  exclusive lock, so every worker process (and the batch scripts) on the
+  host draws from the same budget
+- GEOCODER_RATE_PER_SECOND = 0 disables it (self-hosted instances)
+
+A caller reserves the next free slot and waits only until that slot, not a
+fixed second. If the slot lies beyond its time budget
+(GEOCODE_REQUEST_BUDGET_SECONDS for API requests), the reservation is
+refused and `GeocoderUnavailable` is raised, so the caller can fall back to
+the local gazetteer instead of queueing.
+
+`search()` / `reverse()` are coroutines: a request waiting for its slot does
+not hold a worker thread, and identical in-flight queries are coalesced into
+one HTTP call. `search_many()` geocodes a batch with up to
+GEOCODER_MAX_CONCURRENCY requests in flight (still within the rate limit).
+`search_sync()` / `reverse_sync()` serve threadpool code and scripts with
+the same bucket.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import track_nominatim
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: the bucket is per process
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PHOTON_DEFAULT_URL = "http://localhost:2322"
+
+
+class GeocoderUnavailable(Exception):
+    """The geocoder cannot answer within the caller's budget (rate limit or timeout)."""
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int = 1, state_file: Optional[str] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.state_file = state_file if FCNTL_AVAILABLE else None
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated = time.time()
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Claim the next token. Returns the seconds to wait before using it, or
+        None (nothing claimed) when that would exceed `max_wait`.
+        """
+        with self._lock, self._state() as state:
+            now = time.time()
+            tokens = min(self.capacity, state["tokens"] + (now - state["updated"]) * self.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return None
+            # Tokens go negative while reservations are queued
+            state["tokens"] = tokens - 1
+            state["updated"] = now
+            return wait
+
+    @contextmanager
+    def _state(self):
+        shared = self._open_shared()
+        if shared is None:
+            state = {"tokens": self._tokens, "updated": self._updated}
+            yield state
+            self._tokens, self._updated = state["tokens"], state["updated"]
+            return
+
+        with shared as f:
+            # The exclusive lock serializes reservations across processes
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                state = json.loads(f.read() or "{}")
+            except ValueError:
+                state = {}
+            state.setdefault("tokens", float(self.capacity))
+            state.setdefault("updated", time.time())
+            yield state
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+
+    def _open_shared(self):
+        if not self.state_file:
+            return None
+        try:
+            return open(self.state_file, "a+", encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Shared rate limit file unusable ({e}); limiting per process")
+            self.state_file = None
+            return None
+
+
+class GeocodingProvider:
+    """
+    Rate-limited, coalescing HTTP geocoder. Subclasses provide the request
+    paths/parameters and parse the answers into the common result shape:
+
+        {"latitude", "longitude", "display_name", "address_details"}
+
+    where `address_details` uses Nominatim's address keys (city, town,
+    village, postcode, state, ...). Reverse results carry display_name and
+    address_details only.
+    """
+
+    name = "base"
+
+    def __init__(
+        self,
+        base_url: str,
+        user_agent: str,
+        bucket: Optional[TokenBucket],
+        timeout: float,
+        max_concurrency: int = 1,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.user_agent = user_agent
+        self.bucket = bucket
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self._inflight: Dict[Any, asyncio.Task] = {}
+
+    # -------------------------------------------------------------------------
+    # provider specifics
+    # -------------------------------------------------------------------------
+
+    def search_request(self, query: str) -> Tuple[str, dict]:
+        raise NotImplementedError
+
+    def reverse_request(self, latitude: float, longitude: float) -> Tuple[str, dict]:
+        raise NotImplementedError
+
+    def parse_search(self, payload) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def parse_reverse(self, payload) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    # -------------------------------------------------------------------------
+    # async
+    # -------------------------------------------------------------------------
+
+    async def search(self, query: str, budget: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        First match for a free-text query, or None when nothing matches.
+        Raises GeocoderUnavailable when it cannot be answered within `budget`
+        seconds (defaults to GEOCODE_REQUEST_BUDGET_SECONDS).
+        """
+        return await self._search_by(query, _deadline(budget))
+
+    async def reverse(self, latitude: float, longitude: float, budget: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Address at a point, or None; raises GeocoderUnavailable like search()."""
+        path, params = self.reverse_request(latitude, longitude)
+        return await self._coalesced(
+            ("reverse", latitude, longitude),
+            lambda deadline: self._get("reverse", path, params, deadline, self.parse_reverse),
+            _deadline(budget),
+        )
+
+    async def search_many(self, queries: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Batch search: {query: result or None}. Up to `max_concurrency` requests
+        are in flight at once and each waits as long as the rate limit
+        requires. Queries that fail are logged and left out of the result.
+        """
+        unique = list(dict.fromkeys(queries))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def one(query: str):
+            async with semaphore:
+                return await self._search_by(query, None)
+
+        outcomes = await asyncio.gather(*(one(query) for query in unique), return_exceptions=True)
+        results = {}
+        for query, outcome in zip(unique, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Batch geocoding failed for '{query}': {outcome}")
+            else:
+                results[query] = outcome
+        return results
+
+    async def _search_by(self, query: str, deadline: Optional[float]) -> Optional[Dict[str, Any]]:
+        path, params = self.search_request(query)
+        return await self._coalesced(
+            ("search", query),
+            lambda deadline: self._get("search", path, params, deadline, self.parse_search),
+            deadline,
+        )
+
+    async def _coalesced(
+        self,
+        key: Any,
+        call: Callable[[Optional[float]], Awaitable[Optional[Dict[str, Any]]]],
+        deadline: Optional[float],
+    ) -> Optional[Dict[str, Any]]:
+        """Share one HTTP call between identical concurrent queries (deadline None = no limit)."""
+        loop = asyncio.get_running_loop()
+
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not loop:
+            task = loop.create_task(call(deadline))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            # shield: a caller giving up must not cancel the call others wait on
+            return await asyncio.wait_for(asyncio.shield(task), remaining)
+        except asyncio.TimeoutError:
+            raise GeocoderUnavailable(f"{self.name} did not answer within the request budget")
+
+    def _forget(self, key: Any, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every waiter gave up
+
+    async def _get(self, operation: str, path: str, params: dict, deadline: Optional[float], parse) -> Optional[Dict[str, Any]]:
+        wait = self._reserve(None if deadline is None else deadline - time.monotonic())
+        if wait:
+            await asyncio.sleep(wait)
+
+        timeout = self.timeout if deadline is None else min(self.timeout, deadline - time.monotonic())
+        if timeout <= 0:
+            raise GeocoderUnavailable(f"No time left for the {self.name} call")
+        import httpx  # loaded on the first geocoder call, not at app startup
+        try:
+            with track_nominatim(operation):
+                async with httpx.AsyncClient(timeout=timeout, headers={"User-Agent": self.user_agent}) as client:
+                    response = await client.get(f"{self.base_url}{path}", params=params)
+                    response.raise_for_status()
+        except httpx.TimeoutException as e:
+            raise GeocoderUnavailable(f"{self.name} timed out after {timeout:.1f}s") from e
+        return parse(response.json())
+
+    # -------------------------------------------------------------------------
+    # sync (threadpool code and scripts)
+    # -------------------------------------------------------------------------
+
+    def search_sync(self, query: str, budget: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Blocking search(); `budget=None` waits as long as the rate limit requires."""
+        path, params = self.search_request(query)
+        return self._get_sync("search", path, params, budget, self.parse_search)
+
+    def reverse_sync(self, latitude: float, longitude: float, budget: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Blocking reverse()."""
+        path, params = self.reverse_request(latitude, longitude)
+        return self._get_sync("reverse", path, params, budget, self.parse_reverse)
+
+    def _get_sync(self, operation: str, path: str, params: dict, budget: Optional[float], parse) -> Optional[Dict[str, Any]]:
+        wait = self._reserve(budget)
+        if wait:
+            time.sleep(wait)
+
+        timeout = self.timeout if budget is None else min(self.timeout, budget - wait)
+        import httpx
+        try:
+            with track_nominatim(operation):
+                response = httpx.get(
+                    f"{self.base_url}{path}",
+                    params=params,
+                    headers={"User-Agent": self.user_agent},
+                    timeout=timeout,
+                )
+                response.raise_for_status()
+        except httpx.TimeoutException as e:
+            raise GeocoderUnavailable(f"{self.name} timed out after {timeout:.1f}s") from e
+        return parse(response.json())
+
+    def _reserve(self, max_wait: Optional[float]) -> float:
+        if self.bucket is None:
+            return 0.0
+        wait = self.bucket.reserve(max_wait=max_wait)
+        if wait is None:
+            raise GeocoderUnavailable(f"{self.name} rate limit budget exhausted")
+        return wait
+
+
+class NominatimProvider(GeocodingProvider):
+    """Nominatim /search and /reverse (public or self-hosted)."""
+
+    name = "nominatim"
+
+    def search_request(self, query: str) -> Tuple[str, dict]:
+        return "/search", {"q": query, "format": "json", "addressdetails": 1, "limit": 1}
+
+    def reverse_request(self, latitude: float, longitude: float) -> Tuple[str, dict]:
+        return "/reverse", {"lat": latitude, "lon": longitude, "format": "json", "addressdetails": 1}
+
+    def parse_search(self, results) -> Optional[Dict[str, Any]]:
+        if not results:
+            return None
+        result = results[0]
+        return {
+            "latitude": float(result["lat"]),
+            "longitude": float(result["lon"]),
+            "display_name": result.get("display_name"),
+            "address_details": result.get("address", {}),
+        }
+
+    def parse_reverse(self, result) -> Optional[Dict[str, Any]]:
+        if not result or "error" in result:
+            # Nominatim answers 200 {"error": "Unable to geocode"} for empty areas
+            return None
+        return {
+            "display_name": result.get("display_name"),
+            "address_details": result.get("address", {}),
+        }
+
+
+class PhotonProvider(GeocodingProvider):
+    """Photon /api and /reverse (GeoJSON answers), mapped onto Nominatim's result shape."""
+
+    name = "photon"
+
+    def search_request(self, query: str) -> Tuple[str, dict]:
+        return "/api", {"q": query, "limit": 1}
+
+    def reverse_request(self, latitude: float, longitude: float) -> Tuple[str, dict]:
+        return "/reverse", {"lat": latitude, "lon": longitude, "limit": 1}
+
+    def parse_search(self, payload) -> Optional[Dict[str, Any]]:
+        feature = _first_feature(payload)
+        if feature is None:
+            return None
+        longitude, latitude = feature["geometry"]["coordinates"][:2]
+        properties = feature.get("properties", {})
+        return {
+            "latitude": float(latitude),
+            "longitude": float(longitude),
+            "display_name": _photon_display_name(properties),
+            "address_details": _photon_address(properties),
+        }
+
+    def parse_reverse(self, payload) -> Optional[Dict[str, Any]]:
+        feature = _first_feature(payload)
+        if feature is None:
+            return None
+        properties = feature.get("properties", {})
+        return {
+            "display_name": _photon_display_name(properties),
+            "address_details": _photon_address(properties),
+        }
+
+
+def _deadline(budget: Optional[float]) -> float:
+    budget = settings.GEOCODE_REQUEST_BUDGET_SECONDS if budget is None else budget
+    return time.monotonic() + budget
+
+
+def _first_feature(payload) -> Optional[dict]:
+    features = (payload or {}).get("features") or []
+    return features[0] if features else None
+
+
+def _photon_address(properties: dict) -> Dict[str, Any]:
+    address = {
+        "road": properties.get("street"),
+        "house_number": properties.get("housenumber"),
+        "postcode": properties.get("postcode"),
+        "city": properties.get("city"),
+        "county": properties.get("county"),
+        "state": properties.get("state"),
+        "country": properties.get("country"),
+        "country_code": (properties.get("countrycode") or "").lower() or None,
+    }
+    if properties.get("osm_key") == "place" and properties.get("osm_value") in ("city", "town", "village"):
+        # The feature is the settlement itself
+        address[properties["osm_value"]] = properties.get("name")
+    return {key: value for key, value in address.items() if value}
+
+
+def _photon_display_name(properties: dict) -> str:
+    street = " ".join(filter(None, [properties.get("street"), properties.get("housenumber")]))
+    parts = [
+        properties.get("name"), street, properties.get("postcode"), properties.get("city"),
+        properties.get("state"), properties.get("country"),
+    ]
+    return ", ".join(dict.fromkeys(part for part in parts if part))
+
+
+PROVIDERS = {
+    NominatimProvider.name: NominatimProvider,
+    PhotonProvider.name: PhotonProvider,
+}
+
+
+def build_provider() -> GeocodingProvider:
+    """The provider selected by configuration."""
+    provider_class = PROVIDERS.get(settings.GEOCODER_PROVIDER)
+    if provider_class is None:
+        raise ValueError(
+            f"Unknown GEOCODER_PROVIDER '{settings.GEOCODER_PROVIDER}' (expected one of: {', '.join(PROVIDERS)})"
+        )
+    default_url = settings.NOMINATIM_BASE_URL if provider_class is NominatimProvider else PHOTON_DEFAULT_URL
+    bucket = None
+    if settings.GEOCODER_RATE_PER_SECOND > 0:
+        bucket = TokenBucket(
+            rate=settings.GEOCODER_RATE_PER_SECOND,
+            capacity=settings.GEOCODER_BURST,
+            state_file=settings.GEOCODER_RATE_LIMIT_FILE,
+        )
+    return provider_class(
+        base_url=settings.GEOCODER_BASE_URL or default_url,
+        user_agent=settings.NOMINATIM_USER_AGENT,
+        bucket=bucket,
+        timeout=settings.GEOCODER_TIMEOUT_SECONDS,
+        max_concurrency=settings.GEOCODER_MAX_CONCURRENCY,
+    )
+
+
+geocoder_provider = build_provider()
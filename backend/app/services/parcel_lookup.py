@@ -0,0 +1,117 @@
+"""
+Parcel Lookup - Cadastral parcel at (or nearest to) a coordinate.
+
+Backs `GET /locations/parcel`:
+
+- coordinates are snapped to a grid of PARCEL_CELL_DEGREES (~1 m) and the
+  result of each cell, "no parcel" included, is kept in an LRU cache
+- the parcel under the cell centre is found with an index-only bounding-box
+  prefilter (`&&`) ahead of the exact ST_Intersects test; the linked OMI zone
+  and municipality are loaded by the same query
+- a click on a road or in a gap between parcels falls back to the nearest
+  parcel (KNN `<->` ordering on the GiST index) within PARCEL_NEAREST_MAX_METRES
+
+The cache is cleared when cadastral parcels are ingested.
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from geoalchemy2 import Geography
+from sqlalchemy import Float, cast, func
+from sqlalchemy.orm import Session, joinedload, load_only
+
+from app.core.cache import SimpleTTLCache
+from app.core.constants import (
+    CACHE_TTL_PARCELS,
+    PARCEL_CACHE_MAX_ENTRIES,
+    PARCEL_CELL_DEGREES,
+    PARCEL_NEAREST_MAX_METRES,
+)
+from app.models.geography import CadastralParcel, Municipality, OMIZone
+
+logger = logging.getLogger(__name__)
+
+parcel_cache = SimpleTTLCache("parcel", max_entries=PARCEL_CACHE_MAX_ENTRIES)
+
+
+def grid_cell(latitude: float, longitude: float) -> Tuple[int, int]:
+    """Grid cell containing the coordinate."""
+    return round(latitude / PARCEL_CELL_DEGREES), round(longitude / PARCEL_CELL_DEGREES)
+
+
+def find_parcel(db: Session, latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+    """
+    Parcel at the coordinate as a ParcelResponse dict (`match` is "contains"
+    or "nearest"), or None when no parcel is within reach.
+    """
+    row, col = grid_cell(latitude, longitude)
+    key = f"parcel:{row}:{col}"
+    held = parcel_cache.get(key)
+    if held is not None:
+        return held["parcel"]
+
+    # Query the cell centre, so every click in the cell gets the same answer
+    parcel = _lookup(db, row * PARCEL_CELL_DEGREES, col * PARCEL_CELL_DEGREES)
+    parcel_cache.set(key, {"parcel": parcel}, CACHE_TTL_PARCELS)
+    return parcel
+
+
+def _lookup(db: Session, latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+    point = func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326)
+    # Scalar columns only: boundaries (a whole municipality's, for one) are never needed here
+    query = db.query(CadastralParcel).options(
+        load_only(
+            CadastralParcel.id, CadastralParcel.foglio, CadastralParcel.particella,
+            CadastralParcel.municipality_id, CadastralParcel.omi_zone_id,
+        ),
+        joinedload(CadastralParcel.omi_zone).load_only(
+            OMIZone.id, OMIZone.zone_code, OMIZone.zone_name, OMIZone.zone_type, OMIZone.municipality_id
+        ),
+        joinedload(CadastralParcel.municipality).load_only(Municipality.id, Municipality.name),
+    )
+
+    parcel = (
+        query.filter(
+            CadastralParcel.geometry.op("&&")(point),
+            func.ST_Intersects(CadastralParcel.geometry, point),
+        )
+        .order_by(CadastralParcel.id)
+        .first()
+    )
+    if parcel is not None:
+        return _parcel_dict(parcel, "contains")
+
+    nearest = (
+        query.add_columns(
+            func.ST_Distance(
+                cast(CadastralParcel.geometry, Geography(srid=4326)), cast(point, Geography(srid=4326))
+            ).label("distance")
+        )
+        .order_by(CadastralParcel.geometry.op("<->", return_type=Float)(point))
+        .first()
+    )
+    if nearest is None or nearest.distance > PARCEL_NEAREST_MAX_METRES:
+        return None
+    return _parcel_dict(nearest[0], "nearest", nearest.distance)
+
+
+def _parcel_dict(parcel: CadastralParcel, match: str, distance: Optional[float] = None) -> Dict[str, Any]:
+    municipality_name = parcel.municipality.name if parcel.municipality else None
+    zone = parcel.omi_zone
+    return {
+        "foglio": parcel.foglio,
+        "particella": parcel.particella,
+        "municipality_id": parcel.municipality_id,
+        "municipality_name": municipality_name,
+        "linked_omi_zone": {
+            "id": zone.id,
+            "zone_code": zone.zone_code,
+            "zone_name": zone.zone_name,
+            "zone_type": zone.zone_type,
+            "municipality_id": zone.municipality_id,
+            "municipality_name": municipality_name,
+        } if zone else None,
+        "match": match,
+        "distance_m": round(distance, 1) if distance is not None else None,
+    }
@@ -0,0 +1,189 @@
+"""
+Point Resolution - Bulk coordinate -> municipality / OMI zone / parcel / score.
+
+Backs `POST /locations/resolve`. Points are processed in chunks of
+RESOLVE_CHUNK_SIZE and each chunk costs a fixed number of queries,
+whatever its size:
+
+1. one set-based PostGIS query: the chunk's coordinates are passed as two
+   arrays, unnested into a point set and joined (LATERAL, index-assisted)
+   against cadastral parcels and, unless the in-memory spatial index is
+   loaded, the subdivided municipality and OMI zone boundaries
+2. with the spatial index loaded, municipalities and zones are resolved in
+   process instead (see app.services.spatial_index)
+3. one query each for the latest score of the chunk's zones and
+   municipalities (DISTINCT ON)
+
+Results are encoded as NDJSON chunk by chunk, so the response starts
+streaming after the first chunk and memory stays flat.
+"""
+
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.constants import RESOLVE_CHUNK_SIZE
+from app.core.serialization import dumps
+from app.models.score import InvestmentScore
+from app.services.spatial_index import SpatialIndex, get_spatial_index
+
+logger = logging.getLogger(__name__)
+
+_POINTS = """
+    WITH points AS (
+        SELECT p.ord, ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326) AS geom
+        FROM unnest(CAST(:lons AS double precision[]), CAST(:lats AS double precision[]))
+             WITH ORDINALITY AS p(lon, lat, ord)
+    )
+"""
+
+_AREA_COLUMNS = """,
+        mun.id AS municipality_id, mun.name AS municipality_name, mun.code AS municipality_code,
+        oz.id AS zone_id, oz.zone_code, oz.zone_name"""
+
+_AREA_JOINS = """
+    LEFT JOIN LATERAL (
+        SELECT m.id, m.name, m.code
+        FROM municipality_subdivisions ms JOIN municipalities m ON m.id = ms.municipality_id
+        WHERE ST_Intersects(ms.geometry, points.geom)
+        ORDER BY ms.parent_area, ms.municipality_id LIMIT 1
+    ) mun ON true
+    LEFT JOIN LATERAL (
+        SELECT z.id, z.zone_code, z.zone_name
+        FROM omi_zone_subdivisions zs JOIN omi_zones z ON z.id = zs.omi_zone_id
+        WHERE ST_Intersects(zs.geometry, points.geom)
+        ORDER BY zs.parent_area, zs.omi_zone_id LIMIT 1
+    ) oz ON true"""
+
+_PARCEL_JOIN = """
+    LEFT JOIN LATERAL (
+        SELECT cp.id, cp.foglio, cp.particella FROM cadastral_parcels cp
+        WHERE ST_Intersects(cp.geometry, points.geom)
+        LIMIT 1
+    ) parcel ON true"""
+
+
+def _resolution_sql(with_areas: bool):
+    return text(
+        _POINTS
+        + "SELECT points.ord, parcel.id AS parcel_id, parcel.foglio, parcel.particella"
+        + (_AREA_COLUMNS if with_areas else "")
+        + "\n    FROM points"
+        + (_AREA_JOINS if with_areas else "")
+        + _PARCEL_JOIN
+        + "\n    ORDER BY points.ord"
+    )
+
+
+def resolve_chunk(
+    db: Session,
+    points: Sequence[Any],
+    offset: int = 0,
+    index: Optional[SpatialIndex] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Resolve `points` (objects with id/latitude/longitude) into result dicts,
+    in input order; `offset` is the position of the first point in the request.
+    """
+    rows = db.execute(
+        _resolution_sql(with_areas=index is None),
+        {"lons": [p.longitude for p in points], "lats": [p.latitude for p in points]},
+    ).mappings().all()
+
+    results = []
+    for point, row in zip(points, rows):
+        if index is not None:
+            municipality = index.municipality_at(point.latitude, point.longitude)
+            zone = index.zone_at(point.latitude, point.longitude)
+            municipality = {"id": municipality.id, "name": municipality.name, "code": municipality.code} if municipality else None
+            zone = {"id": zone.id, "zone_code": zone.code, "zone_name": zone.name} if zone else None
+        else:
+            municipality = (
+                {"id": row["municipality_id"], "name": row["municipality_name"], "code": row["municipality_code"]}
+                if row["municipality_id"] is not None else None
+            )
+            zone = (
+                {"id": row["zone_id"], "zone_code": row["zone_code"], "zone_name": row["zone_name"]}
+                if row["zone_id"] is not None else None
+            )
+        results.append({
+            "index": offset + len(results),
+            "id": point.id,
+            "latitude": point.latitude,
+            "longitude": point.longitude,
+            "municipality": municipality,
+            "omi_zone": zone,
+            "parcel": (
+                {"id": row["parcel_id"], "foglio": row["foglio"], "particella": row["particella"]}
+                if row["parcel_id"] is not None else None
+            ),
+            "score": None,
+        })
+
+    _attach_scores(db, results)
+    return results
+
+
+def _attach_scores(db: Session, results: List[Dict[str, Any]]) -> None:
+    """Latest score of each result's zone, else of its municipality."""
+    zone_ids = {r["omi_zone"]["id"] for r in results if r["omi_zone"]}
+    municipality_ids = {r["municipality"]["id"] for r in results if r["municipality"]}
+    zone_scores = _latest_scores(db, InvestmentScore.omi_zone_id, zone_ids)
+    municipality_scores = _latest_scores(
+        db, InvestmentScore.municipality_id, municipality_ids, InvestmentScore.omi_zone_id.is_(None)
+    )
+
+    for result in results:
+        score, level = None, None
+        if result["omi_zone"]:
+            score = zone_scores.get(result["omi_zone"]["id"])
+            level = "omi_zone"
+        if score is None and result["municipality"]:
+            score = municipality_scores.get(result["municipality"]["id"])
+            level = "municipality"
+        if score is not None:
+            result["score"] = {
+                "overall_score": score.overall_score,
+                "level": level,
+                "calculation_date": score.calculation_date,
+            }
+
+
+def _latest_scores(db: Session, key_column, ids: Iterable[int], *criteria) -> Dict[int, Any]:
+    ids = list(ids)
+    if not ids:
+        return {}
+    rows = (
+        db.query(key_column.label("key"), InvestmentScore.overall_score, InvestmentScore.calculation_date)
+        .filter(key_column.in_(ids), *criteria)
+        .distinct(key_column)
+        .order_by(key_column, InvestmentScore.calculation_date.desc(), InvestmentScore.id.desc())
+        .all()
+    )
+    return {row.key: row for row in rows}
+
+
+def stream_resolution(
+    session_factory: Callable[[], Session],
+    points: Sequence[Any],
+    chunk_size: int = RESOLVE_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Generator producing the NDJSON results, one chunk per write.
+
+    Opens its own session (the request-scoped one may be closed before the
+    body finishes streaming).
+    """
+    db = session_factory()
+    try:
+        index = get_spatial_index(db)
+        for start in range(0, len(points), chunk_size):
+            results = resolve_chunk(db, points[start:start + chunk_size], start, index)
+            yield b"".join(dumps(result) + b"\n" for result in results)
+    except Exception as e:
+        logger.error(f"Point resolution stream failed: {e}")
+        raise
+    finally:
+        db.close()
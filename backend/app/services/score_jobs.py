@@ -0,0 +1,320 @@
+"""
+Score Jobs - Background score calculation with persisted job state.
+
+`POST /scores/jobs` stores a ScoreJob row and hands its id to an in-process
+worker pool; clients poll `GET /scores/jobs/{id}`. Jobs live in the database,
+so:
+
+- identical pending/running jobs are deduplicated (partial unique index on
+  `dedup_key`), and a submit returns the existing job instead of a new one
+- a worker claims a job with a conditional UPDATE (PENDING -> RUNNING), so a
+  job runs once even with several API processes
+- on startup, pending jobs and jobs left RUNNING longer than
+  SCORE_JOB_STALE_SECONDS (their process died) are queued again
+- jobs still queued when the process shuts down are marked FAILED, and an
+  active job untouched for SCORE_JOB_STALE_SECONDS no longer blocks a new
+  submit, so a dead job cannot hold the dedup key until the next startup
+
+Score reads use the same queue for stale-while-revalidate: a stored score
+older than SCORE_FRESHNESS_SECONDS is still returned, and `schedule_refresh`
+queues its recalculation (one job per entity, thanks to the dedup key).
+"""
+
+import hashlib
+import json
+import logging
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.cache import global_cache
+from app.core.compression import response_cache
+from app.core.config import settings
+from app.core.database import HeavySessionLocal
+from app.models.geography import OMIZone
+from app.models.score import JobStatus, ScoreJob
+from app.services.scoring_engine import ScoringEngine
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (JobStatus.PENDING, JobStatus.RUNNING)
+
+
+def zone_layer_cache_key(municipality_id: int) -> str:
+    return f"zone_layer:{municipality_id}"
+
+
+def dashboard_cache_prefix(municipality_id: int) -> str:
+    """Prefix of the municipality's dashboard entries (one per section set)."""
+    return f"dashboard:{municipality_id}:"
+
+
+def invalidate_score_caches(db: Session, municipality_id: Optional[int], omi_zone_id: Optional[int]) -> None:
+    """Drop cached responses that embed the score just saved."""
+    if omi_zone_id:
+        # The municipality's zone layer and dashboard embed this score
+        zone = db.query(OMIZone.municipality_id).filter(OMIZone.id == omi_zone_id).first()
+        if zone:
+            response_cache.delete(zone_layer_cache_key(zone.municipality_id))
+            response_cache.delete_prefix(dashboard_cache_prefix(zone.municipality_id))
+    elif municipality_id:
+        global_cache.delete(f"score_municipality_{municipality_id}")
+        response_cache.delete_prefix(dashboard_cache_prefix(municipality_id))
+
+
+def score_age_seconds(calculated_at: Optional[datetime], now: Optional[datetime] = None) -> Optional[int]:
+    """Seconds since a score was (re)calculated; None when unknown."""
+    if calculated_at is None:
+        return None
+    return max(0, int(((now or datetime.utcnow()) - calculated_at).total_seconds()))
+
+
+def job_dedup_key(
+    municipality_id: Optional[int],
+    omi_zone_id: Optional[int],
+    custom_weights: Optional[Dict[str, float]],
+) -> str:
+    """Stable hash of the job parameters (weights are order-independent)."""
+    payload = json.dumps(
+        {
+            "municipality_id": None if omi_zone_id else municipality_id,
+            "omi_zone_id": omi_zone_id,
+            "weights": sorted((custom_weights or {}).items()),
+        },
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def submit_job(
+    db: Session,
+    municipality_id: Optional[int],
+    omi_zone_id: Optional[int],
+    custom_weights: Optional[Dict[str, float]],
+) -> Tuple[ScoreJob, bool]:
+    """
+    Queue a score calculation. Returns (job, created); `created` is False when
+    an identical job was already pending or running.
+    """
+    key = job_dedup_key(municipality_id, omi_zone_id, custom_weights)
+    existing = _active_job(db, key)
+    if existing and is_abandoned(existing):
+        # Its process died or it was never dispatched: free the dedup key
+        logger.warning(f"Score job {existing.id} abandoned in {existing.status.value}; superseding it")
+        _fail_jobs(db, [existing.id], "Abandoned: superseded by a new submission")
+        existing = None
+    if existing:
+        return existing, False
+
+    job = ScoreJob(
+        id=uuid.uuid4().hex,
+        status=JobStatus.PENDING,
+        municipality_id=None if omi_zone_id else municipality_id,
+        omi_zone_id=omi_zone_id,
+        custom_weights=custom_weights,
+        dedup_key=key,
+        attempts=0,
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost a race with an identical submit
+        db.rollback()
+        existing = _active_job(db, key)
+        if existing:
+            return existing, False
+        raise
+    db.refresh(job)
+    return job, True
+
+
+def is_abandoned(job: ScoreJob, now: Optional[datetime] = None) -> bool:
+    """An active job nothing has touched for SCORE_JOB_STALE_SECONDS."""
+    last_touched = job.updated_at or job.created_at
+    if job.status not in ACTIVE_STATUSES or last_touched is None:
+        return False
+    return (now or datetime.utcnow()) - last_touched > timedelta(seconds=settings.SCORE_JOB_STALE_SECONDS)
+
+
+def _fail_jobs(db: Session, job_ids: List[str], error: str) -> None:
+    """Mark still-active jobs FAILED (releasing their dedup key) and commit."""
+    now = datetime.utcnow()
+    db.execute(
+        update(ScoreJob)
+        .where(ScoreJob.id.in_(job_ids), ScoreJob.status.in_(ACTIVE_STATUSES))
+        .values(status=JobStatus.FAILED, error=error, finished_at=now, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def _active_job(db: Session, key: str) -> Optional[ScoreJob]:
+    return (
+        db.query(ScoreJob)
+        .filter(ScoreJob.dedup_key == key, ScoreJob.status.in_(ACTIVE_STATUSES))
+        .first()
+    )
+
+
+class ScoreJobRunner:
+    """In-process worker pool executing queued score jobs."""
+
+    # Engine/connection the workers open sessions on; None means the heavy
+    # pool. The test suite points it at the test database.
+    bind = None
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._engine: Optional[ScoringEngine] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Dispatched jobs not yet finished: job id -> future
+        self._futures: Dict[str, Future] = {}
+
+    @property
+    def engine(self) -> ScoringEngine:
+        # Built on first job, not when the app imports the runner
+        if self._engine is None:
+            self._engine = ScoringEngine()
+        return self._engine
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="score-job")
+
+    def shutdown(self) -> None:
+        """Stop the pool; jobs that never started are marked FAILED so they do not block resubmission."""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        cancelled = [job_id for job_id, future in list(self._futures.items()) if future.cancelled()]
+        self._futures.clear()
+        if not cancelled:
+            return
+        db = self.session()
+        try:
+            _fail_jobs(db, cancelled, "Cancelled: the server shut down before the job started")
+            logger.info(f"Marked {len(cancelled)} queued score jobs as failed on shutdown")
+        except SQLAlchemyError as e:
+            logger.error(f"Could not mark cancelled score jobs as failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def session(self) -> Session:
+        """A session on the workers' database (the heavy pool unless `bind` is set)."""
+        if self.bind is not None:
+            return Session(bind=self.bind, autoflush=False)
+        return HeavySessionLocal()
+
+    def dispatch(self, job_id: str) -> None:
+        """Run a job on the pool."""
+        self.start()
+        future = self._executor.submit(self._run, job_id)
+        self._futures[job_id] = future
+        future.add_done_callback(partial(self._forget, job_id))
+
+    def _forget(self, job_id: str, future: Future) -> None:
+        # Cancelled futures stay listed: shutdown() marks their jobs FAILED
+        if not future.cancelled():
+            self._futures.pop(job_id, None)
+
+    def recover(self) -> int:
+        """Requeue jobs that were pending or abandoned mid-run; returns how many."""
+        db = self.session()
+        try:
+            stale_before = datetime.utcnow() - timedelta(seconds=settings.SCORE_JOB_STALE_SECONDS)
+            db.execute(
+                update(ScoreJob)
+                .where(ScoreJob.status == JobStatus.RUNNING, ScoreJob.started_at < stale_before)
+                .values(status=JobStatus.PENDING, updated_at=datetime.utcnow())
+            )
+            db.commit()
+            pending = [
+                row.id for row in
+                db.query(ScoreJob.id).filter(ScoreJob.status == JobStatus.PENDING).order_by(ScoreJob.created_at)
+            ]
+        finally:
+            db.close()
+        for job_id in pending:
+            self.dispatch(job_id)
+        return len(pending)
+
+    def _run(self, job_id: str) -> None:
+        db = self.session()
+        try:
+            # Claim: only one worker (in any process) moves the job to RUNNING
+            claimed = db.execute(
+                update(ScoreJob)
+                .where(ScoreJob.id == job_id, ScoreJob.status == JobStatus.PENDING)
+                .values(
+                    status=JobStatus.RUNNING,
+                    started_at=datetime.utcnow(),
+                    attempts=ScoreJob.attempts + 1,
+                    updated_at=datetime.utcnow(),
+                )
+            ).rowcount
+            db.commit()
+            if not claimed:
+                return
+
+            job = db.get(ScoreJob, job_id)
+            try:
+                result = self.engine.calculate_score(
+                    db,
+                    municipality_id=job.municipality_id,
+                    omi_zone_id=job.omi_zone_id,
+                    custom_weights=job.custom_weights,
+                )
+                saved = self.engine.save_score(db, result)
+                job.score_id = saved.id
+                job.status = JobStatus.SUCCEEDED
+                invalidate_score_caches(db, job.municipality_id, job.omi_zone_id)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Score job {job_id} failed: {e}")
+                job = db.get(ScoreJob, job_id)
+                job.status = JobStatus.FAILED
+                job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.commit()
+        except Exception as e:
+            logger.error(f"Score job {job_id} could not be processed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+
+job_runner = ScoreJobRunner(max_workers=settings.SCORE_JOB_WORKERS)
+
+
+def schedule_refresh(municipality_id: Optional[int], omi_zone_id: Optional[int]) -> bool:
+    """
+    Queue a background recalculation of a stale stored score (default weights).
+    Returns True when a refresh is queued or already in progress.
+
+    Concurrent reads of the same entity share one job; an in-memory marker
+    spares the job-table lookup on every read while the refresh runs. The job
+    is submitted on a short-lived session of its own, so its commit/rollback
+    never touches the reading request's session.
+    """
+    marker = f"score_refresh:{omi_zone_id or 0}:{municipality_id or 0}"
+    if global_cache.get(marker):
+        return True
+    try:
+        with job_runner.session() as db:
+            job, created = submit_job(db, municipality_id, omi_zone_id, None)
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not queue score refresh (municipality={municipality_id}, zone={omi_zone_id}): {e}")
+        return False
+    if created:
+        job_runner.dispatch(job.id)
+    global_cache.set(marker, job.id, settings.SCORE_REFRESH_MEMO_SECONDS)
+    return True
@@ -11,6 +11,7 @@ from app.models.property import PropertyPrice, PropertyType, TransactionType
 from app.models.demographics import Demographics, CrimeStatistics
 from app.models.risk import SeismicRisk, FloodRisk, LandslideRisk, ClimateProjection, AirQuality
 from app.models.score import InvestmentScore
+from app.core.tracing import start_span, traced
 from app.core.constants import (
     MIN_SCORE, MAX_SCORE, SCORE_PIVOT, CONTRAST_MULTIPLIER, NEUTRAL_FALLBACK_SCORE,
     Z_SCORE_SPREAD_FACTOR, TRAIN_EXCELLENT_KM, TRAIN_GOOD_KM, TRAIN_FAIR_KM,
@@ -96,6 +97,7 @@ class ScoringEngine:
         score = MIN_SCORE + (MAX_SCORE - MIN_SCORE) * (0.5 * (1 + math.erf(z / (Z_SCORE_SPREAD_FACTOR * 1.0)))) 
         return max(MIN_SCORE, min(MAX_SCORE, score))
 
+    @traced("scoring.calculate_score")
     def calculate_score(
         self,
         db: Session,
@@ -140,22 +142,30 @@ class ScoringEngine:
         # Starting coverage counts.
         self._coverage = {}
 
-        scores = {
-            'price_trend': self._score_price_trend(db, municipality_id, omi_zone_id),
-            'affordability': self._score_affordability(db, municipality_id, omi_zone_id),
-            'rental_yield': self._score_rental_yield(db, municipality_id, omi_zone_id),
-            'demographics': self._score_demographics(db, municipality_id),
-            'crime': self._score_crime_safety(db, municipality_id, omi_zone_id),
-            'air_quality': self._score_air_quality(db, municipality_id),
-            'connectivity': self._score_connectivity(db, municipality_id),
-            'digital_connectivity': self._score_digital_connectivity(db, municipality_id),
-            'services': self._score_services(db, municipality_id),
-            'seismic': self._score_seismic_risk(db, municipality_id),
-            'flood': self._score_flood_risk(db, municipality_id),
-            'landslide': self._score_landslide_risk(db, municipality_id),
-            'climate': self._score_climate_risk(db, municipality_id),
+        pillars = {
+            'price_trend': lambda: self._score_price_trend(db, municipality_id, omi_zone_id),
+            'affordability': lambda: self._score_affordability(db, municipality_id, omi_zone_id),
+            'rental_yield': lambda: self._score_rental_yield(db, municipality_id, omi_zone_id),
+            'demographics': lambda: self._score_demographics(db, municipality_id),
+            'crime': lambda: self._score_crime_safety(db, municipality_id, omi_zone_id),
+            'air_quality': lambda: self._score_air_quality(db, municipality_id),
+            'connectivity': lambda: self._score_connectivity(db, municipality_id),
+            'digital_connectivity': lambda: self._score_digital_connectivity(db, municipality_id),
+            'services': lambda: self._score_services(db, municipality_id),
+            'seismic': lambda: self._score_seismic_risk(db, municipality_id),
+            'flood': lambda: self._score_flood_risk(db, municipality_id),
+            'landslide': lambda: self._score_landslide_risk(db, municipality_id),
+            'climate': lambda: self._score_climate_risk(db, municipality_id),
         }
 
+        # One span per pillar so traces show where scoring time goes
+        scores = {}
+        for pillar, compute in pillars.items():
+            with start_span(f"scoring.{pillar}", municipality_id=municipality_id, omi_zone_id=omi_zone_id) as span:
+                scores[pillar] = compute()
+                if span is not None:
+                    span.set_attribute("scoring.coverage", self._coverage.get(pillar, "fallback"))
+
         # --- Weighted Average with Missing Data Exclusion ---
         # Only include metrics with real data in the weighted average.
         # Re-normalize weights so they sum to 1.0 for available metrics only.
@@ -337,6 +347,8 @@ class ScoringEngine:
             existing.climate_risk_score = cs['climate']
             existing.confidence_score = score_data.get('confidence_score', 0.5)
             existing.weights = score_data['weights']
+            # Recalculated now even when no value changed (score age is read from updated_at)
+            existing.updated_at = datetime.utcnow()
             score_record = existing
         else:
             score_record = InvestmentScore(
@@ -615,3 +627,14 @@ class ScoringEngine:
             
         self._coverage['climate'] = 'real'
         return self._z_score_to_points(proj.heatwave_days_increase, 'climate_heat', inverse=True)
+
+
+_engine: Optional[ScoringEngine] = None
+
+
+def get_scoring_engine() -> ScoringEngine:
+    """Process-wide engine for the API, built on first use rather than at import."""
+    global _engine
+    if _engine is None:
+        _engine = ScoringEngine()
+    return _engine
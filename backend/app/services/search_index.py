@@ -0,0 +1,377 @@
+"""
+Search Index - In-process autocomplete over municipalities, postal codes and OMI zones.
+
+The whole catalogue (~8k municipalities, their postal codes and the OMI zone
+names) takes a few MB, so it is loaded into memory once and queried without
+touching the database or Nominatim:
+
+- names are folded (accents, case, punctuation) and stripped of "Comune di"
+  style prefixes, so "Comune di Forlì" and "forli" share a key
+- prefix matches on the full name or on any of its words come from a sorted
+  key list (bisect); postal codes are keys too, so "201" finds 20121...
+- when prefixes are not enough, trigram similarity ranks fuzzy candidates
+  ("Milnao" -> "Milano")
+
+Ties are broken by kind (municipality, postal code, zone) and population, so
+"San" ranks the large San* municipalities first.
+
+The index is rebuilt from the database once older than
+SEARCH_INDEX_TTL_SECONDS. The rebuild runs in a background thread while the
+previous index keeps answering.
+"""
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.geography import Municipality, OMIZone, Province
+
+logger = logging.getLogger(__name__)
+
+KIND_MUNICIPALITY = "municipality"
+KIND_POSTAL_CODE = "postal_code"
+KIND_OMI_ZONE = "omi_zone"
+KINDS = (KIND_MUNICIPALITY, KIND_POSTAL_CODE, KIND_OMI_ZONE)
+_KIND_RANK = {kind: rank for rank, kind in enumerate(KINDS)}
+
+# Match scores (0-1)
+SCORE_EXACT = 1.0
+SCORE_PREFIX = 0.9
+SCORE_WORD_PREFIX = 0.75
+FUZZY_WEIGHT = 0.6
+MIN_FUZZY_SIMILARITY = 0.7
+FUZZY_CANDIDATES = 50  # Entries sharing the most trigrams, re-scored exactly
+FUZZY_MAX_POSTINGS = 1000  # Trigrams this common ("  s") are skipped when gathering candidates
+
+# Upper bound on keys scanned for one prefix (a single letter matches thousands)
+MAX_PREFIX_SCAN = 5000
+# Results for prefixes this short are memoized per index (they scan the most keys)
+MEMO_PREFIX_LENGTH = 3
+MEMO_MAX_ENTRIES = 10000
+
+_NAME_PREFIXES = ("comune di ", "municipio di ", "citta di ")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation to single spaces."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    ascii_text = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    return _NON_ALNUM.sub(" ", ascii_text).strip()
+
+
+def normalize_name(text: str) -> str:
+    """Search key for a place name: folded, without a "Comune di" prefix."""
+    folded = fold(text)
+    for prefix in _NAME_PREFIXES:
+        if folded.startswith(prefix):
+            return folded[len(prefix):].strip()
+    return folded
+
+
+def trigrams(key: str) -> Set[str]:
+    """pg_trgm-style trigrams: each word padded with two leading and one trailing space."""
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """One searchable label (a municipality, one of its postal codes, or an OMI zone)."""
+    kind: str
+    id: int  # municipality id, or zone id for OMI zones
+    label: str
+    key: str
+    municipality_id: int
+    municipality_name: str
+    code: Optional[str] = None  # ISTAT code, or zone code for OMI zones
+    province_name: Optional[str] = None
+    postal_code: Optional[str] = None
+    population: int = 0
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+class SearchIndex:
+    """Immutable in-memory index; build a new one to refresh."""
+
+    def __init__(self, entries: Sequence[IndexEntry]):
+        self.entries = list(entries)
+        self.built_at = time.monotonic()
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+        self._trigrams: Dict[str, List[int]] = defaultdict(list)
+        self._gram_counts: List[int] = []
+        self._memo: Dict[tuple, List[Tuple[IndexEntry, float]]] = {}
+
+        keyed: List[Tuple[str, bool, int]] = []
+        for i, entry in enumerate(self.entries):
+            self._exact[entry.key].append(i)
+            words = entry.key.split()
+            # The full key plus every word-suffix ("reggio nell emilia" -> "emilia")
+            for start in range(len(words)):
+                keyed.append((" ".join(words[start:]), start > 0, i))
+            grams = trigrams(entry.key) if entry.kind != KIND_POSTAL_CODE else set()
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._trigrams[gram].append(i)
+        keyed.sort()
+        self._keys = [k for k, _, _ in keyed]
+        self._refs = [(inner, i) for _, inner, i in keyed]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.built_at
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        kinds: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[IndexEntry, float]]:
+        """Best matches for `query` as (entry, score) pairs, best first."""
+        key = normalize_name(query)
+        if not key:
+            return []
+        allowed = frozenset(kinds) if kinds else None
+        if len(key) > MEMO_PREFIX_LENGTH:
+            return self._search(key, limit, allowed)
+
+        memo_key = (key, limit, allowed)
+        matches = self._memo.get(memo_key)
+        if matches is None:
+            if len(self._memo) >= MEMO_MAX_ENTRIES:
+                self._memo.clear()
+            matches = self._memo[memo_key] = self._search(key, limit, allowed)
+        return matches
+
+    def _search(self, key: str, limit: int, allowed: Optional[frozenset]) -> List[Tuple[IndexEntry, float]]:
+        scores: Dict[int, float] = {}
+        exact = False
+
+        def offer(i: int, score: float) -> None:
+            if allowed is not None and self.entries[i].kind not in allowed:
+                return
+            if score > scores.get(i, 0.0):
+                scores[i] = score
+
+        # Exact and prefix matches (full name or any word)
+        position = bisect_left(self._keys, key)
+        end = min(len(self._keys), position + MAX_PREFIX_SCAN)
+        while position < end and self._keys[position].startswith(key):
+            inner, i = self._refs[position]
+            if self.entries[i].key == key:
+                exact = True
+                offer(i, SCORE_EXACT)
+            else:
+                offer(i, SCORE_WORD_PREFIX if inner else SCORE_PREFIX)
+            position += 1
+
+        # Typos: rank by similarity when prefixes found too little
+        if not exact and len(scores) < limit and len(key) >= 3 and not key.isdigit():
+            for i, similarity in self._similar(key):
+                offer(i, FUZZY_WEIGHT * similarity)
+
+        ranked = sorted(scores.items(), key=lambda item: self._rank(*item))
+        return [(self.entries[i], round(score, 3)) for i, score in ranked[:limit]]
+
+    def resolve(self, query: str) -> Optional[IndexEntry]:
+        """
+        Municipality that `query` names exactly (name or postal code), or None.
+        Homonyms resolve to the most populous municipality.
+        """
+        key = normalize_name(query)
+        candidates = [
+            self.entries[i] for i in self._exact.get(key, ())
+            if self.entries[i].kind in (KIND_MUNICIPALITY, KIND_POSTAL_CODE)
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda e: (_KIND_RANK[e.kind], -e.population, e.label))
+
+    def best_municipality(self, name: str, min_score: float = SCORE_WORD_PREFIX) -> Optional[IndexEntry]:
+        """Closest municipality for a free-text name, if it matches at least as well as `min_score`."""
+        matches = self.search(name, limit=1, kinds=(KIND_MUNICIPALITY,))
+        if matches and matches[0][1] >= min_score:
+            return matches[0][0]
+        return None
+
+    def _similar(self, key: str) -> List[Tuple[int, float]]:
+        """
+        Entries sharing the most trigrams with `key`, scored by the better of
+        trigram Jaccard (pg_trgm's similarity()) and an edit-based ratio,
+        which also catches transpositions ("milnao").
+        """
+        grams = trigrams(key)
+        postings = [self._trigrams.get(gram, ()) for gram in grams]
+        selective = [p for p in postings if len(p) <= FUZZY_MAX_POSTINGS] or postings
+        shared: Counter = Counter()
+        for posting in selective:
+            shared.update(posting)
+        results = []
+        for i, common in shared.most_common(FUZZY_CANDIDATES):
+            jaccard = common / (len(grams) + self._gram_counts[i] - common)
+            similarity = max(jaccard, SequenceMatcher(None, key, self.entries[i].key).ratio())
+            if similarity >= MIN_FUZZY_SIMILARITY:
+                results.append((i, similarity))
+        return results
+
+    def _rank(self, i: int, score: float) -> tuple:
+        entry = self.entries[i]
+        return (-score, _KIND_RANK[entry.kind], -entry.population, entry.label)
+
+    @classmethod
+    def from_database(cls, db: Session) -> "SearchIndex":
+        """Load every municipality, postal code and named OMI zone."""
+        municipalities = (
+            db.query(
+                Municipality.id,
+                Municipality.name,
+                Municipality.code,
+                Municipality.postal_codes,
+                Municipality.population,
+                Province.name.label("province_name"),
+                func.ST_Y(Municipality.centroid).label("latitude"),
+                func.ST_X(Municipality.centroid).label("longitude"),
+            )
+            .outerjoin(Province, Municipality.province_id == Province.id)
+            .all()
+        )
+        zones = (
+            db.query(
+                OMIZone.id,
+                OMIZone.zone_code,
+                OMIZone.zone_name,
+                OMIZone.municipality_id,
+                func.ST_Y(OMIZone.centroid).label("latitude"),
+                func.ST_X(OMIZone.centroid).label("longitude"),
+            )
+            .filter(OMIZone.zone_name.isnot(None))
+            .all()
+        )
+        return cls(build_entries(municipalities, zones))
+
+
+def build_entries(municipalities: Iterable, zones: Iterable) -> List[IndexEntry]:
+    """Index entries from municipality and zone rows (see SearchIndex.from_database)."""
+    entries: List[IndexEntry] = []
+    by_id = {}
+    for row in municipalities:
+        by_id[row.id] = row
+        common = dict(
+            id=row.id,
+            municipality_id=row.id,
+            municipality_name=row.name,
+            code=row.code,
+            province_name=row.province_name,
+            population=row.population or 0,
+            latitude=row.latitude,
+            longitude=row.longitude,
+        )
+        entries.append(IndexEntry(kind=KIND_MUNICIPALITY, label=row.name, key=normalize_name(row.name), **common))
+        for postal_code in (row.postal_codes or "").split(","):
+            postal_code = postal_code.strip()
+            if postal_code:
+                entries.append(IndexEntry(
+                    kind=KIND_POSTAL_CODE,
+                    label=f"{postal_code} {row.name}",
+                    key=postal_code,
+                    postal_code=postal_code,
+                    **common,
+                ))
+
+    for row in zones:
+        key = normalize_name(row.zone_name)
+        municipality = by_id.get(row.municipality_id)
+        if not key or municipality is None:
+            continue
+        entries.append(IndexEntry(
+            kind=KIND_OMI_ZONE,
+            id=row.id,
+            label=row.zone_name,
+            key=key,
+            municipality_id=row.municipality_id,
+            municipality_name=municipality.name,
+            code=row.zone_code,
+            province_name=municipality.province_name,
+            population=municipality.population or 0,
+            latitude=row.latitude,
+            longitude=row.longitude,
+        ))
+    return entries
+
+
+# =============================================================================
+# SHARED INSTANCE
+# =============================================================================
+
+_index: Optional[SearchIndex] = None
+_build_lock = threading.Lock()
+_refreshing = False
+
+
+def get_search_index(db: Session) -> SearchIndex:
+    """
+    The process-wide index. Built synchronously on first use; when it is older
+    than SEARCH_INDEX_TTL_SECONDS the current one is returned and a rebuild
+    starts in the background.
+    """
+    index = _index
+    if index is None:
+        with _build_lock:
+            if _index is None:
+                _set_index(SearchIndex.from_database(db))
+            return _index
+    if index.age_seconds > settings.SEARCH_INDEX_TTL_SECONDS:
+        _refresh_in_background(db.get_bind())
+    return index
+
+
+def invalidate_search_index() -> None:
+    """Drop the index; the next lookup rebuilds it (e.g. after ingestion)."""
+    global _index
+    _index = None
+
+
+def _set_index(index: SearchIndex) -> None:
+    global _index
+    _index = index
+    logger.info(f"Search index built: {len(index)} entries")
+
+
+def _refresh_in_background(bind) -> None:
+    global _refreshing
+    with _build_lock:
+        if _refreshing:
+            return
+        _refreshing = True
+
+    def rebuild():
+        global _refreshing
+        try:
+            with Session(bind=bind) as db:
+                _set_index(SearchIndex.from_database(db))
+        except Exception as e:
+            logger.error(f"Search index refresh failed: {e}")
+            if _index is not None:
+                _index.built_at = time.monotonic()  # retry after another TTL
+        finally:
+            _refreshing = False
+
+    threading.Thread(target=rebuild, name="search-index-refresh", daemon=True).start()
@@ -0,0 +1,223 @@
+"""
+Spatial Index - In-process point-in-polygon lookup for municipalities and OMI zones.
+
+Resolving coordinates used to send one `ST_Contains` query per layer to
+PostGIS on every search. The polygons change only when geometry is
+ingested, so they are loaded once into a shapely STRtree:
+
+- the tree narrows a point down to the few polygons whose bounding box
+  contains it
+- those candidates are tested with `shapely.intersects_xy` on prepared
+  geometries, so a lookup takes microseconds and no database round-trip
+- the answers match the PostGIS fallback (ST_Intersects on the subdivided
+  boundaries, ORDER BY parent_area): a point on a boundary belongs to the
+  polygons it touches, and the smallest of them wins (lowest id on a tie)
+
+The index is built in a background thread on first use; until it is ready
+(or with SPATIAL_INDEX_ENABLED off, or if the build failed)
+`get_spatial_index` returns None and callers keep using PostGIS.
+
+Freshness: geometry ingestors call `invalidate_spatial_index()` when they
+finish. Other writers (another process, a manual import) are noticed by a
+cheap signature query (row count and latest `updated_at` per table) run in
+the background every SPATIAL_INDEX_CHECK_SECONDS; the index is rebuilt only
+when the signature changed.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.geography import Municipality, OMIZone
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Area:
+    """A polygon of the index (municipality or OMI zone) without its geometry."""
+    id: int
+    code: Optional[str]
+    name: Optional[str]
+    municipality_id: Optional[int] = None
+
+
+class PolygonLayer:
+    """STRtree over one layer of prepared polygons."""
+
+    def __init__(self, areas: Sequence[Area], geometries: Sequence):
+        self.areas = list(areas)
+        self.geometries = np.asarray(geometries, dtype=object)
+        shapely.prepare(self.geometries)
+        self._area_sizes = shapely.area(self.geometries) if len(self.areas) else np.empty(0)
+        self._tree = STRtree(self.geometries)
+
+    def __len__(self) -> int:
+        return len(self.areas)
+
+    def locate(self, latitude: float, longitude: float) -> Optional[Area]:
+        """The smallest area containing or touching the point, or None."""
+        candidates = self._tree.query(shapely.points(longitude, latitude))
+        if len(candidates) == 0:
+            return None
+        hits = candidates[shapely.intersects_xy(self.geometries[candidates], longitude, latitude)]
+        if len(hits) == 0:
+            return None
+        if len(hits) > 1:
+            # Smallest area first, then lowest id (lexsort: last key is primary)
+            ids = [self.areas[hit].id for hit in hits]
+            hits = hits[np.lexsort((ids, self._area_sizes[hits]))]
+        return self.areas[hits[0]]
+
+
+class SpatialIndex:
+    """Immutable municipality and OMI zone layers; build a new one to refresh."""
+
+    def __init__(self, municipalities: PolygonLayer, zones: PolygonLayer, signature: Tuple = ()):
+        self.municipalities = municipalities
+        self.zones = zones
+        self.signature = signature
+        self.checked_at = time.monotonic()
+
+    def municipality_at(self, latitude: float, longitude: float) -> Optional[Area]:
+        return self.municipalities.locate(latitude, longitude)
+
+    def zone_at(self, latitude: float, longitude: float) -> Optional[Area]:
+        return self.zones.locate(latitude, longitude)
+
+    @classmethod
+    def from_database(cls, db: Session) -> "SpatialIndex":
+        """Load every municipality and OMI zone polygon."""
+        signature = geometry_signature(db)
+        municipality_rows = (
+            db.query(
+                Municipality.id,
+                Municipality.code,
+                Municipality.name,
+                func.ST_AsBinary(Municipality.geometry).label("wkb"),
+            )
+            .filter(Municipality.geometry.isnot(None))
+            .all()
+        )
+        zone_rows = (
+            db.query(
+                OMIZone.id,
+                OMIZone.zone_code,
+                OMIZone.zone_name,
+                OMIZone.municipality_id,
+                func.ST_AsBinary(OMIZone.geometry).label("wkb"),
+            )
+            .filter(OMIZone.geometry.isnot(None))
+            .all()
+        )
+        municipalities = _layer(
+            [Area(row.id, row.code, row.name) for row in municipality_rows],
+            [row.wkb for row in municipality_rows],
+        )
+        zones = _layer(
+            [Area(row.id, row.zone_code, row.zone_name, row.municipality_id) for row in zone_rows],
+            [row.wkb for row in zone_rows],
+        )
+        return cls(municipalities, zones, signature)
+
+
+def _layer(areas: List[Area], wkbs: List) -> PolygonLayer:
+    geometries = shapely.from_wkb([bytes(wkb) for wkb in wkbs]) if wkbs else []
+    return PolygonLayer(areas, geometries)
+
+
+def geometry_signature(db: Session) -> Tuple:
+    """Changes whenever polygons are added, removed or updated through the ORM."""
+    signature = []
+    for model in (Municipality, OMIZone):
+        count, latest = db.query(func.count(model.geometry), func.max(model.updated_at)).one()
+        signature.extend((count, latest))
+    return tuple(signature)
+
+
+_index: Optional[SpatialIndex] = None
+_lock = threading.Lock()
+_busy = False
+_failed_at: Optional[float] = None
+# Bumped by invalidate_spatial_index(): a build started before is discarded
+_generation = 0
+
+
+def get_spatial_index(db: Session) -> Optional[SpatialIndex]:
+    """
+    The process-wide index, or None while it is being built (callers fall
+    back to PostGIS). The first call starts the build in the background.
+    """
+    if not settings.SPATIAL_INDEX_ENABLED:
+        return None
+    index = _index
+    if index is None:
+        if _failed_at is None or time.monotonic() - _failed_at > settings.SPATIAL_INDEX_CHECK_SECONDS:
+            _refresh_in_background(db.get_bind())
+    elif time.monotonic() - index.checked_at > settings.SPATIAL_INDEX_CHECK_SECONDS:
+        _refresh_in_background(db.get_bind())
+    return index
+
+
+def load_spatial_index(db: Session) -> SpatialIndex:
+    """Build the index now and make it the process-wide one."""
+    index = SpatialIndex.from_database(db)
+    _install(index, _generation)
+    return index
+
+
+def invalidate_spatial_index() -> None:
+    """Drop the index (e.g. after geometry ingestion); the next lookup rebuilds it."""
+    global _index, _generation, _failed_at
+    with _lock:
+        _generation += 1
+        _index = None
+        _failed_at = None
+
+
+def _install(index: SpatialIndex, generation: int) -> None:
+    global _index
+    with _lock:
+        if generation != _generation:
+            return  # invalidated while building: the data may already be stale
+        _index = index
+    logger.info(
+        f"Spatial index built: {len(index.municipalities)} municipalities, {len(index.zones)} OMI zones"
+    )
+
+
+def _refresh_in_background(bind) -> None:
+    global _busy
+    with _lock:
+        if _busy:
+            return
+        _busy = True
+        generation = _generation
+        current = _index
+
+    def refresh():
+        global _busy, _failed_at
+        try:
+            with Session(bind=bind) as db:
+                if current is not None and geometry_signature(db) == current.signature:
+                    current.checked_at = time.monotonic()
+                    return
+                _install(SpatialIndex.from_database(db), generation)
+        except Exception as e:
+            logger.error(f"Spatial index build failed: {e}")
+            _failed_at = time.monotonic()
+            if current is not None:
+                current.checked_at = time.monotonic()  # retry after another interval
+        finally:
+            _busy = False
+
+    threading.Thread(target=refresh, name="spatial-index-refresh", daemon=True).start()
@@ -1,7 +1,5 @@
 import os
 import sys
-import time
-import requests
 from sqlalchemy import text, desc
 
 # Add /app to path since we are in /app/data
@@ -9,43 +7,12 @@ sys.path.append('/app')
 
 from app.core.database import SessionLocal
 from app.models.geography import Municipality, Province, Region
+from app.services.geocoding import GeocodingService
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-NOMINATIM_URL = "https://nominatim.openstreetmap.org"
-USER_AGENT = "safesquare-mvp-geocoder-v2/1.0"
-
-def geocode_municipality(name, province_name, region_name):
-    """Geocode a municipality using Nominatim API"""
-    query = f"{name}, {province_name}, {region_name}, Italy"
-    params = {
-        'q': query,
-        'format': 'json',
-        'limit': 1
-    }
-    headers = {
-        'User-Agent': USER_AGENT
-    }
-    
-    try:
-        response = requests.get(f"{NOMINATIM_URL}/search", params=params, headers=headers)
-        # Nominatim policy: 1 request per second
-        time.sleep(1.2)
-        
-        if response.status_code == 200:
-            results = response.json()
-            if results:
-                result = results[0]
-                lat = float(result['lat'])
-                lon = float(result['lon'])
-                return lat, lon
-    except Exception as e:
-        logger.error(f"Geocoding error for {name}: {e}")
-    
-    return None, None
-
 def run_mvp_geocoding():
     db = SessionLocal()
     try:
@@ -65,29 +32,31 @@ def run_mvp_geocoding():
         
         logger.info(f"Found {len(lazio_munis)} Lazio municipalities and {len(lombardia_munis)} Lombardia municipalities without centroids")
         
-        updated = 0
-        for i, muni in enumerate(municipalities, 1):
+        # One batch through the configured geocoder (cached, rate limited)
+        addresses = {}
+        for muni in municipalities:
             province_name = muni.province.name if muni.province else ""
             region_name = muni.province.region.name if muni.province and muni.province.region else ""
+            addresses[muni.id] = f"{muni.name}, {province_name}, {region_name}"
+        results = GeocodingService().geocode_batch(addresses.values(), country="Italy")
+        
+        updated = 0
+        for i, muni in enumerate(municipalities, 1):
+            result = results.get(addresses[muni.id])
             
-            logger.info(f"[{i}/{len(municipalities)}] Geocoding {muni.name}, {province_name} ({region_name})...")
-            
-            lat, lon = geocode_municipality(muni.name, province_name, region_name)
-            
-            if lat and lon:
+            if result:
                 db.execute(
                     text("""
                         UPDATE municipalities 
                         SET centroid = ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)
                         WHERE id = :id
                     """),
-                    {"lon": lon, "lat": lat, "id": muni.id}
+                    {"lon": result['longitude'], "lat": result['latitude'], "id": muni.id}
                 )
-                db.commit()
                 updated += 1
-                logger.info(f"  ✓ Updated")
             else:
-                logger.warning(f"  ✗ Failed")
+                logger.warning(f"  ✗ Failed: {addresses[muni.id]}")
+        db.commit()
                 
         logger.info(f"Priority geocoding complete. Updated {updated} MVP locations.")
     finally:
@@ -0,0 +1,125 @@
+"""
+Benchmark: Pydantic + default JSON encoder vs. the fast (row dict + orjson) path.
+
+Builds synthetic payloads shaped like /locations/discover (150 municipalities)
+and /scores/municipality/{id}/omi-zones (zones with MultiPolygon geometry) and
+measures CPU time per request for both serialization paths. No database needed.
+
+Usage:
+    python scripts/benchmark_json_serialization.py [--zones 60] [--vertices 400] [--runs 200]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from typing import List
+
+from app.api.schemas.location import MunicipalityResponse
+from app.api.schemas.score import OMIZoneScoreResponse, score_category
+from app.core.serialization import FastJSONResponse, ORJSON_AVAILABLE, schema_defaults
+
+
+def make_municipality_rows(n):
+    rows = []
+    for i in range(n):
+        row = schema_defaults(MunicipalityResponse)
+        row.update(
+            id=i,
+            name=f"Comune {i}",
+            code=str(i).zfill(6),
+            province_name="Milano",
+            region_name="Lombardia",
+            population=random.randint(500, 1_000_000),
+            area_sqkm=random.uniform(5, 500),
+            postal_codes="20121,20122,20123",
+            investment_score=round(random.uniform(1, 10), 1),
+            coordinates={"latitude": 45 + random.random(), "longitude": 9 + random.random()},
+        )
+        rows.append(row)
+    return rows
+
+
+def make_polygon(vertices):
+    cx, cy = 12.0 + random.random(), 41.0 + random.random()
+    ring = [
+        [cx + 0.01 * math.cos(2 * math.pi * k / vertices), cy + 0.01 * math.sin(2 * math.pi * k / vertices)]
+        for k in range(vertices)
+    ]
+    ring.append(ring[0])
+    return {"type": "MultiPolygon", "coordinates": [[ring]]}
+
+
+def make_zone_rows(n, vertices):
+    rows = []
+    for i in range(n):
+        score = round(random.uniform(1, 10), 1)
+        rows.append({
+            "zone_id": i,
+            "zone_code": f"B{i}",
+            "zone_name": f"Zona {i}",
+            "zone_type": "Centro",
+            "municipality_id": 1,
+            "overall_score": score,
+            "score_category": score_category(score),
+            "confidence": 0.8,
+            "centroid": {"latitude": 41.9, "longitude": 12.5},
+            "geometry": make_polygon(vertices),
+        })
+    return rows
+
+
+def default_path(rows, schema):
+    """What FastAPI does for a plain list return value with response_model=List[schema]."""
+    adapter = TypeAdapter(List[schema])
+    validated = adapter.validate_python(rows)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def fast_path(rows):
+    return FastJSONResponse(rows).body
+
+
+def cpu_per_call(fn, runs):
+    start = time.process_time()
+    for _ in range(runs):
+        fn()
+    return (time.process_time() - start) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--municipalities", type=int, default=150)
+    parser.add_argument("--zones", type=int, default=60)
+    parser.add_argument("--vertices", type=int, default=400)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(42)
+    print(f"orjson available: {ORJSON_AVAILABLE}")
+
+    cases = [
+        ("discover", make_municipality_rows(args.municipalities), MunicipalityResponse),
+        ("omi-zones", make_zone_rows(args.zones, args.vertices), OMIZoneScoreResponse),
+    ]
+    for name, rows, schema in cases:
+        slow = cpu_per_call(lambda: default_path(rows, schema), args.runs)
+        fast = cpu_per_call(lambda: fast_path(rows), args.runs)
+        size_kb = len(fast_path(rows)) / 1024
+        print(
+            f"{name:<10} payload={size_kb:8.1f} KB  default={slow:8.3f} ms  "
+            f"fast={fast:8.3f} ms  speedup={slow / fast if fast else float('inf'):5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,7 @@ import sys
 import os
 import logging
 from app.core.database import SessionLocal
+from app.core.tracing import script_span
 from app.data_pipeline.ingestion.cadastral import CadastralIngestor
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -49,4 +50,5 @@ if __name__ == "__main__":
     if len(sys.argv) < 2:
         print(__doc__)
         sys.exit(1)
-    run(sys.argv[1])
+    with script_span("ingest.cadastral_maps"):
+        run(sys.argv[1])
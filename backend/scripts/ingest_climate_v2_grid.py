@@ -6,6 +6,7 @@ import logging
 from typing import List, Dict
 from sqlalchemy import func
 from app.core.database import SessionLocal
+from app.core.tracing import script_span
 from app.models.geography import Municipality
 from app.data_pipeline.ingestion.open_meteo_climate import OpenMeteoClimateIngestor
 
@@ -68,4 +69,5 @@ def run_grid_ingestion():
         db.close()
 
 if __name__ == "__main__":
-    run_grid_ingestion()
+    with script_span("ingest.climate_v2_grid"):
+        run_grid_ingestion()
@@ -1,6 +1,7 @@
 import sys
 import os
 from app.core.database import SessionLocal
+from app.core.tracing import script_span
 from app.data_pipeline.ingestion.istat_demographics import ISTATDemographicsIngestor
 import logging
 
@@ -22,9 +23,7 @@ def run():
         ingestor = ISTATDemographicsIngestor(db)
         logger.info(f"Starting Demographics Expansion from {source_path}...")
         
-        raw_data = ingestor.fetch(source_path)
-        transformed_data = ingestor.transform(raw_data)
-        count = ingestor.load(transformed_data)
+        count = ingestor.run(source_path)
         
         logger.info(f"Demographics expansion finished successfully. Records added: {count}")
     except Exception as e:
@@ -36,4 +35,5 @@ def run():
         db.close()
 
 if __name__ == "__main__":
-    run()
+    with script_span("ingest.demographics_full"):
+        run()
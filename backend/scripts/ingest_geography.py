@@ -1,5 +1,6 @@
 import sys
 from app.core.database import SessionLocal
+from app.core.tracing import script_span
 from app.data_pipeline.ingestion.istat_geography import ISTATGeographyIngestor
 import logging
 
@@ -14,9 +15,7 @@ def run():
         logger.info("Starting Geography Baseline Ingestion (ISTAT)...")
         
         # Execute ETL
-        raw_data = ingestor.fetch()
-        transformed_data = ingestor.transform(raw_data)
-        count = ingestor.load(transformed_data)
+        count = ingestor.run(None)
         
         logger.info(f"Geography ingestion finished successfully. Records added: {count}")
     except Exception as e:
@@ -26,4 +25,5 @@ def run():
         db.close()
 
 if __name__ == "__main__":
-    run()
+    with script_span("ingest.geography"):
+        run()
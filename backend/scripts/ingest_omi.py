@@ -1,6 +1,7 @@
 import sys
 import os
 from app.core.database import SessionLocal
+from app.core.tracing import script_span
 from app.data_pipeline.ingestion.omi import OMIIngestor
 import logging
 
@@ -24,9 +25,7 @@ def run():
         logger.info(f"Starting OMI Ingestion from {source_path}...")
         
         # Execute ETL (using the record count from load)
-        raw_data = ingestor.fetch(source_path)
-        transformed_data = ingestor.transform(raw_data)
-        count = ingestor.load(transformed_data)
+        count = ingestor.run(source_path)
         
         logger.info(f"OMI ingestion finished successfully. Price records added: {count}")
     except Exception as e:
@@ -38,4 +37,5 @@ def run():
         db.close()
 
 if __name__ == "__main__":
-    run()
+    with script_span("ingest.omi"):
+        run()
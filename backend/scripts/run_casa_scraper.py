@@ -28,6 +28,7 @@ from app.scrapers.casa_scraper import CasaScraper
 from app.scrapers.listing_ingestor import ListingIngestor
 from app.models.geography import Municipality
 from app.core.database import SessionLocal
+from app.core.tracing import run_in_context, script_span, traced
 from sqlalchemy import func
 
 
@@ -186,6 +187,7 @@ def get_municipalities(municipality_names: List[str] = None, all_italy: bool = F
     return municipalities
 
 
+@traced("scraper.municipality")
 def scrape_single_municipality(
     municipality: Municipality,
     max_listings: int,
@@ -391,7 +393,7 @@ def main():
         with ThreadPoolExecutor(max_workers=args.workers) as executor:
             futures = {
                 executor.submit(
-                    scrape_single_municipality,
+                    run_in_context(scrape_single_municipality),
                     m,
                     args.max_listings_per_city,
                     checkpoint_mgr,
@@ -474,4 +476,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with script_span("scraper.casa"):
+        main()
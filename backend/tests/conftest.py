@@ -14,8 +14,12 @@ from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 
 from app.models.base import Base
-from app.core.database import get_db
+from app.core.database import get_db, get_heavy_db
 from app.main import app
+from app.services.parcel_lookup import parcel_cache
+from app.services.score_jobs import job_runner
+from app.services.search_index import invalidate_search_index
+from app.services.spatial_index import invalidate_spatial_index
 
 # Import all models to ensure they are registered with Base.metadata
 from app.models import geography, property, demographics, risk, score, listing
@@ -38,10 +42,17 @@ def engine():
 
 
 @pytest.fixture(scope="function")
-def db_session(engine):
+def db_session(engine, monkeypatch):
     """Create database session for tests with automatic rollback."""
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     session = TestingSessionLocal()
+    # The autocomplete and spatial indexes and the parcel cache are process-wide:
+    # rebuild them from this test's data
+    invalidate_search_index()
+    invalidate_spatial_index()
+    parcel_cache.clear()
+    # Score job workers open their own sessions: point them at the test database
+    monkeypatch.setattr(job_runner, "bind", engine)
     yield session
     session.rollback()
     session.close()
@@ -57,6 +68,7 @@ def client(db_session):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_heavy_db] = override_get_db
     
     with TestClient(app) as test_client:
         yield test_client
@@ -64,6 +76,18 @@ def client(db_session):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def query_budget():
+    """
+    Assert an upper bound on SQL statements for a block:
+
+        with query_budget(3):
+            client.get("/api/v1/...")
+    """
+    from app.core.query_tracking import query_budget as budget
+    return budget
+
+
 @pytest.fixture
 def sample_region(db_session):
     """Create sample region for testing."""
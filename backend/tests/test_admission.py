@@ -0,0 +1,68 @@
+"""
+Tests for admission control on expensive endpoints.
+"""
+
+import threading
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.admission import AdmissionLimiter
+
+
+def test_limiter_admits_up_to_limit_then_sheds_when_queue_full():
+    limiter = AdmissionLimiter("test", max_concurrent=2, max_queue=0, queue_timeout=0.1)
+    limiter.acquire()
+    limiter.acquire()
+
+    with pytest.raises(HTTPException) as exc:
+        limiter.acquire()
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
+    assert limiter.stats() == {"active": 2, "waiting": 0, "shed": 1, "limit": 2}
+
+
+def test_queued_request_times_out():
+    limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=5, queue_timeout=0.05)
+    limiter.acquire()
+    with pytest.raises(HTTPException) as exc:
+        limiter.acquire()
+    assert exc.value.status_code == 503
+    assert limiter.waiting == 0
+
+
+def test_queued_request_gets_released_slot():
+    limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=1, queue_timeout=5)
+    limiter.acquire()
+    admitted = threading.Event()
+
+    def waiter():
+        with limiter.slot():
+            admitted.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    assert not admitted.wait(0.05)
+    limiter.release()
+    thread.join(1)
+    assert admitted.is_set()
+    assert limiter.active == 0
+
+
+def test_dependency_returns_503_with_retry_after():
+    limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=0, queue_timeout=2)
+    app = FastAPI()
+
+    @app.get("/heavy")
+    def heavy(_: None = Depends(limiter.admit)):
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/heavy").status_code == 200
+    assert limiter.active == 0
+
+    limiter.acquire()
+    response = client.get("/heavy")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
@@ -81,3 +81,129 @@ def test_get_provinces(client, sample_province):
     data = response.json()
     assert len(data) > 0
     assert any(p["name"] == "Test Province" for p in data)
+
+
+def test_get_municipalities_batch_preserves_request_order(client, sample_municipality):
+    """Batch lookup answers every id in request order, with nulls for unknown ids."""
+    response = client.post(
+        "/api/v1/locations/municipalities/batch",
+        json={"ids": [99999, sample_municipality.id, 99999]},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["name"] if r else None for r in data["results"]] == [None, "Test City", None]
+    assert data["results"][1]["province_code"] == "TP01"
+    assert data["missing_ids"] == [99999]
+
+
+def test_get_municipalities_batch_rejects_empty_list(client):
+    """Batch lookup requires at least one id."""
+    response = client.post("/api/v1/locations/municipalities/batch", json={"ids": []})
+    assert response.status_code == 422
+
+
+def test_get_scores_batch_reports_missing(client, sample_municipality):
+    """Municipalities without a stored score are listed in missing_ids."""
+    response = client.post("/api/v1/scores/batch", json={"ids": [sample_municipality.id]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["results"] == [None]
+    assert data["missing_ids"] == [sample_municipality.id]
+
+
+def test_location_dashboard_selected_sections(client, sample_municipality):
+    """Dashboard returns only the requested sections and reports missing data."""
+    response = client.get(
+        f"/api/v1/locations/{sample_municipality.id}/dashboard",
+        params={"sections": "demographics,statistics"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["municipality"]["name"] == "Test City"
+    assert data["sections"] == ["demographics", "statistics"]
+    assert data["statistics"]["location_name"] == "Test City"
+    assert data["demographics"] is None
+    assert "demographics" in data["errors"]
+    assert data["risks"] is None and "risks" not in data["errors"]
+
+
+def test_location_dashboard_score_section_uses_heavy_pool(monkeypatch):
+    """An unscored municipality is calculated on the heavy pool, not the request pool."""
+    from sqlalchemy import create_engine
+    from app.api.v1.endpoints import locations
+
+    seen = {}
+
+    def fake_score(id, db, heavy_db):
+        seen.update(light=db.get_bind(), heavy=heavy_db.get_bind())
+        return {"municipality_id": id}
+
+    monkeypatch.setattr(locations, "get_municipality_score", fake_score)
+    light, heavy = create_engine("sqlite://"), create_engine("sqlite://")
+    assert locations._load_dashboard_section("score", 7, light, heavy) == {"municipality_id": 7}
+    assert seen == {"light": light, "heavy": heavy}
+
+
+def test_location_dashboard_unknown_section(client, sample_municipality):
+    """Unknown section names are rejected."""
+    response = client.get(
+        f"/api/v1/locations/{sample_municipality.id}/dashboard",
+        params={"sections": "score,weather"},
+    )
+    assert response.status_code == 400
+
+
+def test_location_dashboard_not_found(client):
+    """Dashboard for a missing municipality returns 404."""
+    response = client.get("/api/v1/locations/99999/dashboard")
+    assert response.status_code == 404
+
+
+def test_list_municipalities_cursor_pagination(client, db_session, sample_province):
+    """Cursor pages are disjoint and follow the requested sort order."""
+    for i, population in enumerate([5000, 20000, 12000]):
+        db_session.add(Municipality(
+            name=f"Paging City {i}", code=f"0990{i}", province_id=sample_province.id, population=population
+        ))
+    db_session.commit()
+
+    params = {"province_id": sample_province.id, "sort_by": "population", "order": "desc", "limit": 2}
+    first = client.get("/api/v1/locations/municipalities", params=params)
+    assert first.status_code == 200
+    assert [m["population"] for m in first.json()] == [20000, 12000]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get("/api/v1/locations/municipalities", params={**params, "cursor": cursor})
+    assert [m["population"] for m in second.json()] == [5000]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_list_municipalities_population_sort_keeps_nulls_last(client, db_session, sample_province):
+    """Municipalities without a population are listed after the others, across pages."""
+    for i, population in enumerate([None, 8000, None, 3000]):
+        db_session.add(Municipality(
+            name=f"Null City {i}", code=f"0980{i}", province_id=sample_province.id, population=population
+        ))
+    db_session.commit()
+
+    for order, expected in [("desc", [8000, 3000, None, None]), ("asc", [3000, 8000, None, None])]:
+        params = {"province_id": sample_province.id, "sort_by": "population", "order": order, "limit": 1}
+        populations = []
+        response = client.get("/api/v1/locations/municipalities", params=params)
+        while True:
+            assert response.status_code == 200
+            populations += [m["population"] for m in response.json()]
+            if "X-Next-Cursor" not in response.headers:
+                break
+            cursor = response.headers["X-Next-Cursor"]
+            response = client.get("/api/v1/locations/municipalities", params={**params, "cursor": cursor})
+        assert populations == expected
+
+
+def test_list_municipalities_cursor_sort_mismatch(client, sample_municipality):
+    """A cursor issued for one sort order is rejected for another."""
+    from app.core.pagination import encode_cursor
+
+    cursor = encode_cursor("name", "asc", "Test City", sample_municipality.id)
+    response = client.get("/api/v1/locations/municipalities", params={"sort_by": "population", "cursor": cursor})
+    assert response.status_code == 400
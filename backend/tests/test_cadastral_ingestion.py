@@ -8,7 +8,8 @@ Unit tests
 Integration tests
 -----------------
 - Full ingestor pipeline with a synthetic GeoDataFrame (mocks fetch).
-- GET /locations/parcel endpoint: hit, miss, and OMI-linked cases.
+- GET /locations/parcel endpoint: hit, miss, and OMI-linked cases, nearest-parcel
+  fallback and the per-cell lookup cache.
 """
 
 import pytest
@@ -19,6 +20,8 @@ from unittest.mock import patch
 
 from app.models.geography import CadastralParcel, Municipality, OMIZone
 from app.data_pipeline.ingestion.cadastral import CadastralIngestor
+from app.core.cache import SimpleTTLCache
+from app.services.parcel_lookup import grid_cell
 
 
 # ---------------------------------------------------------------------------
@@ -273,3 +276,38 @@ class TestParcelEndpoint:
         """Coordinates outside valid range → 422 validation error."""
         resp = client.get("/api/v1/locations/parcel", params={"lat": 99, "lon": 0})
         assert resp.status_code == 422
+
+
+    def test_point_on_road_returns_nearest_parcel(self, client, ingested_parcel):
+        """~8 m east of the parcel edge → nearest match with its distance."""
+        resp = client.get("/api/v1/locations/parcel", params={"lat": 41.90, "lon": 12.5101})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["particella"] == "42"
+        assert body["match"] == "nearest"
+        assert 5 < body["distance_m"] < 12
+
+    def test_nearest_parcel_is_bounded(self, client, ingested_parcel):
+        """~80 m away is beyond the fallback radius → 404."""
+        resp = client.get("/api/v1/locations/parcel", params={"lat": 41.90, "lon": 12.511})
+        assert resp.status_code == 404
+
+    def test_lookups_are_cached_per_cell(self, client, ingested_parcel, query_budget):
+        """A second click in the same ~1 m cell is answered without queries."""
+        assert grid_cell(41.900001, 12.500001) == grid_cell(41.900002, 12.500002)
+        first = client.get("/api/v1/locations/parcel", params={"lat": 41.900001, "lon": 12.500001})
+        with query_budget(0):
+            second = client.get("/api/v1/locations/parcel", params={"lat": 41.900002, "lon": 12.500002})
+        assert second.json() == first.json()
+        assert first.json()["match"] == "contains"
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SimpleTTLCache("lru_test", max_entries=2)
+    cache.set("a", 1, 60)
+    cache.set("b", 2, 60)
+    cache.get("a")
+    cache.set("c", 3, 60)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
@@ -0,0 +1,136 @@
+"""
+Unit tests for response compression and the precompressed response cache.
+"""
+
+import gzip
+from typing import List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.api.schemas.score import OMIZoneScoreResponse
+from app.core.constants import RESPONSE_CACHE_MAX_ENTRIES
+from app.core.compression import (
+    CompressionMiddleware,
+    cached_json_response,
+    negotiate_encoding,
+    response_cache,
+    supported_encodings,
+)
+
+LARGE_PAYLOAD = {"features": [{"id": i, "name": "Zona centrale"} for i in range(200)]}
+
+
+def _make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    calls = {"build": 0}
+
+    @app.get("/large")
+    def large():
+        return JSONResponse(LARGE_PAYLOAD)
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"{i}\n".encode() for i in range(1000)), media_type="application/x-ndjson")
+
+    @app.get("/cached")
+    def cached(request: Request):
+        def build():
+            calls["build"] += 1
+            return [{"zone_id": 1, "zone_code": "B1", "municipality_id": 1, "overall_score": 7.2, "score_category": "Good"}]
+        return cached_json_response(request, "test:cached", 60, build, response_model=List[OMIZoneScoreResponse])
+
+    return app, calls
+
+
+def test_negotiate_encoding_honours_q_values():
+    assert negotiate_encoding(None) == "identity"
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0") == "identity"
+    assert negotiate_encoding("*;q=0.5") == supported_encodings()[0]
+    assert negotiate_encoding("br;q=0.1, gzip;q=0.9") == "gzip"
+
+
+def test_middleware_compresses_large_json_only():
+    app, _ = _make_app()
+    client = TestClient(app)
+
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == LARGE_PAYLOAD
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_middleware_compresses_streamed_responses():
+    app, _ = _make_app()
+    response = TestClient(app).get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text.splitlines()[-1] == "999"
+
+
+def test_cache_hit_serves_stored_bytes_without_rebuilding():
+    response_cache.clear()
+    app, calls = _make_app()
+    client = TestClient(app)
+
+    first = client.get("/cached", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/cached", headers={"Accept-Encoding": "gzip"})
+    assert calls["build"] == 1
+    assert second.headers["content-encoding"] == "gzip"
+    assert first.json() == second.json()
+    assert second.json()[0]["score_category"] == "Good"
+
+    entry = response_cache.get("test:cached")
+    assert gzip.decompress(entry.bodies["gzip"]) == entry.bodies["identity"]
+
+
+def test_response_cache_is_bounded():
+    assert response_cache.max_entries == RESPONSE_CACHE_MAX_ENTRIES
+
+
+def test_cache_hit_revalidates_with_etag():
+    response_cache.clear()
+    app, _ = _make_app()
+    client = TestClient(app)
+
+    etag = client.get("/cached").headers["etag"]
+    response = client.get("/cached", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_each_encoding_has_its_own_etag():
+    response_cache.clear()
+    app, _ = _make_app()
+    client = TestClient(app)
+
+    identity = client.get("/cached", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    gzipped = client.get("/cached", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    assert identity != gzipped
+    assert gzipped == identity[:-1] + '-gzip"'
+
+    # The identity validator does not revalidate the gzip representation
+    response = client.get("/cached", headers={"Accept-Encoding": "gzip", "If-None-Match": identity})
+    assert response.status_code == 200
+    response = client.get("/cached", headers={"Accept-Encoding": "gzip", "If-None-Match": f"W/{gzipped}"})
+    assert response.status_code == 304
+
+
+def test_middleware_merges_existing_vary():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    def large():
+        return JSONResponse(LARGE_PAYLOAD, headers={"Vary": "Origin"})
+
+    response = TestClient(app).get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers.get_list("vary") == ["Origin, Accept-Encoding"]
@@ -4,12 +4,16 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import Session
 from app.models.base import Base
 from app.data_pipeline.ingestion.base import BaseIngestor
+from app.data_pipeline.ingestion.istat_demographics import ISTATDemographicsIngestor
 from app.data_pipeline.ingestion.omi import OMIIngestor
+from app.data_pipeline.ingestion.risk import RiskIngestor
 from app.data_pipeline.manager import DataPipelineManager
+from app.data_pipeline.processing.normalizer import DataNormalizer
 from app.models.geography import OMIZone
-from app.models.property import PropertyPrice
+from app.models.property import PropertyPrice, PropertyType, TransactionType
 import pandas as pd
 import os
+import tracemalloc
 
 # Mock DB for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -50,8 +54,208 @@ def test_omi_ingestor_transform(db):
     assert transformed[0]["year"] == 2023
     assert transformed[0]["min_price"] == 1000
 
+def test_omi_transform_parses_whole_columns(db):
+    """Italian prices, midpoint averages, enum mapping and NaN defaults, column by column."""
+    ingestor = OMIIngestor(db)
+    df = pd.DataFrame({
+        "Zona_OMI": ["B1", None, "C2"],
+        "Codice_Comune": [58091.0, 1001.0, float("nan")],
+        "Anno": [2023, 2023, None],
+        "Semestre": [2, 2, None],
+        "Tipologia": ["Abitazioni civili", "Box", "Negozi"],
+        "Stato_Mercato": ["Vendita", "Vendita", "Locazione"],
+        "Valore_Minimo": ["1.200,50", "900", None],
+        "Valore_Massimo": ["2.000,00", "1000", "3000"],
+        "Valore_Medio": [None, None, "2500"],
+        "Stato_Conservazione": ["Ottimo", "Normale", None],
+    })
+
+    first, second = ingestor.transform(df)
+
+    assert first == {
+        "omi_zone_code": "B1",
+        "municipality_code": "058091",
+        "year": 2023,
+        "semester": 2,
+        "property_type": PropertyType.RESIDENTIAL,
+        "transaction_type": TransactionType.SALE,
+        "min_price": 1200.5,
+        "max_price": 2000.0,
+        "avg_price": 1600.25,
+        "property_state": "Ottimo",
+    }
+    assert second["omi_zone_code"] == "C2"
+    assert second["municipality_code"] == ""
+    assert (second["year"], second["semester"]) == (2022, 1)
+    assert second["property_type"] == PropertyType.COMMERCIAL
+    assert second["transaction_type"] == TransactionType.RENT
+    assert (second["min_price"], second["avg_price"]) == (0.0, 2500.0)
+    assert second["property_state"] == "Normale"
+
+
+def test_omi_transform_skips_unparseable_prices(db):
+    """Junk prices drop their row instead of becoming 0; absent columns still default to 0."""
+    ingestor = OMIIngestor(db)
+    df = pd.DataFrame({
+        "Zona_OMI": ["A1", "A2", "A3", "A4"],
+        "Valore_Minimo": ["n/d", "1000", "1000", "800"],
+        "Valore_Massimo": ["2000", "abc", "2000", None],
+        "Valore_Medio": [None, None, "-", None],
+    })
+
+    transformed = ingestor.transform(df)
+
+    assert [(r["omi_zone_code"], r["min_price"], r["max_price"], r["avg_price"]) for r in transformed] == [
+        ("A4", 800.0, 0.0, 400.0),
+    ]
+    without_prices = ingestor.transform(pd.DataFrame({"Zona_OMI": ["B1"]}))
+    assert (without_prices[0]["min_price"], without_prices[0]["avg_price"]) == (0.0, 0.0)
+
+
+def test_risk_transform_skips_unparseable_values(db):
+    """A junk score/PGA/area drops the row instead of becoming 0; missing values are 0."""
+    ingestor = RiskIngestor(db)
+    df = pd.DataFrame({
+        "Codice_Comune": [1001, 1002, 1003, 1004],
+        "Tipo_Rischio": ["Seismic", "Seismic", "Flood", "Seismic"],
+        "Livello": ["Alto", "Alto", "Medio", "Basso"],
+        "Score": ["n/d", 40, 30, None],
+        "PGA": [0.2, "?", None, 0.1],
+    })
+
+    transformed = ingestor.transform(df)
+
+    assert [(r["municipality_code"], r["score"], r["pga"], r["area_pct"]) for r in transformed] == [
+        ("001003", 30.0, 0.0, 0.0),
+        ("001004", 0.0, 0.1, 0.0),
+    ]
+
+
+def test_demographics_transform_skips_unparseable_values(db):
+    """Junk income or unemployment values drop the row instead of being stored as NaN."""
+    ingestor = ISTATDemographicsIngestor(db)
+    df = pd.DataFrame({
+        "Codice_Comune": [1001, 1002, 1003],
+        "Anno": [2023, 2023, 2023],
+        "Popolazione_Totale": [1000, 2000, 3000],
+        "Reddito_Medio": ["n/d", 21000, 23000],
+        "Tasso_Disoccupazione": [7.5, "abc", 6.0],
+    })
+
+    transformed = ingestor.transform(df)
+
+    assert [(r["municipality_code"], r["avg_income_euro"], r["unemployment_rate"]) for r in transformed] == [
+        ("001003", 23000.0, 6.0),
+    ]
+
+
+@pytest.mark.parametrize("values", [
+    ["1.234,56", " 12 € ", None, "", 1000, "abc", "3,5", "1.5"],
+    [1000.0, float("nan"), 2.5],
+])
+def test_normalize_prices_matches_scalar(values):
+    series = pd.Series(values, dtype=object if isinstance(values[0], str) else float)
+    assert DataNormalizer.normalize_prices(series).tolist() == [DataNormalizer.normalize_price(v) for v in series]
+
+
+@pytest.mark.parametrize("values", [
+    [58091.0, None, "058091", " 1001 ", "A1", "12.0"],
+    [1001.0, float("nan")],
+    ["1001", None],
+])
+def test_normalize_municipality_codes_matches_scalar(values):
+    series = pd.Series(values, dtype=object if any(isinstance(v, str) for v in values) else float)
+    assert DataNormalizer.normalize_municipality_codes(series).tolist() == [
+        DataNormalizer.normalize_municipality_code(v) for v in series
+    ]
+
+
+def test_map_categories_calls_mapper_once_per_value():
+    calls = []
+    def mapper(value):
+        calls.append(value)
+        return str(value).upper()
+
+    mapped = DataNormalizer.map_categories(pd.Series(["a", "b", None, "a", "b"]), mapper)
+
+    assert mapped.tolist() == ["A", "B", "NONE", "A", "B"]
+    assert sorted(calls, key=str) == [None, "a", "b"]
+
+
 def test_pipeline_manager_registration(db):
     """Verify ingestors are correctly registered in manager."""
     manager = DataPipelineManager(db)
     assert "omi" in manager._ingestors
     assert isinstance(manager._ingestors["omi"], OMIIngestor)
+
+
+def write_omi_csv(path, rows):
+    pd.DataFrame({
+        "Zona_OMI": [f"Z{i}" for i in range(rows)],
+        "Codice_Comune": ["058091"] * rows,
+        "Anno": [2023] * rows,
+        "Semestre": [1] * rows,
+        "Tipologia": ["Abitazioni"] * rows,
+        "Valore_Minimo": [1000.0] * rows,
+        "Valore_Massimo": [2000.0] * rows,
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def test_run_streams_csv_in_chunks(db, tmp_path):
+    """fetch() yields chunk_rows rows at a time; each chunk is transformed and loaded on its own."""
+    ingestor = OMIIngestor(db)
+    ingestor.chunk_rows = 2
+    ingestor.prepare_load = MagicMock(return_value={})
+    ingestor.load = MagicMock(side_effect=len)
+    transform = ingestor.transform
+    seen = []
+    ingestor.transform = lambda chunk: seen.append(len(chunk)) or transform(chunk)
+
+    count = ingestor.run(write_omi_csv(tmp_path / "omi.csv", 5))
+
+    assert seen == [2, 2, 1]
+    assert [len(call.args[0]) for call in ingestor.load.call_args_list] == [2, 2, 1]
+    assert count == 5
+
+
+def test_load_state_built_once_per_run(db):
+    """Lookups are pre-fetched once per run, not once per chunk, and rebuilt on the next run."""
+    ingestor = OMIIngestor(db)
+    ingestor.fetch = lambda source: iter([pd.DataFrame(), pd.DataFrame(), pd.DataFrame()])
+    ingestor.prepare_load = MagicMock(return_value={"zones": {}, "municipalities": {}, "prices": set()})
+
+    ingestor.run("chunks")
+    assert ingestor.prepare_load.call_count == 1
+    ingestor.run("chunks")
+    assert ingestor.prepare_load.call_count == 2
+
+
+def test_single_dataset_fetch_is_one_chunk(db):
+    """fetch() returning a whole DataFrame (Excel, in-memory sources) still works."""
+    ingestor = OMIIngestor(db)
+    ingestor.fetch = lambda source: pd.DataFrame({"Zona_OMI": ["A1"], "Codice_Comune": [58091]})
+    ingestor.load = MagicMock(side_effect=len)
+
+    assert ingestor.run("frame") == 1
+    assert ingestor.load.call_count == 1
+
+
+def test_peak_memory_independent_of_input_size(db, tmp_path):
+    """Peak traced memory of a run does not grow with the number of source rows."""
+    def peak(rows):
+        ingestor = OMIIngestor(db)
+        ingestor.chunk_rows = 500
+        ingestor.transform = lambda chunk: chunk.to_dict("records")
+        ingestor.load = len  # a MagicMock would keep every chunk in call_args_list
+        source = write_omi_csv(tmp_path / f"omi_{rows}.csv", rows)
+        tracemalloc.start()
+        try:
+            assert ingestor.run(source) == rows
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # Both inputs outgrow the CSV reader's buffer, so only the row count differs
+    small, large = peak(8000), peak(32000)
+    assert large < small * 1.2, f"peak grew from {small} to {large} bytes for 4x the rows"
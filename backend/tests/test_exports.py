@@ -0,0 +1,80 @@
+"""
+Unit tests for the streaming export encoders.
+
+Encoders receive chunks of rows (as produced by the server-side cursor) and
+must emit output incrementally, one piece per chunk.
+"""
+
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+
+from app.models.property import PropertyType
+from app.services.export_service import (
+    ExportColumn,
+    _encode_csv,
+    _encode_ndjson,
+    score_export,
+)
+
+COLUMNS = [
+    ExportColumn("municipality_id", None, "int"),
+    ExportColumn("property_type", None, "str"),
+    ExportColumn("calculation_date", None, "date"),
+    ExportColumn("overall_score", None, "float"),
+]
+CHUNKS = [
+    [(1, PropertyType.RESIDENTIAL, date(2024, 2, 4), 7.5), (2, None, None, None)],
+    [(3, PropertyType.COMMERCIAL, date(2024, 3, 1), 6.1)],
+]
+
+
+def test_ndjson_emits_one_piece_per_chunk():
+    pieces = list(_encode_ndjson(COLUMNS, iter(CHUNKS)))
+    assert len(pieces) == 2
+    records = [json.loads(line) for piece in pieces for line in piece.splitlines()]
+    assert records[0] == {
+        "municipality_id": 1, "property_type": "residential",
+        "calculation_date": "2024-02-04", "overall_score": 7.5,
+    }
+    assert records[1]["overall_score"] is None
+    assert len(records) == 3
+
+
+def test_csv_has_header_and_plain_values():
+    body = b"".join(_encode_csv(COLUMNS, iter(CHUNKS))).decode("utf-8")
+    rows = list(csv.reader(io.StringIO(body)))
+    assert rows[0] == ["municipality_id", "property_type", "calculation_date", "overall_score"]
+    assert rows[1] == ["1", "residential", "2024-02-04", "7.5"]
+    assert rows[2] == ["2", "", "", ""]
+    assert len(rows) == 4
+
+
+def test_parquet_round_trip():
+    pq = pytest.importorskip("pyarrow.parquet")
+    from app.services.export_service import _encode_parquet
+
+    body = b"".join(_encode_parquet(COLUMNS, iter(CHUNKS)))
+    table = pq.read_table(io.BytesIO(body))
+    assert table.num_rows == 3
+    assert table.column("property_type").to_pylist() == ["residential", None, "commercial"]
+
+
+def test_score_export_columns_cover_all_components():
+    columns, _ = score_export("municipality")
+    names = [c.name for c in columns]
+    assert names[:3] == ["level", "municipality_id", "municipality_code"]
+    assert sum(name.endswith("_score") for name in names) == 14  # overall + 13 pillars
+
+
+def test_export_risks_csv_endpoint(client, sample_municipality):
+    """The risks export streams a CSV attachment including every municipality."""
+    response = client.get("/api/v1/exports/risks", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert any(r["municipality_name"] == "Test City" for r in rows)
@@ -0,0 +1,140 @@
+"""
+Tests for the persistent geocode cache.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.constants import GEOCODE_CACHE_MAX_ENTRIES
+from app.models.geocoding import GeocodeCacheEntry
+from app.services import geocode_cache
+from app.services.geocoder import GeocoderService
+from app.services.geocoding import GeocodingService
+
+DUOMO = {"latitude": 45.4641, "longitude": 9.1919, "display_name": "Duomo, Milano", "address_details": {}}
+
+
+@pytest.fixture
+def clean_cache(db_session):
+    def reset():
+        geocode_cache.memory_cache.clear()
+        db_session.query(GeocodeCacheEntry).delete()
+        db_session.commit()
+
+    reset()
+    yield
+    reset()
+
+
+@pytest.fixture
+def nominatim(monkeypatch):
+    """Replace the Nominatim call; `calls` records each query that reached it."""
+    class Fake:
+        calls = []
+        answer = DUOMO
+        error = None
+
+        def search(self, query):
+            self.calls.append(query)
+            if self.error:
+                raise self.error
+            return self.answer
+
+    fake = Fake()
+    fake.calls = []
+    monkeypatch.setattr(GeocodingService, "_search", lambda self, query: fake.search(query))
+    monkeypatch.setattr(GeocoderService, "_search", lambda self, query: fake.search(query))
+    return fake
+
+
+def test_keys_are_normalized():
+    assert geocode_cache.forward_key("Duomo, Milano") == geocode_cache.forward_key("  duomo   MILANO ")
+    assert geocode_cache.forward_key("Forlì") == "forli"
+    assert geocode_cache.reverse_key(45.4641234, 9.1919876) == "45.46412,9.19199"
+
+
+def test_forward_query_names_the_country_once():
+    assert geocode_cache.forward_query(" Duomo, Milano ") == "Duomo, Milano, Italy"
+    assert geocode_cache.forward_query("Duomo, Milano, ITALY") == "Duomo, Milano, ITALY"
+    assert geocode_cache.forward_query("Duomo, Milano", country=None) == "Duomo, Milano"
+    assert geocode_cache.forward_key(geocode_cache.forward_query("duomo milano")) == geocode_cache.forward_key(
+        geocode_cache.forward_query("Duomo, Milano, Italy")
+    )
+
+
+def test_memory_cache_is_bounded():
+    assert geocode_cache.memory_cache.max_entries == GEOCODE_CACHE_MAX_ENTRIES
+
+
+def test_repeat_lookups_stay_in_process(db_session, clean_cache, nominatim):
+    service = GeocodingService()
+    assert service.geocode_address("Duomo, Milano", db=db_session) == DUOMO
+    assert service.geocode_address("duomo  milano", db=db_session) == DUOMO
+    assert len(nominatim.calls) == 1
+
+    # A fresh process (empty memory) is answered from the table
+    geocode_cache.memory_cache.clear()
+    assert service.geocode_address("Duomo, Milano", db=db_session) == DUOMO
+    assert len(nominatim.calls) == 1
+    assert db_session.query(GeocodeCacheEntry).count() == 1
+
+
+def test_cache_shared_between_geocoders(db_session, clean_cache, nominatim):
+    GeocodingService().geocode_address("Duomo, Milano", db=db_session)
+    coordinates = (DUOMO["latitude"], DUOMO["longitude"])
+    assert GeocoderService().geocode("Duomo, Milano", db=db_session) == coordinates
+    assert GeocoderService().geocode("duomo milano, Italy", db=db_session) == coordinates
+    assert len(nominatim.calls) == 1
+
+
+def test_negative_results_are_cached(db_session, clean_cache, nominatim):
+    nominatim.answer = None
+    service = GeocodingService()
+    assert service.geocode_address("Nowhere Land", db=db_session) is None
+    geocode_cache.memory_cache.clear()
+    assert service.geocode_address("Nowhere Land", db=db_session) is None
+    assert len(nominatim.calls) == 1
+
+    entry = db_session.query(GeocodeCacheEntry).one()
+    assert entry.result is None
+    assert entry.expires_at < datetime.utcnow() + timedelta(days=30)
+
+
+def test_errors_are_not_cached(db_session, clean_cache, nominatim):
+    nominatim.error = TimeoutError("Nominatim timed out")
+    service = GeocodingService()
+    assert service.geocode_address("Duomo, Milano", db=db_session) is None
+
+    nominatim.error = None
+    assert service.geocode_address("Duomo, Milano", db=db_session) == DUOMO
+    assert len(nominatim.calls) == 2
+
+
+def test_expired_entries_are_refetched(db_session, clean_cache, nominatim):
+    service = GeocodingService()
+    service.geocode_address("Duomo, Milano", db=db_session)
+    db_session.query(GeocodeCacheEntry).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db_session.commit()
+    geocode_cache.memory_cache.clear()
+
+    service.geocode_address("Duomo, Milano", db=db_session)
+    assert len(nominatim.calls) == 2
+    assert db_session.query(GeocodeCacheEntry).count() == 1
+    assert geocode_cache.purge_expired(db_session) == 0
+
+
+def test_reverse_lookup_cached(db_session, clean_cache, monkeypatch):
+    calls = []
+
+    def reverse(self, latitude, longitude):
+        calls.append((latitude, longitude))
+        return {"display_name": "Piazza del Duomo, Milano", "address_details": {"city": "Milano"}}
+
+    monkeypatch.setattr(GeocodingService, "_reverse", reverse)
+    service = GeocodingService()
+    first = service.reverse_geocode(45.464101, 9.191901, db=db_session)
+    # Within rounding of the cache key
+    second = service.reverse_geocode(45.4641012, 9.1919008, db=db_session)
+    assert first == second and first["display_name"] == "Piazza del Duomo, Milano"
+    assert len(calls) == 1
@@ -0,0 +1,212 @@
+"""
+Tests for the geocoding providers: shared rate limit, request coalescing,
+batch mode, Photon answers and the gazetteer fallback of location search.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import geocode_cache
+from app.services.geocoding_providers import (
+    GeocoderUnavailable,
+    NominatimProvider,
+    PhotonProvider,
+    TokenBucket,
+    build_provider,
+    geocoder_provider,
+)
+
+DUOMO = {"latitude": 45.4641, "longitude": 9.1919, "display_name": "Duomo, Milano", "address_details": {}}
+
+
+def make_client(bucket=None, max_concurrency=1):
+    return NominatimProvider(
+        "http://nominatim.invalid", "tests", bucket or TokenBucket(rate=100), timeout=1, max_concurrency=max_concurrency
+    )
+
+
+def test_bucket_spaces_reservations():
+    bucket = TokenBucket(rate=10, capacity=1)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.02)
+
+
+def test_bucket_refuses_beyond_max_wait_without_consuming():
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.reserve() == 0
+    assert bucket.reserve(max_wait=0.1) is None
+    # The refused call left the queue untouched
+    assert bucket.reserve() == pytest.approx(1, abs=0.05)
+
+
+def test_bucket_state_file_is_shared_between_instances(tmp_path):
+    state_file = str(tmp_path / "nominatim.json")
+    first = TokenBucket(rate=1, capacity=1, state_file=state_file)
+    second = TokenBucket(rate=1, capacity=1, state_file=state_file)
+    if first.state_file is None:
+        pytest.skip("shared rate limit needs fcntl")
+
+    assert first.reserve() == 0
+    assert second.reserve(max_wait=0.1) is None
+
+
+def test_concurrent_identical_searches_share_one_call(monkeypatch):
+    client = make_client()
+    calls = []
+
+    async def fake_get(operation, path, params, deadline, parse):
+        calls.append(params["q"])
+        await asyncio.sleep(0.05)
+        return DUOMO
+
+    monkeypatch.setattr(client, "_get", fake_get)
+
+    async def run():
+        return await asyncio.gather(client.search("Duomo, Milano"), client.search("Duomo, Milano"))
+
+    assert asyncio.run(run()) == [DUOMO, DUOMO]
+    assert calls == ["Duomo, Milano"]
+    assert client._inflight == {}
+
+
+def test_slow_search_gives_up_at_budget(monkeypatch):
+    client = make_client()
+
+    async def slow_get(operation, path, params, deadline, parse):
+        await asyncio.sleep(1)
+        return DUOMO
+
+    monkeypatch.setattr(client, "_get", slow_get)
+    with pytest.raises(GeocoderUnavailable):
+        asyncio.run(client.search("Duomo, Milano", budget=0.05))
+
+
+def test_exhausted_rate_limit_is_unavailable_not_queued():
+    bucket = TokenBucket(rate=0.5, capacity=1)
+    bucket.reserve()
+    client = make_client(bucket)
+
+    with pytest.raises(GeocoderUnavailable):
+        asyncio.run(client.search("Duomo, Milano", budget=0.1))
+    with pytest.raises(GeocoderUnavailable):
+        client.search_sync("Duomo, Milano", budget=0.1)
+
+
+def test_batch_search_runs_concurrently_and_skips_failures(monkeypatch):
+    client = make_client(max_concurrency=3)
+    client.bucket = None
+    running = {"now": 0, "max": 0}
+    calls = []
+
+    async def fake_get(operation, path, params, deadline, parse):
+        calls.append(params["q"])
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.02)
+        running["now"] -= 1
+        if params["q"] == "broken":
+            raise RuntimeError("502 Bad Gateway")
+        return None if params["q"] == "nowhere" else DUOMO
+
+    monkeypatch.setattr(client, "_get", fake_get)
+    queries = [f"address {i}" for i in range(8)] + ["address 0", "nowhere", "broken"]
+    results = asyncio.run(client.search_many(queries))
+
+    assert len(calls) == 10
+    assert running["max"] == 3
+    assert results["address 0"] == DUOMO
+    assert results["nowhere"] is None
+    assert "broken" not in results
+
+
+def test_photon_answers_use_nominatim_shape():
+    photon = PhotonProvider("http://photon.invalid", "tests", None, timeout=1)
+    payload = {
+        "features": [{
+            "geometry": {"type": "Point", "coordinates": [9.1919, 45.4641]},
+            "properties": {
+                "name": "Duomo di Milano", "street": "Piazza del Duomo", "housenumber": "1",
+                "postcode": "20122", "city": "Milano", "state": "Lombardia",
+                "country": "Italia", "countrycode": "IT", "osm_key": "amenity",
+            },
+        }]
+    }
+
+    result = photon.parse_search(payload)
+    assert (result["latitude"], result["longitude"]) == (45.4641, 9.1919)
+    assert result["address_details"]["city"] == "Milano"
+    assert result["address_details"]["country_code"] == "it"
+    assert result["display_name"].startswith("Duomo di Milano, Piazza del Duomo 1, 20122, Milano")
+    assert photon.parse_search({"features": []}) is None
+    assert photon.parse_reverse(payload)["address_details"]["postcode"] == "20122"
+
+    village = {"features": [{
+        "geometry": {"coordinates": [12.1, 42.1]},
+        "properties": {"name": "Calcata", "osm_key": "place", "osm_value": "village"},
+    }]}
+    assert photon.parse_search(village)["address_details"]["village"] == "Calcata"
+
+
+def test_provider_is_selected_by_configuration(monkeypatch):
+    monkeypatch.setattr(settings, "GEOCODER_PROVIDER", "photon")
+    monkeypatch.setattr(settings, "GEOCODER_BASE_URL", None)
+    monkeypatch.setattr(settings, "GEOCODER_RATE_PER_SECOND", 0)
+    monkeypatch.setattr(settings, "GEOCODER_MAX_CONCURRENCY", 16)
+
+    provider = build_provider()
+    assert isinstance(provider, PhotonProvider)
+    assert provider.base_url == "http://localhost:2322"
+    assert provider.bucket is None
+    assert provider.max_concurrency == 16
+
+    monkeypatch.setattr(settings, "GEOCODER_PROVIDER", "google")
+    with pytest.raises(ValueError):
+        build_provider()
+
+
+def test_geocode_batch_fetches_only_uncached(db_session, monkeypatch):
+    from app.models.geocoding import GeocodeCacheEntry
+    from app.services.geocoding import GeocodingService
+
+    geocode_cache.memory_cache.clear()
+    db_session.query(GeocodeCacheEntry).delete()
+    db_session.commit()
+
+    fetched = []
+
+    async def search_many(queries):
+        queries = list(queries)
+        fetched.extend(queries)
+        return {query: (None if query.startswith("Nowhere") else DUOMO) for query in queries}
+
+    service = GeocodingService(provider=make_client())
+    monkeypatch.setattr(service.provider, "search_many", search_many)
+
+    first = service.geocode_batch(["Duomo, Milano", "duomo milano", "Nowhere"], db=db_session)
+    assert first == {"Duomo, Milano": DUOMO, "duomo milano": DUOMO, "Nowhere": None}
+    assert fetched == ["Duomo, Milano, Italy", "Nowhere, Italy"]
+
+    # Second run: answered from the cache table (memory copy dropped)
+    geocode_cache.memory_cache.clear()
+    assert service.geocode_batch(["Duomo, Milano", "Nowhere"], db=db_session) == {"Duomo, Milano": DUOMO, "Nowhere": None}
+    assert len(fetched) == 2
+
+    db_session.query(GeocodeCacheEntry).delete()
+    db_session.commit()
+
+
+def test_search_falls_back_to_gazetteer_when_geocoder_unavailable(client, sample_municipality, monkeypatch):
+    async def unavailable(query, budget=None):
+        raise GeocoderUnavailable("rate limit budget exhausted")
+
+    geocode_cache.memory_cache.clear()
+    monkeypatch.setattr(geocoder_provider, "search", unavailable)
+    response = client.post("/api/v1/locations/search", json={"query": "Via Roma 1, Test City"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["geocoded"] is None
+    assert data["municipality"]["id"] == sample_municipality.id
@@ -0,0 +1,58 @@
+"""
+Unit tests for Prometheus metrics.
+"""
+
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.cache import SimpleTTLCache
+from app.core.metrics import MetricsMiddleware, cache_namespace, cache_stats, render_metrics
+
+
+def test_cache_namespace_strips_ids():
+    assert cache_namespace("zone_layer:42") == "zone_layer"
+    assert cache_namespace("dashboard:7:score,risks") == "dashboard"
+    assert cache_namespace("score_municipality_15146") == "score_municipality"
+    assert cache_namespace("featured_cities_v1") == "featured_cities_v1"
+
+
+def test_cache_lookups_are_counted_per_namespace():
+    cache = SimpleTTLCache("metrics_test")
+    cache.set("zone_layer:1", "payload", 60)
+    cache.get("zone_layer:1")
+    cache.get("zone_layer:2")
+    cache.get("zone_layer:1")
+
+    assert cache_stats()[("metrics_test", "zone_layer")] == [2, 1]
+    body = render_metrics().decode()
+    assert 'cache_hit_ratio{cache="metrics_test",namespace="zone_layer"} 0.6666' in body
+
+
+def test_middleware_labels_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+
+    body = render_metrics().decode()
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"} 2.0' in body
+    assert "http_requests_in_flight 0.0" in body
+
+
+def test_metrics_endpoint_exposes_pool_stats():
+    from app.main import app
+
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert "db_pool_checked_out" in response.text
+    assert "db_pool_overflow" in response.text
@@ -0,0 +1,57 @@
+"""
+Unit tests for keyset pagination cursors.
+"""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, Integer, MetaData, Table
+from sqlalchemy.dialects import postgresql
+
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter, keyset_order
+
+items = Table("items", MetaData(), Column("id", Integer), Column("population", Integer))
+
+
+def compiled(clause):
+    return str(clause.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("population", "desc", 125000, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "population", "desc") == (125000, 42)
+
+
+def test_cursor_preserves_string_keys():
+    cursor = encode_cursor("name", "asc", "Sant'Agata de' Goti", 7)
+    assert decode_cursor(cursor, "name", "asc") == ("Sant'Agata de' Goti", 7)
+
+
+def test_cursor_bound_to_sort_order():
+    cursor = encode_cursor("score", "desc", 7.5, 3)
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, "score", "asc")
+    assert exc.value.status_code == 400
+
+
+def test_malformed_cursor_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor", "id", "asc")
+    assert exc.value.status_code == 400
+
+
+def test_cursor_round_trips_null_sort_key():
+    cursor = encode_cursor("population", "desc", None, 42)
+    assert decode_cursor(cursor, "population", "desc") == (None, 42)
+
+
+def test_keyset_nulls_last_keeps_rows_without_a_sort_key():
+    clause = keyset_filter(items.c.population, items.c.id, "desc", 5000, 9, nulls_last=True)
+    assert compiled(clause) == "(items.population, items.id) < (5000, 9) OR items.population IS NULL"
+    ordering = [compiled(c) for c in keyset_order(items.c.population, items.c.id, "desc", nulls_last=True)]
+    assert ordering == ["items.population DESC NULLS LAST", "items.id DESC"]
+
+
+def test_keyset_null_cursor_pages_through_the_null_tail_by_id():
+    clause = keyset_filter(items.c.population, items.c.id, "asc", None, 9, nulls_last=True)
+    assert compiled(clause) == "items.population IS NULL AND items.id > 9"
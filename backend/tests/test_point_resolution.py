@@ -0,0 +1,92 @@
+"""
+Tests for bulk point resolution (POST /locations/resolve).
+"""
+
+import json
+
+import pytest
+from geoalchemy2.shape import from_shape
+from shapely.geometry import box
+
+from app.core.config import settings
+from app.models.geography import OMIZone
+from app.models.score import InvestmentScore
+from app.services.spatial_index import load_spatial_index
+
+INSIDE_ZONE = {"id": "a", "latitude": 41.90, "longitude": 12.50}
+INSIDE_CITY = {"id": "b", "latitude": 41.86, "longitude": 12.46}
+OUTSIDE = {"id": "c", "latitude": 45.46, "longitude": 9.19}
+
+
+@pytest.fixture
+def city(db_session, sample_municipality):
+    sample_municipality.geometry = from_shape(box(12.45, 41.85, 12.55, 41.95), srid=4326)
+    zone = OMIZone(
+        municipality_id=sample_municipality.id,
+        zone_code="B1",
+        zone_name="Central Zone",
+        zone_type="Residenziale",
+        geometry=from_shape(box(12.48, 41.88, 12.52, 41.92), srid=4326),
+    )
+    db_session.add(zone)
+    db_session.flush()
+    db_session.add_all([
+        InvestmentScore(municipality_id=sample_municipality.id, overall_score=6.0),
+        InvestmentScore(municipality_id=sample_municipality.id, omi_zone_id=zone.id, overall_score=8.0),
+    ])
+    db_session.commit()
+    return sample_municipality, zone
+
+
+def resolve(client, points):
+    response = client.post("/api/v1/locations/resolve", json={"points": points})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def check_results(results, municipality, zone):
+    assert [r["id"] for r in results] == ["a", "b", "c"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+
+    in_zone, in_city, outside = results
+    assert in_zone["municipality"]["id"] == municipality.id
+    assert in_zone["omi_zone"]["id"] == zone.id
+    assert in_zone["score"]["overall_score"] == 8.0
+    assert in_zone["score"]["level"] == "omi_zone"
+
+    assert in_city["omi_zone"] is None
+    assert in_city["score"] == {
+        "overall_score": 6.0, "level": "municipality", "calculation_date": in_city["score"]["calculation_date"]
+    }
+
+    assert outside["municipality"] is None
+    assert outside["score"] is None
+    assert all(r["parcel"] is None for r in results)
+
+
+def test_resolve_with_postgis_join(client, city, monkeypatch):
+    monkeypatch.setattr(settings, "SPATIAL_INDEX_ENABLED", False)
+    check_results(resolve(client, [INSIDE_ZONE, INSIDE_CITY, OUTSIDE]), *city)
+
+
+def test_resolve_with_spatial_index(client, db_session, city):
+    load_spatial_index(db_session)
+    check_results(resolve(client, [INSIDE_ZONE, INSIDE_CITY, OUTSIDE]), *city)
+
+
+def test_query_count_does_not_grow_with_points(client, city, query_budget, monkeypatch):
+    monkeypatch.setattr(settings, "SPATIAL_INDEX_ENABLED", False)
+    points = [dict(INSIDE_ZONE, id=str(i)) for i in range(500)]
+    # One resolution query plus the zone and municipality score lookups
+    with query_budget(3):
+        results = resolve(client, points)
+    assert len(results) == 500
+
+
+def test_resolve_validates_input(client):
+    too_many = [INSIDE_ZONE] * 10001
+    assert client.post("/api/v1/locations/resolve", json={"points": too_many}).status_code == 422
+    assert client.post("/api/v1/locations/resolve", json={"points": []}).status_code == 422
+    bad = [{"latitude": 123.0, "longitude": 12.5}]
+    assert client.post("/api/v1/locations/resolve", json={"points": bad}).status_code == 422
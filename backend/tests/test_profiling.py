@@ -0,0 +1,101 @@
+"""
+Tests for on-demand request profiling and the admin profile endpoints.
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.compression import compress
+from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware, SamplingProfiler, list_profiles, new_profile_id, save_profile
+
+
+@pytest.fixture
+def admin_settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def profiled_client():
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/work")
+    def work():
+        body = b'{"type": "Feature", "properties": {}}' * 20000
+        for _ in range(5):
+            compress(body, "gzip")
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_unprofiled_request_passes_through(admin_settings, profiled_client):
+    response = profiled_client.get("/work")
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert list_profiles() == []
+
+
+def test_wrong_token_is_not_profiled(admin_settings, profiled_client):
+    response = profiled_client.get("/work", headers={"X-Profile-Token": "guess"})
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_profiled_request_stores_speedscope_file(admin_settings, profiled_client):
+    response = profiled_client.get("/work", headers={"X-Profile-Token": "s3cret"})
+    profile_id = response.headers["X-Profile-Id"]
+
+    stored = admin_settings / f"{profile_id}.speedscope.json"
+    profile = json.loads(stored.read_text())
+    sampled = profile["profiles"][0]
+    assert sampled["type"] == "sampled"
+    assert sampled["samples"] and len(sampled["samples"]) == len(sampled["weights"])
+    names = {frame["name"] for frame in profile["shared"]["frames"]}
+    assert "compress" in names
+
+
+def test_token_in_query_string_is_ignored(admin_settings, profiled_client):
+    response = profiled_client.get("/work?profile=s3cret")
+    assert "X-Profile-Id" not in response.headers
+    assert list_profiles() == []
+
+
+def test_profiles_are_rotated(admin_settings, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_MAX_FILES", 2)
+    profiler = SamplingProfiler()
+    for i in range(4):
+        save_profile(profiler, f"2026010{i}T000000000000_GET_test", "GET", "/test")
+    assert [p["id"] for p in list_profiles()] == [
+        "20260103T000000000000_GET_test",
+        "20260102T000000000000_GET_test",
+    ]
+
+
+def test_admin_profile_endpoints(admin_settings):
+    from app.main import app
+
+    profile_id = new_profile_id("GET", "/api/v1/locations/1/dashboard")
+    save_profile(SamplingProfiler(), profile_id, "GET", "/api/v1/locations/1/dashboard")
+    client = TestClient(app)
+
+    assert client.get("/api/v1/admin/profiles").status_code == 403
+    listing = client.get("/api/v1/admin/profiles", headers={"X-Admin-Token": "s3cret"})
+    assert [p["id"] for p in listing.json()] == [profile_id]
+
+    download = client.get(f"/api/v1/admin/profiles/{profile_id}", headers={"X-Admin-Token": "s3cret"})
+    assert download.status_code == 200
+    assert download.json()["profiles"][0]["type"] == "sampled"
+    assert client.get("/api/v1/admin/profiles/missing", headers={"X-Admin-Token": "s3cret"}).status_code == 404
+
+
+def test_admin_endpoints_disabled_without_token(monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", None)
+    assert TestClient(app).get("/api/v1/admin/profiles").status_code == 404
@@ -0,0 +1,168 @@
+"""
+Query-plan regression tests.
+
+Each hot query is EXPLAINed with sequential scans disabled: the planner then
+picks a seq scan only when no index can serve the query, so a dropped or
+mismatched index fails here instead of showing up as a slow endpoint.
+"""
+
+import json
+
+import pytest
+from sqlalchemy import Float, desc, func
+
+from app.api.v1.endpoints.locations import _latest_municipality_scores
+from app.core.pagination import keyset_filter, keyset_order
+
+from app.models.demographics import Demographics
+from app.models.geography import CadastralParcel, Municipality, MunicipalitySubdivision, OMIZone, OMIZoneSubdivision
+from app.models.listing import RealEstateListing
+from app.models.property import PropertyPrice, PropertyType
+from app.models.score import InvestmentScore
+
+POINT = func.ST_SetSRID(func.ST_MakePoint(12.50, 41.90), 4326)
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def scans_of(db, query, table):
+    """Plan nodes reading `table` when `query` runs with seq scans disabled."""
+    sql = query.statement.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    connection = db.connection()
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return [node for node in plan_nodes(plan[0]["Plan"]) if node.get("Relation Name") == table]
+
+
+def municipalities_by_score(db):
+    # Not a single seek: every page ranks the latest score of each
+    # municipality, but those are read through the partial latest-score index
+    latest = _latest_municipality_scores(db)
+    query = (
+        db.query(Municipality.id, latest.c.overall_score)
+        .join(latest, latest.c.municipality_id == Municipality.id)
+        .order_by(*keyset_order(latest.c.overall_score, Municipality.id, "desc"))
+        .limit(51)
+    )
+    return query, "investment_scores"
+
+
+HOT_QUERIES = {
+    "municipality_containing_point": lambda db: (
+        db.query(Municipality).filter(func.ST_Contains(Municipality.geometry, POINT)),
+        "municipalities",
+    ),
+    "omi_zone_containing_point": lambda db: (
+        db.query(OMIZone).filter(func.ST_Contains(OMIZone.geometry, POINT)),
+        "omi_zones",
+    ),
+    "municipality_piece_containing_point": lambda db: (
+        db.query(MunicipalitySubdivision.municipality_id)
+        .filter(func.ST_Intersects(MunicipalitySubdivision.geometry, POINT))
+        .order_by(MunicipalitySubdivision.parent_area)
+        .limit(1),
+        "municipality_subdivisions",
+    ),
+    "omi_zone_piece_containing_point": lambda db: (
+        db.query(OMIZoneSubdivision.omi_zone_id)
+        .filter(func.ST_Intersects(OMIZoneSubdivision.geometry, POINT))
+        .order_by(OMIZoneSubdivision.parent_area)
+        .limit(1),
+        "omi_zone_subdivisions",
+    ),
+    "parcel_at_point": lambda db: (
+        db.query(CadastralParcel.id).filter(
+            CadastralParcel.geometry.op("&&")(POINT), func.ST_Intersects(CadastralParcel.geometry, POINT)
+        ),
+        "cadastral_parcels",
+    ),
+    "nearest_parcel": lambda db: (
+        db.query(CadastralParcel.id)
+        .order_by(CadastralParcel.geometry.op("<->", return_type=Float)(POINT))
+        .limit(1),
+        "cadastral_parcels",
+    ),
+    "municipalities_near_point": lambda db: (
+        db.query(Municipality.id).filter(func.ST_DWithin(Municipality.centroid, POINT, 0.1)),
+        "municipalities",
+    ),
+    "omi_zones_near_point": lambda db: (
+        db.query(OMIZone.id).filter(func.ST_DWithin(OMIZone.centroid, POINT, 0.1)),
+        "omi_zones",
+    ),
+    "municipalities_by_population_desc": lambda db: (
+        db.query(Municipality.id)
+        .filter(keyset_filter(Municipality.population, Municipality.id, "desc", 50000, 10, nulls_last=True))
+        .order_by(*keyset_order(Municipality.population, Municipality.id, "desc", nulls_last=True))
+        .limit(51),
+        "municipalities",
+    ),
+    "province_municipalities_by_population_desc": lambda db: (
+        db.query(Municipality.id)
+        .filter(Municipality.province_id == 1)
+        .order_by(*keyset_order(Municipality.population, Municipality.id, "desc", nulls_last=True))
+        .limit(51),
+        "municipalities",
+    ),
+    "municipalities_by_score": lambda db: municipalities_by_score(db),
+    "latest_municipality_score": lambda db: (
+        db.query(InvestmentScore)
+        .filter(InvestmentScore.municipality_id == 1, InvestmentScore.omi_zone_id.is_(None))
+        .order_by(InvestmentScore.calculation_date.desc())
+        .limit(1),
+        "investment_scores",
+    ),
+    "latest_zone_score": lambda db: (
+        db.query(InvestmentScore)
+        .filter(InvestmentScore.omi_zone_id == 1)
+        .order_by(InvestmentScore.calculation_date.desc())
+        .limit(1),
+        "investment_scores",
+    ),
+    "score_upsert_lookup": lambda db: (
+        db.query(InvestmentScore).filter(
+            InvestmentScore.municipality_id == 1,
+            InvestmentScore.omi_zone_id == 1,
+            InvestmentScore.calculation_date == func.current_date(),
+        ),
+        "investment_scores",
+    ),
+    "latest_zone_prices": lambda db: (
+        db.query(PropertyPrice)
+        .filter(PropertyPrice.property_type == PropertyType.RESIDENTIAL, PropertyPrice.omi_zone_id == 1)
+        .order_by(desc(PropertyPrice.year), desc(PropertyPrice.semester))
+        .limit(4),
+        "property_prices",
+    ),
+    "latest_demographics": lambda db: (
+        db.query(Demographics)
+        .filter(Demographics.municipality_id == 1)
+        .order_by(desc(Demographics.year))
+        .limit(1),
+        "demographics",
+    ),
+    "active_listings": lambda db: (
+        db.query(func.count(RealEstateListing.id)).filter(
+            RealEstateListing.municipality_id == 1,
+            RealEstateListing.source_platform == "casa_it",
+            RealEstateListing.is_active == True,  # noqa: E712
+        ),
+        "real_estate_listings",
+    ),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(db_session, name):
+    query, table = HOT_QUERIES[name](db_session)
+    scans = scans_of(db_session, query, table)
+
+    assert scans, f"{name}: {table} does not appear in the plan"
+    seq_scans = [node for node in scans if node["Node Type"] == "Seq Scan"]
+    assert not seq_scans, f"{name}: sequential scan on {table}"
@@ -0,0 +1,179 @@
+"""
+Tests for per-request SQL query tracking, N+1 detection and query budgets.
+"""
+
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.core.query_tracking import (
+    QueryStats,
+    QueryTrackingMiddleware,
+    capture_queries,
+    fingerprint,
+    query_budget as budget,
+    track_queries,
+)
+
+
+@pytest.fixture
+def sqlite_engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def _tracked_app(engine, queries_per_request: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(QueryTrackingMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        with engine.connect() as conn:
+            for i in range(queries_per_request):
+                conn.execute(text("SELECT :id + :i"), {"id": item_id, "i": i})
+        return {"id": item_id}
+
+    return app
+
+
+def test_fingerprint_collapses_parameters():
+    a = fingerprint("SELECT * FROM omi_zones WHERE id = 42 AND zone_code = 'B1'")
+    b = fingerprint("SELECT *  FROM omi_zones\n WHERE id = 7 AND zone_code = 'C3'")
+    assert a == b == "SELECT * FROM omi_zones WHERE id = ? AND zone_code = ?"
+    assert fingerprint("SELECT id FROM t WHERE id IN (%(p1)s, %(p2)s, %(p3)s)") == "SELECT id FROM t WHERE id IN (...)"
+
+
+def test_track_queries_counts_statements(sqlite_engine):
+    with capture_queries():
+        pass  # registers the listeners
+    with track_queries() as stats:
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    assert stats.count == 2
+    assert stats.fingerprints["SELECT ?"] == 2
+    assert stats.total_ms >= 0
+
+
+def test_query_stats_record_is_thread_safe():
+    """Concurrent record() calls from a request's worker threads lose no updates."""
+    previous = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        stats = QueryStats()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for _ in range(8):
+                pool.submit(lambda: [stats.record("SELECT 1", 1.0) for _ in range(2000)])
+    finally:
+        sys.setswitchinterval(previous)
+    assert stats.count == 16000
+    assert stats.fingerprints["SELECT ?"] == 16000
+    assert stats.total_ms == 16000.0
+
+
+def test_middleware_sets_debug_headers(sqlite_engine, monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", True)
+    client = TestClient(_tracked_app(sqlite_engine, 3))
+
+    response = client.get("/items/1")
+    assert response.headers["X-DB-Query-Count"] == "3"
+    assert float(response.headers["X-DB-Query-Time-Ms"]) >= 0
+
+
+def test_middleware_hides_headers_outside_debug(sqlite_engine, monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", False)
+    client = TestClient(_tracked_app(sqlite_engine, 1))
+    assert "X-DB-Query-Count" not in client.get("/items/1").headers
+
+
+def test_middleware_logs_repeated_statements(sqlite_engine, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "N_PLUS_ONE_THRESHOLD", 5)
+    client = TestClient(_tracked_app(sqlite_engine, 6))
+
+    with caplog.at_level(logging.WARNING, logger="app.core.query_tracking"):
+        client.get("/items/1")
+    assert "possible N+1 (6x)" in caplog.text
+    assert "/items/{item_id}" in caplog.text
+
+
+def test_query_budget_fails_when_exceeded(sqlite_engine):
+    client = TestClient(_tracked_app(sqlite_engine, 4))
+    with budget(4):
+        client.get("/items/1")
+    with pytest.raises(AssertionError, match="Query budget exceeded: 4 statements"):
+        with budget(3):
+            client.get("/items/1")
+
+
+# =============================================================================
+# ENDPOINT BUDGETS (PostgreSQL)
+#
+# Budgets must not grow with the number of rows returned; each test creates
+# several rows so a per-row query would blow the budget.
+# =============================================================================
+
+def _add_municipalities(db_session, province, count):
+    from app.models.geography import Municipality
+
+    municipalities = [
+        Municipality(name=f"Budget City {i}", code=f"BC{i:04d}", province_id=province.id, population=1000 + i)
+        for i in range(count)
+    ]
+    db_session.add_all(municipalities)
+    db_session.commit()
+    return municipalities
+
+
+def test_list_municipalities_query_budget(client, db_session, sample_province, query_budget):
+    _add_municipalities(db_session, sample_province, 12)
+    with query_budget(2):
+        response = client.get("/api/v1/locations/municipalities?limit=50")
+    assert response.status_code == 200
+
+
+def test_municipalities_batch_query_budget(client, db_session, sample_province, query_budget):
+    ids = [m.id for m in _add_municipalities(db_session, sample_province, 12)]
+    with query_budget(2):
+        response = client.post("/api/v1/locations/municipalities/batch", json={"ids": ids})
+    assert response.status_code == 200
+
+
+def test_zone_layer_query_budget(client, db_session, sample_municipality, query_budget):
+    from app.core.compression import response_cache
+    from app.models.geography import OMIZone
+    from app.models.score import InvestmentScore
+
+    zones = [
+        OMIZone(zone_code=f"BZ{i}", municipality_id=sample_municipality.id, zone_name=f"Zone {i}")
+        for i in range(8)
+    ]
+    db_session.add_all(zones)
+    db_session.commit()
+    db_session.add_all([InvestmentScore(omi_zone_id=z.id, overall_score=6.0) for z in zones])
+    db_session.commit()
+    response_cache.delete(f"zone_layer:{sample_municipality.id}")
+
+    with query_budget(3):
+        response = client.get(f"/api/v1/scores/municipality/{sample_municipality.id}/omi-zones")
+    assert response.status_code == 200
+    assert len(response.json()) == 8
+
+
+def test_discover_query_budget(client, db_session, sample_province, query_budget):
+    for i, municipality in enumerate(_add_municipalities(db_session, sample_province, 12)):
+        municipality.centroid = f"SRID=4326;POINT({9.0 + i * 0.01} 45.2)"
+    db_session.commit()
+
+    with query_budget(2):
+        response = client.get(
+            "/api/v1/locations/discover?min_lat=45.0&min_lon=8.9&max_lat=45.5&max_lon=9.5&zoom=14"
+        )
+    assert response.status_code == 200
+    assert len(response.json()) == 12
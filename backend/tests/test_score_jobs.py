@@ -0,0 +1,217 @@
+"""
+Tests for the background score job queue.
+"""
+
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.core.cache import global_cache
+from app.core.compression import response_cache
+from app.core.config import settings
+from app.models.score import InvestmentScore, JobStatus, ScoreJob
+from app.services.score_jobs import (
+    ScoreJobRunner,
+    dashboard_cache_prefix,
+    invalidate_score_caches,
+    is_abandoned,
+    job_dedup_key,
+    job_runner,
+    score_age_seconds,
+    submit_job,
+)
+
+
+def _wait_for_job(client, job_id, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        body = client.get(f"/api/v1/scores/jobs/{job_id}").json()
+        if body["status"] in ("succeeded", "failed"):
+            return body
+        time.sleep(0.1)
+    raise AssertionError(f"Job {job_id} did not finish in {timeout}s")
+
+
+def test_dedup_key_ignores_weight_order_and_zone_parent():
+    a = job_dedup_key(1, None, {"price_trend": 0.6, "climate": 0.4})
+    b = job_dedup_key(1, None, {"climate": 0.4, "price_trend": 0.6})
+    assert a == b
+    assert job_dedup_key(1, None, None) != a
+    # A zone job is identified by the zone alone
+    assert job_dedup_key(1, 7, None) == job_dedup_key(2, 7, None)
+
+
+def test_saved_score_invalidates_municipality_dashboards():
+    response_cache.clear()
+    for key in ("dashboard:5:score", "dashboard:5:score,risks", "dashboard:50:score"):
+        response_cache.set(key, object(), 60)
+    global_cache.set("score_municipality_5", object(), 60)
+
+    # Municipality scores need no lookup, so no session is involved
+    invalidate_score_caches(None, 5, None)
+
+    assert response_cache.get("dashboard:5:score") is None
+    assert response_cache.get("dashboard:5:score,risks") is None
+    assert response_cache.get("dashboard:50:score") is not None
+    assert global_cache.get("score_municipality_5") is None
+    assert dashboard_cache_prefix(5) == "dashboard:5:"
+    response_cache.clear()
+
+
+def test_submit_job_deduplicates_active_jobs(db_session, sample_municipality):
+    first, created = submit_job(db_session, sample_municipality.id, None, None)
+    second, created_again = submit_job(db_session, sample_municipality.id, None, None)
+    assert created and not created_again
+    assert second.id == first.id
+
+    first.status = JobStatus.SUCCEEDED
+    db_session.commit()
+    third, created = submit_job(db_session, sample_municipality.id, None, None)
+    assert created and third.id != first.id
+
+
+def test_is_abandoned_after_stale_seconds():
+    now = datetime(2024, 1, 2, 12, 0, 0)
+    stale = now - timedelta(seconds=settings.SCORE_JOB_STALE_SECONDS + 1)
+    assert is_abandoned(ScoreJob(status=JobStatus.PENDING, created_at=stale, updated_at=stale), now)
+    assert is_abandoned(ScoreJob(status=JobStatus.RUNNING, created_at=stale, updated_at=stale), now)
+    assert not is_abandoned(ScoreJob(status=JobStatus.RUNNING, created_at=stale, updated_at=now), now)
+    assert not is_abandoned(ScoreJob(status=JobStatus.FAILED, created_at=stale, updated_at=stale), now)
+
+
+def test_submit_job_supersedes_abandoned_job(db_session, sample_municipality):
+    dead, _ = submit_job(db_session, sample_municipality.id, None, None)
+    long_ago = datetime.utcnow() - timedelta(seconds=settings.SCORE_JOB_STALE_SECONDS + 60)
+    dead.status, dead.updated_at = JobStatus.RUNNING, long_ago
+    db_session.commit()
+
+    job, created = submit_job(db_session, sample_municipality.id, None, None)
+
+    assert created and job.id != dead.id
+    db_session.expire_all()
+    assert db_session.get(ScoreJob, dead.id).status == JobStatus.FAILED
+
+
+def test_shutdown_fails_jobs_that_never_started(db_session, sample_municipality, sample_province):
+    from app.models.geography import Municipality
+
+    other = Municipality(name="Queued City", code="097001", province_id=sample_province.id)
+    db_session.add(other)
+    db_session.commit()
+    running, _ = submit_job(db_session, sample_municipality.id, None, None)
+    queued, _ = submit_job(db_session, other.id, None, None)
+
+    started, release = threading.Event(), threading.Event()
+    runner = ScoreJobRunner(max_workers=1)
+    runner.bind = db_session.get_bind()
+    runner._run = lambda job_id: started.set() or release.wait(5)
+    runner.dispatch(running.id)
+    runner.dispatch(queued.id)
+    assert started.wait(5)
+    runner.shutdown()
+    release.set()
+
+    db_session.expire_all()
+    assert db_session.get(ScoreJob, queued.id).status == JobStatus.FAILED
+    assert db_session.get(ScoreJob, running.id).status == JobStatus.PENDING
+    # The dedup key is free again
+    _, created = submit_job(db_session, other.id, None, None)
+    assert created
+
+
+def test_runner_claims_and_completes_job(db_session, sample_municipality):
+    job, _ = submit_job(db_session, sample_municipality.id, None, None)
+    job_runner._run(job.id)
+
+    db_session.expire_all()
+    stored = db_session.get(ScoreJob, job.id)
+    assert stored.status == JobStatus.SUCCEEDED
+    assert stored.score_id is not None
+    assert stored.attempts == 1
+
+    # A second run does nothing: the job is no longer pending
+    job_runner._run(job.id)
+    db_session.expire_all()
+    assert db_session.get(ScoreJob, job.id).attempts == 1
+
+
+def test_score_job_api_round_trip(client, sample_municipality):
+    response = client.post("/api/v1/scores/jobs", json={"municipality_id": sample_municipality.id})
+    assert response.status_code == 202
+    job = response.json()
+    assert response.headers["Location"].endswith(f"/scores/jobs/{job['id']}")
+
+    body = _wait_for_job(client, job["id"])
+    assert body["status"] == "succeeded"
+    assert body["score"]["municipality_id"] == sample_municipality.id
+
+
+def test_score_job_unknown_location(client):
+    response = client.post("/api/v1/scores/jobs", json={"municipality_id": 999999})
+    assert response.status_code == 404
+
+
+def test_score_job_not_found(client):
+    assert client.get("/api/v1/scores/jobs/does-not-exist").status_code == 404
+
+
+@pytest.fixture
+def stored_score(db_session, sample_municipality):
+    """Municipality score last calculated `age` ago (default: just now)."""
+    global_cache.clear()
+
+    def make(age=timedelta(0)):
+        score = InvestmentScore(
+            municipality_id=sample_municipality.id,
+            overall_score=6.5,
+            calculation_date=date.today(),
+            updated_at=datetime.utcnow() - age,
+        )
+        db_session.add(score)
+        db_session.commit()
+        return score
+
+    yield make
+    global_cache.clear()
+
+
+def test_score_age_seconds():
+    now = datetime(2024, 1, 2, 12, 0, 0)
+    assert score_age_seconds(datetime(2024, 1, 1, 12, 0, 0), now) == 86400
+    assert score_age_seconds(None, now) is None
+    # Clock skew never yields a negative age
+    assert score_age_seconds(now + timedelta(seconds=5), now) == 0
+
+
+def test_fresh_score_served_without_refresh(client, db_session, sample_municipality, stored_score):
+    stored_score()
+    body = client.get(f"/api/v1/scores/municipality/{sample_municipality.id}").json()
+    assert body["is_stale"] is False and body["revalidating"] is False
+    assert body["score_age_seconds"] < settings.SCORE_FRESHNESS_SECONDS
+    assert db_session.query(ScoreJob).count() == 0
+
+
+def test_stale_score_served_then_revalidated(client, db_session, sample_municipality, stored_score):
+    stale_age = timedelta(seconds=settings.SCORE_FRESHNESS_SECONDS + 3600)
+    stored_score(stale_age)
+    url = f"/api/v1/scores/municipality/{sample_municipality.id}"
+
+    first = client.get(url).json()
+    second = client.get(url).json()
+    # The stored score is returned immediately, flagged, with its age
+    assert first["overall_score"] == 6.5
+    assert first["is_stale"] is True and first["revalidating"] is True
+    assert first["score_age_seconds"] >= stale_age.total_seconds()
+    assert second["revalidating"] is True
+
+    # Both reads share one refresh job
+    jobs = db_session.query(ScoreJob).filter(ScoreJob.municipality_id == sample_municipality.id).all()
+    assert len(jobs) == 1
+    body = _wait_for_job(client, jobs[0].id)
+    assert body["status"] == "succeeded"
+
+    refreshed = client.get(url).json()
+    assert refreshed["is_stale"] is False
+    assert refreshed["score_age_seconds"] < 60
@@ -0,0 +1,119 @@
+"""
+Tests for the in-memory autocomplete index.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.search_index import SearchIndex, build_entries, fold, normalize_name
+
+
+def _municipality(id, name, population, postal_codes=None):
+    return SimpleNamespace(
+        id=id, name=name, code=f"{id:06d}", postal_codes=postal_codes, population=population,
+        province_name="Test Province", latitude=45.0, longitude=9.0,
+    )
+
+
+@pytest.fixture(scope="module")
+def index():
+    municipalities = [
+        _municipality(1, "Milano", 1352000, "20121,20122,20123"),
+        _municipality(2, "Milazzo", 31000, "98057"),
+        _municipality(3, "Forlì", 117000, "47121"),
+        _municipality(4, "Reggio nell'Emilia", 171000, "42121"),
+        _municipality(5, "Castro", 2400),
+        _municipality(6, "Castro", 900),
+    ]
+    zones = [
+        SimpleNamespace(id=10, zone_code="C1", zone_name="NAVIGLI - PORTA GENOVA", municipality_id=1,
+                        latitude=45.45, longitude=9.17),
+    ]
+    return SearchIndex(build_entries(municipalities, zones))
+
+
+def _labels(matches):
+    return [entry.label for entry, _ in matches]
+
+
+def test_normalization():
+    assert fold("Forlì") == "forli"
+    assert fold("Reggio nell'Emilia") == "reggio nell emilia"
+    assert normalize_name("Comune di Sant'Agata") == "sant agata"
+    assert normalize_name("  CITTÀ DI Torino ") == "torino"
+
+
+def test_exact_and_prefix_ranking(index):
+    matches = index.search("mil", kinds=("municipality",))
+    # Both are prefixes: the larger municipality wins the tie
+    assert _labels(matches) == ["Milano", "Milazzo"]
+    exact = index.search("Milano", limit=1)
+    assert exact[0][0].label == "Milano" and exact[0][1] == 1.0
+
+
+def test_accents_prefixes_and_inner_words(index):
+    assert index.search("forli")[0][0].label == "Forlì"
+    assert index.search("Comune di Forlì")[0][0].label == "Forlì"
+    assert index.search("emilia")[0][0].label == "Reggio nell'Emilia"
+
+
+def test_postal_code_prefix(index):
+    matches = index.search("2012")
+    assert {e.postal_code for e, _ in matches} == {"20121", "20122", "20123"}
+    assert all(e.municipality_id == 1 for e, _ in matches)
+
+
+def test_fuzzy_match(index):
+    matches = index.search("Milnao")
+    assert matches and matches[0][0].label == "Milano"
+    assert matches[0][1] < 0.75
+
+
+def test_omi_zone_and_kind_filter(index):
+    zones = index.search("navigli", kinds=("omi_zone",))
+    assert len(zones) == 1
+    zone = zones[0][0]
+    assert zone.id == 10 and zone.municipality_name == "Milano" and zone.code == "C1"
+    assert index.search("navigli", kinds=("municipality",)) == []
+
+
+def test_resolve_exact_names_only(index):
+    assert index.resolve("milano").id == 1
+    assert index.resolve("20122").municipality_id == 1
+    # Homonyms resolve to the most populous one
+    assert index.resolve("Castro").id == 5
+    assert index.resolve("mil") is None
+    assert index.best_municipality("Mil").label == "Milano"
+    assert index.best_municipality("Xyzzy") is None
+
+
+def test_autocomplete_endpoint(client, sample_municipality, query_budget):
+    response = client.get("/api/v1/locations/autocomplete", params={"q": "test ci"})
+    assert response.status_code == 200
+    first = response.json()[0]
+    assert first["type"] == "municipality"
+    assert first["id"] == sample_municipality.id
+    assert first["municipality_name"] == "Test City"
+
+    # Index is loaded: later lookups do not touch the database
+    with query_budget(0):
+        assert client.get("/api/v1/locations/autocomplete", params={"q": "Test"}).status_code == 200
+
+
+def test_autocomplete_rejects_unknown_types(client):
+    response = client.get("/api/v1/locations/autocomplete", params={"q": "mil", "types": "street"})
+    assert response.status_code == 400
+
+
+def test_search_resolves_municipality_without_geocoding(client, sample_municipality, monkeypatch):
+    from app.api.v1.endpoints.locations import geocoder
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Nominatim should not be called for a plain municipality name")
+
+    monkeypatch.setattr(geocoder, "geocode_address", fail)
+    monkeypatch.setattr(geocoder, "geocode_address_async", fail)
+    response = client.post("/api/v1/locations/search", json={"query": "test city"})
+    assert response.status_code == 200
+    assert response.json()["municipality"]["id"] == sample_municipality.id
@@ -0,0 +1,66 @@
+"""
+Unit tests for the fast JSON serialization path.
+
+The fast path skips Pydantic validation, so these tests check that row dicts
+built with schema_defaults()/orm_to_dict() serialize to the same JSON the
+validated response models would produce.
+"""
+
+import json
+from datetime import date
+from types import SimpleNamespace
+
+from app.api.schemas.location import MunicipalityResponse
+from app.api.schemas.risk import SeismicRiskResponse
+from app.api.schemas.score import OMIZoneScoreResponse, score_category
+from app.core.serialization import FastJSONResponse, dumps, orm_to_dict, schema_defaults
+
+
+def test_schema_defaults_cover_optional_fields():
+    """Every optional MunicipalityResponse field gets its declared default."""
+    defaults = schema_defaults(MunicipalityResponse)
+    assert "id" not in defaults  # required
+    assert defaults["hospital_count"] == 0
+    assert defaults["coordinates"] is None
+
+
+def test_schema_defaults_returns_independent_copies():
+    first = schema_defaults(OMIZoneScoreResponse)
+    first["zone_name"] = "mutated"
+    assert schema_defaults(OMIZoneScoreResponse)["zone_name"] is None
+
+
+def test_municipality_row_matches_pydantic_output():
+    """A padded row dict serializes exactly like the validated model."""
+    row = schema_defaults(MunicipalityResponse)
+    row.update(
+        id=1, name="Milano", code="015146", province_name="Milano",
+        region_name="Lombardia", population=1352000, area_sqkm=181.8,
+        postal_codes="20121", investment_score=7.5,
+        coordinates={"latitude": 45.4642, "longitude": 9.19},
+    )
+    validated = MunicipalityResponse(**row).model_dump(mode="json")
+    assert json.loads(dumps(row)) == validated
+
+
+def test_zone_row_category_matches_validator():
+    """score_category() produces the same label as the schema validator."""
+    for score in (None, 2.0, 4.5, 6.0, 7.2, 9.1):
+        model = OMIZoneScoreResponse(
+            zone_id=1, zone_code="B1", municipality_id=1,
+            overall_score=score, score_category=None,
+        )
+        assert model.score_category == score_category(score)
+
+
+def test_orm_to_dict_reads_attributes_and_defaults():
+    risk = SimpleNamespace(municipality_id=5, seismic_zone=2, hazard_level="High", risk_score=70.0)
+    data = orm_to_dict(risk, SeismicRiskResponse)
+    assert data["seismic_zone"] == 2
+    assert data["municipality_name"] is None
+    assert data["historical_earthquakes_count"] is None
+
+
+def test_fast_response_encodes_dates():
+    response = FastJSONResponse({"calculation_date": date(2024, 2, 4)})
+    assert json.loads(response.body) == {"calculation_date": "2024-02-04"}
@@ -5,7 +5,9 @@ Tests geocoding service and spatial resolution functionality.
 
 import pytest
 from app.services.geocoding import GeocodingService
-from app.models.geography import Municipality, OMIZone
+from sqlalchemy import func
+from app.core.config import settings
+from app.models.geography import Municipality, MunicipalitySubdivision, OMIZone
 from geoalchemy2.shape import from_shape
 from shapely.geometry import Point, Polygon
 
@@ -204,3 +206,56 @@ class TestGeometryData:
         bounds = polygon.bounds  # (minx, miny, maxx, maxy)
         assert 12.4 < bounds[0] < 12.5  # min longitude
         assert 41.8 < bounds[1] < 41.9  # min latitude
+
+
+class TestGeometrySubdivisions:
+    """Subdivided boundaries used by the PostGIS point-in-polygon lookups."""
+
+    def pieces(self, db_session, municipality_id):
+        return db_session.query(
+            func.count(MunicipalitySubdivision.id),
+            func.max(func.ST_NPoints(MunicipalitySubdivision.geometry)),
+            func.sum(func.ST_Area(MunicipalitySubdivision.geometry)),
+        ).filter(MunicipalitySubdivision.municipality_id == municipality_id).one()
+
+    def test_pieces_follow_geometry_changes(self, db_session, sample_municipality):
+        # ~1000 vertices: split into pieces of at most 256
+        circle = Point(12.50, 41.90).buffer(0.05, 256)
+        sample_municipality.geometry = from_shape(circle, srid=4326)
+        db_session.flush()
+
+        count, max_points, area = self.pieces(db_session, sample_municipality.id)
+        assert count > 1
+        assert max_points <= 256
+        assert abs(area - circle.area) < 1e-9
+
+        square = Polygon([(12.45, 41.85), (12.55, 41.85), (12.55, 41.95), (12.45, 41.95)])
+        sample_municipality.geometry = from_shape(square, srid=4326)
+        db_session.flush()
+        assert self.pieces(db_session, sample_municipality.id)[0] == 1
+
+        db_session.delete(sample_municipality)
+        db_session.flush()
+        assert self.pieces(db_session, sample_municipality.id)[0] == 0
+
+    def test_lookups_use_pieces(
+        self,
+        db_session,
+        sample_omi_zone_with_geometry,
+        geocoding_service,
+        monkeypatch
+    ):
+        monkeypatch.setattr(settings, "SPATIAL_INDEX_ENABLED", False)
+        # Overlapping zone covering the whole city: the smaller one wins
+        db_session.add(OMIZone(
+            municipality_id=sample_omi_zone_with_geometry.municipality_id,
+            zone_code="Z1",
+            zone_type="Residenziale",
+            geometry=from_shape(Point(12.50, 41.90).buffer(0.2, 256), srid=4326),
+        ))
+        db_session.flush()
+
+        assert geocoding_service.find_omi_zone_by_coordinates(db_session, 41.90, 12.50).zone_code == "B1"
+        assert geocoding_service.find_omi_zone_by_coordinates(db_session, 41.87, 12.47).zone_code == "Z1"
+        municipality = geocoding_service.find_municipality_by_coordinates(db_session, 41.90, 12.50)
+        assert municipality.id == sample_omi_zone_with_geometry.municipality_id
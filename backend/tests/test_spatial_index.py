@@ -0,0 +1,124 @@
+"""
+Tests for the in-memory point-in-polygon index.
+"""
+
+import pytest
+from geoalchemy2.shape import from_shape
+from shapely.geometry import box
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.geography import OMIZone
+from app.services import spatial_index
+from app.services.geocoding import GeocodingService
+from app.services.spatial_index import Area, PolygonLayer, SpatialIndex, invalidate_spatial_index, load_spatial_index
+
+CITY = box(12.45, 41.85, 12.55, 41.95)
+CENTRE = box(12.48, 41.88, 12.52, 41.92)
+
+
+def test_layer_locates_containing_polygon():
+    layer = PolygonLayer([Area(1, "058091", "Roma"), Area(2, "015146", "Milano")], [CITY, box(9.0, 45.3, 9.3, 45.6)])
+    assert layer.locate(41.90, 12.50).name == "Roma"
+    assert layer.locate(45.46, 9.19).name == "Milano"
+    assert layer.locate(40.0, 10.0) is None
+    # On the boundary: the polygon touches the point, as with ST_Intersects
+    assert layer.locate(41.85, 12.50).name == "Roma"
+
+
+def test_layer_breaks_boundary_ties_by_area_then_id():
+    west, east = box(12.40, 41.85, 12.50, 41.95), box(12.50, 41.85, 12.60, 41.95)
+    layer = PolygonLayer([Area(7, "E", "East"), Area(3, "W", "West")], [east, west])
+    # On the shared edge: equal areas, lowest id wins
+    assert layer.locate(41.90, 12.50).id == 3
+    small = PolygonLayer([Area(3, "W", "West"), Area(9, "S", "Small")], [west, box(12.50, 41.89, 12.51, 41.91)])
+    assert small.locate(41.90, 12.50).id == 9
+
+
+def test_layer_prefers_smallest_overlapping_polygon():
+    layer = PolygonLayer([Area(10, "Z", "Whole city", 1), Area(11, "B1", "Centre", 1)], [CITY, CENTRE])
+    assert layer.locate(41.90, 12.50).code == "B1"
+    assert layer.locate(41.86, 12.46).code == "Z"
+    assert PolygonLayer([], []).locate(41.90, 12.50) is None
+
+
+def test_build_started_before_invalidation_is_discarded():
+    invalidate_spatial_index()
+    generation = spatial_index._generation
+    invalidate_spatial_index()
+
+    spatial_index._install(SpatialIndex(PolygonLayer([], []), PolygonLayer([], [])), generation)
+    assert spatial_index._index is None
+
+
+def test_disabled_index_falls_back_to_postgis(monkeypatch):
+    monkeypatch.setattr(settings, "SPATIAL_INDEX_ENABLED", False)
+    assert spatial_index.get_spatial_index(db=None) is None
+
+
+@pytest.fixture
+def city_with_zone(db_session, sample_municipality):
+    sample_municipality.geometry = from_shape(CITY, srid=4326)
+    zone = OMIZone(
+        municipality_id=sample_municipality.id,
+        zone_code="B1",
+        zone_name="Central Zone",
+        zone_type="Residenziale",
+        geometry=from_shape(CENTRE, srid=4326),
+    )
+    db_session.add(zone)
+    db_session.commit()
+    return sample_municipality, zone
+
+
+def test_loaded_index_resolves_without_queries(db_session, city_with_zone, engine):
+    municipality, zone = city_with_zone
+    load_spatial_index(db_session)
+    service = GeocodingService()
+
+    statements = []
+
+    def count(*args):
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        assert service._municipality_at(db_session, 41.90, 12.50) == {
+            "id": municipality.id, "name": "Test City", "code": "001001"
+        }
+        assert service._resolve_omi_zone(db_session, municipality.id, 41.90, 12.50)["zone_code"] == "B1"
+        assert service._municipality_at(db_session, 45.46, 9.19) is None
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert statements == []
+
+    # The ORM-returning lookups agree with PostGIS
+    assert service.find_municipality_by_coordinates(db_session, 41.90, 12.50).id == municipality.id
+    assert service.find_omi_zone_by_coordinates(db_session, 41.87, 12.47) is None
+
+
+@pytest.mark.parametrize("latitude, longitude", [
+    (41.85, 12.50),  # on the city boundary
+    (41.88, 12.50),  # on the zone boundary, inside the city
+    (41.88, 12.48),  # on a zone corner
+])
+def test_boundary_points_resolve_the_same_with_and_without_index(
+    db_session, city_with_zone, monkeypatch, latitude, longitude
+):
+    service = GeocodingService()
+
+    def answers():
+        municipality = service.find_municipality_by_coordinates(db_session, latitude, longitude)
+        zone = service.find_omi_zone_by_coordinates(db_session, latitude, longitude)
+        return (municipality and municipality.id, zone and zone.id)
+
+    monkeypatch.setattr(settings, "SPATIAL_INDEX_ENABLED", False)
+    with_postgis = answers()
+    monkeypatch.setattr(settings, "SPATIAL_INDEX_ENABLED", True)
+    load_spatial_index(db_session)
+    with_index = answers()
+    invalidate_spatial_index()
+
+    municipality, zone = city_with_zone
+    assert with_postgis[0] == municipality.id
+    assert with_index == with_postgis
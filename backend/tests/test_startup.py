@@ -0,0 +1,67 @@
+"""
+Startup import budget.
+
+Imports app.main in a fresh interpreter under `python -X importtime`:
+libraries needed by a single feature (ingestion, Parquet export, the
+geocoder HTTP client) must not load at startup, and the whole import must
+stay within budget.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Imported on first use only
+LAZY_MODULES = ("pandas", "geopandas", "pyarrow", "httpx")
+# About 1.4s today (fastapi, SQLAlchemy and geoalchemy2, which pulls in shapely);
+# the headroom absorbs machine noise, not another heavy import
+IMPORT_BUDGET_SECONDS = 2.0
+
+
+def parse_importtime(output: str):
+    """{module: cumulative import time in microseconds} from `-X importtime` output."""
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.fixture(scope="module")
+def startup_imports():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return parse_importtime(result.stderr)
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     json.decoder\n"
+        "import time:       300 |        420 |   json\n"
+    )
+    assert parse_importtime(output) == {"json.decoder": 120, "json": 420}
+
+
+def test_feature_libraries_load_lazily(startup_imports):
+    loaded = [name for name in LAZY_MODULES if name in startup_imports]
+    assert not loaded, f"Imported at startup: {', '.join(loaded)}"
+
+
+def test_startup_import_budget(startup_imports):
+    seconds = startup_imports["app.main"] / 1e6
+    assert seconds < IMPORT_BUDGET_SECONDS, f"import app.main took {seconds:.2f}s (budget {IMPORT_BUDGET_SECONDS}s)"
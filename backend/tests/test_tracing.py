@@ -0,0 +1,107 @@
+"""
+Tests for OpenTelemetry tracing helpers and request/SQL spans.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("opentelemetry.sdk")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from sqlalchemy import create_engine, text
+
+from app.core.cache import SimpleTTLCache
+from app.core.tracing import (
+    FileSpanExporter,
+    TracingMiddleware,
+    current_traceparent,
+    run_in_context,
+    script_span,
+    setup_tracing,
+    shutdown_tracing,
+    start_span,
+    traced,
+)
+
+
+@pytest.fixture
+def spans():
+    exporter = InMemorySpanExporter()
+    setup_tracing("test", exporter=exporter)
+    yield exporter
+    shutdown_tracing()
+
+
+def _by_name(exporter):
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+def test_helpers_are_noops_without_tracing():
+    with start_span("anything") as span:
+        assert span is None
+    assert current_traceparent() is None
+
+
+def test_request_span_uses_route_template_and_parents_sql(spans):
+    engine = create_engine("sqlite://")
+    cache = SimpleTTLCache("trace_test")
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        cache.get(f"item:{item_id}")
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return {"id": item_id}
+
+    traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    TestClient(app).get("/items/5", headers={"traceparent": traceparent})
+
+    finished = _by_name(spans)
+    request = finished["GET /items/{item_id}"]
+    query = finished["db.query"]
+    assert format(request.context.trace_id, "032x") == "0af7651916cd43dd8448eb211c80319c"
+    assert request.attributes["http.status_code"] == 200
+    assert query.parent.span_id == request.context.span_id
+    assert query.attributes["db.statement"] == "SELECT 1"
+    assert [e.name for e in request.events] == ["cache.lookup"]
+    assert request.events[0].attributes["hit"] is False
+
+
+def test_run_in_context_keeps_parent_across_threads(spans):
+    @traced("child")
+    def work():
+        return 1
+
+    with start_span("parent") as parent:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            assert executor.submit(run_in_context(work)).result() == 1
+
+    assert _by_name(spans)["child"].parent.span_id == parent.context.span_id
+
+
+def test_script_span_continues_traceparent(spans, monkeypatch):
+    monkeypatch.setenv("TRACEPARENT", "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01")
+    with script_span("ingest.test") as span:
+        assert span is not None
+    assert format(span.context.trace_id, "032x") == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert format(span.parent.span_id, "016x") == "00f067aa0ba902b7"
+
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    setup_tracing("test", exporter=FileSpanExporter(str(path)))
+    try:
+        with start_span("one"):
+            pass
+        with start_span("two"):
+            pass
+    finally:
+        shutdown_tracing()
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["one", "two"]
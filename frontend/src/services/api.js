@@ -90,6 +90,13 @@ export const locationAPI = {
         const response = await apiClient.get('locations/featured');
         return response.data;
     },
+
+    // sections: optional array, e.g. ['score', 'risks', 'zones']; defaults to all
+    getDashboard: async (municipalityId, sections) => {
+        const params = sections ? { sections: sections.join(',') } : {};
+        const response = await apiClient.get(`locations/${municipalityId}/dashboard`, { params });
+        return response.data;
+    },
 };
 
 // Property API